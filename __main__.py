@@ -1,12 +1,27 @@
-from typing import Iterator
-from src.agents.agents import PromptGeneration
-from agno.utils.pprint import pprint_run_response
-from agno.workflow import RunResponse
+import argparse
+import importlib
+import threading
+from datetime import datetime
+from typing import Iterator, Optional
+from src.agents.budget import STRATEGIES, ContextBudget
+from src.agents.cascade import CascadePolicy
+from src.agents.convergence import ConvergencePolicy
+from src.agents.persistence import PromptWriter
 import random
-from rich.prompt import Prompt
 
+# The workflow, agno's agents and the model clients are imported by the
+# commands that need them, so --help and the topic prompt appear immediately.
+WORKFLOW_MODULE = "src.agents.agents"
+
+
+def interactive(args: argparse.Namespace):
+    from rich.prompt import Prompt
+
+    # Load the workflow in the background while the user types a topic.
+    threading.Thread(
+        target=importlib.import_module, args=(WORKFLOW_MODULE,), daemon=True
+    ).start()
 
-def main():
     # Fun example prompts to showcase the generator's versatility
     example_prompts = [
         "Crea un prompt para un agente de IA que actúe como líder en una simulación de apocalipsis zombi...",
@@ -22,20 +37,691 @@ def main():
         default=random.choice(example_prompts),
     )
 
-    # Convert the topic to a URL-safe string for use in session_id
-    url_safe_topic = topic.lower().replace(" ", "-")
+    from agno.utils.pprint import pprint_run_response
+    from agno.workflow import RunResponse
+    from rich.live import Live
+    from rich.markdown import Markdown
+    from src.agents.agents import PromptGeneration
+    from src.agents.batch import topic_session_id
 
     # Initialize the prompt generator workflow
     generate_prompt = PromptGeneration(
-        session_id=f"generate-prompt-on-{url_safe_topic}", debug_mode=True
+        session_id=topic_session_id(topic),
+        debug_mode=True,
+        **workflow_kwargs(args),
     )
 
     # Execute the workflow
-    prompt_response_iterator: Iterator[RunResponse] = generate_prompt.run(topic=topic)
+    # Tournament mode runs candidates in parallel, so it is never token-streamed
+    stream = not args.no_stream and args.candidates <= 1
+    prompt_response_iterator: Iterator[RunResponse] = generate_prompt.run(
+        topic=topic,
+        stream=stream,
+        candidates=args.candidates,
+        finalists=args.finalists,
+        convergence=convergence_policy(args),
+    )
+
+    if not stream:
+        # Print the response for each phase separately
+        for phase_response in prompt_response_iterator:
+            pprint_run_response(phase_response, markdown=True)
+    else:
+        # Render token deltas live as they arrive
+        rendered = ""
+        with Live(Markdown(rendered), vertical_overflow="visible") as live:
+            for delta in prompt_response_iterator:
+                if isinstance(delta.content, str):
+                    rendered += delta.content
+                    live.update(Markdown(rendered))
+    export_prometheus(args)
+
+
+def workflow_kwargs(args: argparse.Namespace) -> dict:
+    return {
+        "scheduler": model_scheduler(args),
+        "cascade": cascade_policy(args),
+        "lint": lint_policy(args),
+        "reuse_threshold": args.reuse_threshold,
+        "seed_threshold": args.seed_threshold,
+        "metrics_file": args.metrics_file,
+        "profile_threshold": args.profile_threshold,
+        "save_with_tools": args.save_with_tools,
+        "prompt_writer": PromptWriter(
+            write_behind=args.write_behind,
+            archive=prompt_archive(args) if args.archive else None,
+        ),
+        "context_budget": ContextBudget(
+            limits=args.phase_budget,
+            default=args.token_budget,
+            strategy=args.budget_strategy,
+        ),
+    }
+
+
+def model_scheduler(args: argparse.Namespace):
+    from src.agents.scheduler import (
+        HedgePolicy,
+        ModelLimits,
+        RetryPolicy,
+        Scheduler,
+    )
+
+    limits = {}
+    for model_id, rpm in args.rpm:
+        limits.setdefault(model_id, ModelLimits()).requests_per_minute = rpm
+    for model_id, tpm in args.tpm:
+        limits.setdefault(model_id, ModelLimits()).tokens_per_minute = tpm
+    return Scheduler(
+        limits=limits,
+        retry=RetryPolicy(max_attempts=args.max_attempts),
+        hedge=HedgePolicy(quantile=args.hedge_quantile) if args.hedge else None,
+    )
+
+
+def cascade_policy(args: argparse.Namespace) -> Optional[CascadePolicy]:
+    if not args.cascade_generator and not args.cascade_evaluator:
+        return None
+    return CascadePolicy(
+        generator_tiers=args.cascade_generator,
+        evaluator_tiers=args.cascade_evaluator,
+        min_quality=args.min_quality,
+        min_score=args.min_score,
+    )
+
+
+def prompt_archive(args: argparse.Namespace):
+    from src.agents.archive import PromptArchive
+
+    return PromptArchive(args.archive_dir, compression=args.compression)
+
+
+def lint_policy(args: argparse.Namespace):
+    if args.lint_skip is None and not args.lint_hints:
+        return None
+    from src.agents.lint import LintPolicy
+
+    return LintPolicy(skip_threshold=args.lint_skip, hints=args.lint_hints)
+
+
+def convergence_policy(args: argparse.Namespace) -> Optional[ConvergencePolicy]:
+    if args.rounds is None:
+        return None
+    return ConvergencePolicy(
+        max_rounds=args.rounds,
+        min_improvement=args.min_improvement,
+        target_score=args.target_score,
+        max_seconds=args.max_seconds,
+        max_tokens=args.max_tokens,
+    )
+
+
+def phase_budget(value: str) -> tuple:
+    phase, _, tokens = value.partition("=")
+    if not phase.isdigit() or not tokens.isdigit():
+        raise argparse.ArgumentTypeError("expected PHASE=TOKENS, e.g. 3=2000")
+    return f"Phase {phase}", int(tokens)
+
+
+def iso_date(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected an ISO date, e.g. 2024-06-01")
+
+
+def model_rate(value: str) -> tuple:
+    model_id, _, rate = value.partition("=")
+    try:
+        return model_id, float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected MODEL=N, e.g. gpt-4.1=500")
+
+
+def export_prometheus(args: argparse.Namespace):
+    from src.agents.metrics import get_default_registry
+
+    if args.prometheus_file:
+        get_default_registry().write_prometheus(args.prometheus_file)
+
+
+def batch(args: argparse.Namespace):
+    from rich.console import Console
+    from src.agents.batch import read_topics, run_batch
+
+    topics = read_topics(args.topics_file)
+    summary = run_batch(
+        topics,
+        output_path=args.output,
+        concurrency=args.concurrency,
+        use_cache=not args.no_cache,
+        convergence=convergence_policy(args),
+        **workflow_kwargs(args),
+    )
+    export_prometheus(args)
+    Console().print(
+        f"[bold]Batch complete:[/bold] {summary.succeeded}/{summary.total} succeeded, "
+        f"{summary.failed} failed in {summary.elapsed_seconds:.1f}s "
+        f"({summary.throughput:.2f} topics/s)"
+    )
+
+
+def resume(args: argparse.Namespace):
+    from rich.console import Console
+    from src.agents.batch import resume_runs
+    from src.agents.checkpoints import get_default_checkpoint_store
+
+    console = Console()
+    if args.list:
+        records = get_default_checkpoint_store().interrupted(include_failed=args.failed)
+        if not records:
+            console.print("No interrupted runs.")
+        for record in records:
+            console.print(
+                f"[bold]{record.run_id}[/bold] {record.topic} [dim]{record.status}, "
+                f"last checkpoint {record.phase or 'none'}, "
+                f"started {record.created_at:%Y-%m-%d %H:%M}[/dim]"
+            )
+        return
+    summary = resume_runs(
+        output_path=args.output,
+        run_ids=args.run_ids,
+        include_failed=args.failed,
+        concurrency=args.concurrency,
+        **workflow_kwargs(args),
+    )
+    export_prometheus(args)
+    console.print(
+        f"[bold]Resumed {summary.total} runs:[/bold] {summary.succeeded} succeeded, "
+        f"{summary.failed} failed in {summary.elapsed_seconds:.1f}s"
+    )
+
+
+def history(args: argparse.Namespace):
+    from rich.console import Console
+    from rich.markdown import Markdown
+    from src.agents.history import get_default_prompt_store
+
+    store = get_default_prompt_store()
+    console = Console()
+    if args.query:
+        try:
+            records = store.search(args.query, limit=args.limit)
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            return
+    elif args.topic:
+        records = store.by_topic(args.topic, limit=args.limit)
+    else:
+        records = store.recent(limit=args.limit, since=args.since)
+    if not records:
+        console.print("No final prompts found.")
+        return
+    for record in records:
+        console.print(
+            f"[bold]{record.topic}[/bold] [dim]{record.timestamp:%Y-%m-%d %H:%M} "
+            f"{record.session_id or ''}[/dim]"
+        )
+        if args.full:
+            console.print(Markdown(record.final_prompt))
+        else:
+            preview = " ".join(record.final_prompt.split())
+            console.print(preview[:200] + ("…" if len(preview) > 200 else ""))
+        console.print()
+
+
+def lint(args: argparse.Namespace) -> int:
+    import json
+    import os
+    import time
+
+    from rich.console import Console
+    from rich.markup import escape
+    from src.agents.lint import scan
+
+    console = Console()
+    paths = args.paths or ["prompt"]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        console.print(
+            f"[red]No such file or directory: {escape(', '.join(missing))}[/red]"
+        )
+        return 2
+    unreadable = []
+
+    def report_error(path: str, error: Exception):
+        unreadable.append(path)
+        if args.json:
+            console.print_json(
+                json.dumps({"path": path, "error": str(error)}), indent=None
+            )
+        else:
+            console.print(
+                f"[red]Could not read {escape(path)}: {escape(str(error))}[/red]",
+                soft_wrap=True,
+            )
+
+    started = time.perf_counter()
+    scanned = below = 0
+    for path, report in scan(paths, on_error=report_error):
+        scanned += 1
+        below += report.score < args.fail_under
+        if args.json:
+            console.print_json(
+                json.dumps(
+                    {
+                        "path": path,
+                        "score": report.score,
+                        "scores": report.scores,
+                        "failed": [rule.name for rule in report.failed],
+                    }
+                ),
+                indent=None,
+            )
+        elif report.score < args.fail_under or args.verbose:
+            failed = ", ".join(rule.name for rule in report.failed) or "-"
+            style = "red" if report.score < args.fail_under else "green"
+            console.print(
+                f"[{style}]{report.score:5.2f}[/{style}]  {escape(path)}  "
+                f"[dim]failed: {failed}[/dim]",
+                soft_wrap=True,
+            )
+    if not args.json:
+        console.print(
+            f"Linted {scanned} prompt(s) in {time.perf_counter() - started:.3f}s; "
+            f"{below} below {args.fail_under:g}"
+            + (f", {len(unreadable)} unreadable." if unreadable else ".")
+        )
+    return 1 if below or unreadable else 0
+
+
+def archive(args: argparse.Namespace) -> int:
+    import os
+    import time
+
+    from rich.console import Console
+    from rich.markup import escape
+
+    console = Console()
+    if args.action == "ingest" and not os.path.isdir(args.directory):
+        console.print(f"[red]No such directory: {escape(args.directory)}[/red]")
+        return 2
+    store = prompt_archive(args)
+    started = time.perf_counter()
+    if args.action == "ingest":
+        files, new = store.ingest(args.directory)
+        console.print(f"Archived {files} prompt file(s), {new} of them new.")
+    elif args.action == "export":
+        written = store.export(args.output, overwrite=args.overwrite)
+        console.print(f"Exported {written} prompt file(s) to {escape(args.output)}.")
+    elif args.action == "verify":
+        problems = store.verify()
+        for problem in problems:
+            console.print(f"[red]{escape(problem)}[/red]", soft_wrap=True)
+        console.print(
+            f"Verified {store.stats().bodies} stored prompt(s): {len(problems)} problem(s)."
+        )
+        if problems:
+            return 1
+    stats = store.stats()
+    console.print(
+        f"{stats.entries} prompt(s), {stats.bodies} unique, in "
+        f"{stats.segments} segment(s): {stats.body_bytes} bytes stored as "
+        f"{stats.stored_bytes} ({stats.ratio:.1f}x) "
+        f"[{time.perf_counter() - started:.3f}s]"
+    )
+    return 0
+
+
+def serve(args: argparse.Namespace):
+    import asyncio
+
+    from src.agents.server import PromptServer
+
+    server = PromptServer(
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        **workflow_kwargs(args),
+    )
+    try:
+        asyncio.run(server.serve(args.host, args.port, socket_path=args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        export_prometheus(args)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate, evaluate and improve prompts for AI agents."
+    )
+    parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="Show each phase only once it completes instead of streaming tokens.",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=1,
+        help="Generate and evaluate this many candidates in parallel (tournament mode).",
+    )
+    parser.add_argument(
+        "--finalists",
+        type=int,
+        default=1,
+        help="Number of top-ranked candidates to improve in tournament mode.",
+    )
+    parser.add_argument(
+        "--reuse-threshold",
+        type=float,
+        help="Return the final prompt of an earlier topic at least this similar (0-1) "
+        "instead of running the phases. Off by default.",
+    )
+    parser.add_argument(
+        "--seed-threshold",
+        type=float,
+        default=0.7,
+        help="Seed Phase 1 with the final prompt of an earlier topic at least this "
+        "similar (0-1).",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Append per-phase metrics of every run to this JSONL file.",
+    )
+    parser.add_argument(
+        "--prometheus-file",
+        help="Write aggregated metrics in Prometheus text format to this file.",
+    )
+    parser.add_argument(
+        "--profile-threshold",
+        type=float,
+        help="Save a sampling profile of phases slower than this many seconds.",
+    )
+    parser.add_argument(
+        "--save-with-tools",
+        action="store_true",
+        help="Let the agent save the final prompt with its file tools (slower).",
+    )
+    parser.add_argument(
+        "--write-behind",
+        action="store_true",
+        help="Save final prompts from a background thread.",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        help="Input token budget (instructions included) of every agent call.",
+    )
+    parser.add_argument(
+        "--phase-budget",
+        type=phase_budget,
+        action="append",
+        default=[],
+        metavar="PHASE=TOKENS",
+        help="Input token budget of one phase, e.g. 3=2000. Can be repeated.",
+    )
+    parser.add_argument(
+        "--budget-strategy",
+        choices=STRATEGIES,
+        default="truncate",
+        help="How over-budget inputs are shortened.",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        help="Convergence mode: repeat evaluation and improvement up to this many rounds.",
+    )
+    parser.add_argument(
+        "--min-improvement",
+        type=float,
+        default=0.25,
+        help="Stop once a round improves the score by less than this (convergence mode).",
+    )
+    parser.add_argument(
+        "--target-score",
+        type=float,
+        default=9.0,
+        help="Stop once the score reaches this (convergence mode).",
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        help="Latency budget of a run in convergence mode.",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        help="Model token budget of a run in convergence mode.",
+    )
+    parser.add_argument(
+        "--cascade-generator",
+        action="append",
+        default=[],
+        metavar="MODEL",
+        help="Cheaper model tried before the generator in Phase 1. Can be repeated, cheapest first.",
+    )
+    parser.add_argument(
+        "--cascade-evaluator",
+        action="append",
+        default=[],
+        metavar="MODEL",
+        help="Cheaper model tried before the evaluator in Phase 2. Can be repeated, cheapest first.",
+    )
+    parser.add_argument(
+        "--min-quality",
+        type=float,
+        default=0.8,
+        help="Escalate a cascade tier's initial prompt below this local quality score (0-1).",
+    )
+    parser.add_argument(
+        "--min-score",
+        type=float,
+        default=7.0,
+        help="Escalate a cascade tier's evaluation below this overall score.",
+    )
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Store final prompts in the deduplicated archive instead of prompt/ files.",
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default="tmp/archive",
+        help="Directory of the prompt archive.",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=("none", "gzip", "zstd"),  # archive.CODECS, not imported at startup
+        default="gzip",
+        help="Compression of newly archived prompts (zstd needs Python 3.14 or zstandard).",
+    )
+    parser.add_argument(
+        "--lint-skip",
+        type=float,
+        metavar="SCORE",
+        help="Skip the evaluator when the initial prompt's lint score (0-10) reaches this.",
+    )
+    parser.add_argument(
+        "--lint-hints",
+        action="store_true",
+        help="Send the lint findings to the evaluator so it can focus on the rest.",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=model_rate,
+        action="append",
+        default=[],
+        metavar="MODEL=N",
+        help="Requests per minute allowed for a model, e.g. gpt-4.1=500. Can be repeated.",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=model_rate,
+        action="append",
+        default=[],
+        metavar="MODEL=N",
+        help="Tokens per minute allowed for a model. Can be repeated.",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=4,
+        help="Attempts per model request on throttling or transient errors.",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Duplicate non-streamed requests slower than the usual tail latency.",
+    )
+    parser.add_argument(
+        "--hedge-quantile",
+        type=float,
+        default=0.95,
+        help="Latency quantile after which a request is hedged (with --hedge).",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch_parser = subparsers.add_parser(
+        "batch", help="Generate prompts for every topic in a JSONL/CSV file."
+    )
+    batch_parser.add_argument("topics_file", help="JSONL or CSV file of topics.")
+    batch_parser.add_argument(
+        "-o", "--output", default="tmp/batch_results.jsonl", help="Output JSONL file."
+    )
+    batch_parser.add_argument(
+        "-c", "--concurrency", type=int, default=4, help="Topics run in parallel."
+    )
+    batch_parser.add_argument(
+        "--no-cache", action="store_true", help="Ignore cached phase results."
+    )
+
+    history_parser = subparsers.add_parser(
+        "history", help="Search the final prompts generated so far."
+    )
+    history_parser.add_argument(
+        "query", nargs="?", help='Full-text query, e.g. zombie or "space travel".'
+    )
+    history_parser.add_argument("--topic", help="Only prompts for this exact topic.")
+    history_parser.add_argument(
+        "--since", type=iso_date, help="Only prompts saved on or after this ISO date."
+    )
+    history_parser.add_argument(
+        "-n", "--limit", type=int, default=20, help="Maximum prompts shown."
+    )
+    history_parser.add_argument(
+        "--full", action="store_true", help="Show whole prompts instead of previews."
+    )
+
+    resume_parser = subparsers.add_parser(
+        "resume", help="Resume interrupted runs at their first incomplete phase."
+    )
+    resume_parser.add_argument(
+        "run_ids", nargs="*", help="Runs to resume. Defaults to every interrupted run."
+    )
+    resume_parser.add_argument(
+        "--failed",
+        action="store_true",
+        help="Also retry runs that ended with an error.",
+    )
+    resume_parser.add_argument(
+        "--list", action="store_true", help="Only list the runs that would be resumed."
+    )
+    resume_parser.add_argument(
+        "-o", "--output", default="tmp/batch_results.jsonl", help="Output JSONL file."
+    )
+    resume_parser.add_argument(
+        "-c", "--concurrency", type=int, default=4, help="Runs resumed in parallel."
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Serve prompt generation over HTTP with warm agents and storage."
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to bind.")
+    serve_parser.add_argument("--port", type=int, default=8000, help="Port to bind.")
+    serve_parser.add_argument(
+        "--socket", help="Listen on this Unix socket instead of host and port."
+    )
+    serve_parser.add_argument(
+        "--max-concurrency", type=int, default=4, help="Runs executed in parallel."
+    )
+    serve_parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=32,
+        help="Runs waiting for a slot before requests are rejected with 503.",
+    )
+
+    lint_parser = subparsers.add_parser(
+        "lint", help="Score saved prompts with the static prompt linter."
+    )
+    lint_parser.add_argument(
+        "paths",
+        nargs="*",
+        help="Prompt files or directories, searched recursively (default: prompt/).",
+    )
+    lint_parser.add_argument(
+        "--fail-under",
+        type=float,
+        default=7.0,
+        help="Report prompts below this score and exit with status 1 if any "
+        "(or if a file cannot be read).",
+    )
+    lint_parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Report every prompt."
+    )
+    lint_parser.add_argument(
+        "--json", action="store_true", help="Print one JSON line per prompt."
+    )
+
+    archive_parser = subparsers.add_parser(
+        "archive", help="Manage the content-addressed prompt archive."
+    )
+    archive_actions = archive_parser.add_subparsers(dest="action", required=True)
+    ingest_parser = archive_actions.add_parser(
+        "ingest", help="Archive the markdown files of a prompt directory."
+    )
+    ingest_parser.add_argument(
+        "directory", nargs="?", default="prompt", help="Directory to archive."
+    )
+    export_parser = archive_actions.add_parser(
+        "export", help="Write every archived prompt back to a markdown file."
+    )
+    export_parser.add_argument(
+        "-o", "--output", default="prompt", help="Directory to export to."
+    )
+    export_parser.add_argument(
+        "--overwrite", action="store_true", help="Replace existing files."
+    )
+    archive_actions.add_parser(
+        "verify", help="Check every stored prompt against its hash."
+    )
+    archive_actions.add_parser("stats", help="Show archive size and deduplication.")
+
+    args = parser.parse_args()
+    if args.archive and args.save_with_tools:
+        parser.error("--archive cannot be combined with --save-with-tools")
+    if args.compression == "zstd" and (args.archive or args.command == "archive"):
+        from src.agents.archive import check_codec
 
-    # Print the response for each phase separately
-    for phase_response in prompt_response_iterator:
-        pprint_run_response(phase_response, markdown=True)
+        try:
+            check_codec(args.compression)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command == "batch":
+        batch(args)
+    elif args.command == "history":
+        history(args)
+    elif args.command == "resume":
+        resume(args)
+    elif args.command == "serve":
+        serve(args)
+    elif args.command == "lint":
+        raise SystemExit(lint(args))
+    elif args.command == "archive":
+        raise SystemExit(archive(args))
+    else:
+        interactive(args)
 
 
 if __name__ == "__main__":
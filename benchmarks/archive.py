@@ -0,0 +1,132 @@
+"""Prompt archive benchmark against a directory of markdown files.
+
+Generates a corpus of saved prompts in which most bodies repeat (as they do
+when the same topics are regenerated daily), then compares the plain
+``prompt/`` directory with the archive: bytes on disk, ingest time, listing
+and reading every prompt, looking up the latest prompt of a topic, a full
+export and a full integrity check, for each codec available:
+
+    python -m benchmarks.archive --files 5000 --distinct 500
+    python -m benchmarks.archive --codec none gzip
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date
+from typing import Any, Callable, Dict, Tuple
+
+from src.agents.archive import CODECS, PromptArchive, check_codec
+from src.agents.mock import DEFAULT_RESPONSE
+from src.agents.persistence import prompt_filename, prompt_slug
+
+
+def timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn()
+    return result, round(time.perf_counter() - started, 4)
+
+
+def disk_usage(directory: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(directory)
+        for name in names
+    )
+
+
+def make_corpus(directory: str, files: int, distinct: int, topics: int) -> None:
+    """Writes ``files`` prompts over ``topics`` topics with ``distinct`` bodies."""
+    os.makedirs(directory)
+    for i in range(files):
+        body = f"{DEFAULT_RESPONSE}\n## Variant\n\nVariant {i % distinct}.\n"
+        day = date(2025, 1 + (i // topics) // 28 % 12, 1 + (i // topics) % 28)
+        name = prompt_filename(f"Topic {i % topics}", day)
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(body)
+
+
+def scan_directory(directory: str) -> int:
+    total = 0
+    for entry in os.scandir(directory):
+        with open(entry.path, encoding="utf-8") as f:
+            total += len(f.read())
+    return total
+
+
+def latest_in_directory(directory: str, slug: str) -> str:
+    names = sorted(
+        entry.name
+        for entry in os.scandir(directory)
+        if entry.name[: -len("-YYYY-MM-DD.md")] == slug
+    )
+    with open(os.path.join(directory, names[-1]), encoding="utf-8") as f:
+        return f.read()
+
+
+def run_codec(codec: str, corpus: str, workdir: str) -> Dict[str, Any]:
+    archive = PromptArchive(os.path.join(workdir, codec), compression=codec)
+    (files, bodies), ingest = timed(lambda: archive.ingest(corpus))
+    _, listing = timed(lambda: sum(1 for _ in archive.entries()))
+    _, latest = timed(lambda: archive.latest("Topic 7"))
+    export_dir = os.path.join(workdir, f"export-{codec}")
+    _, export = timed(lambda: archive.export(export_dir))
+    problems, verify = timed(archive.verify)
+    stats = archive.stats()
+    return {
+        "files": files,
+        "bodies": bodies,
+        "disk_bytes": disk_usage(archive.directory),
+        "compression_ratio": round(stats.ratio, 2),
+        "ingest_seconds": ingest,
+        "list_seconds": listing,
+        "latest_seconds": latest,
+        "export_seconds": export,
+        "verify_seconds": verify,
+        "problems": len(problems),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000, help="Prompt files.")
+    parser.add_argument(
+        "--distinct", type=int, default=500, help="Distinct prompt bodies."
+    )
+    parser.add_argument("--topics", type=int, default=200, help="Distinct topics.")
+    parser.add_argument(
+        "--codec", nargs="*", choices=CODECS, help="Codecs to run (default: all)."
+    )
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {"parameters": vars(args)}
+    with tempfile.TemporaryDirectory(prefix="promptgen-archive-") as workdir:
+        corpus = os.path.join(workdir, "prompt")
+        make_corpus(corpus, args.files, args.distinct, args.topics)
+        _, scan = timed(lambda: scan_directory(corpus))
+        _, latest = timed(lambda: latest_in_directory(corpus, prompt_slug("Topic 7")))
+        results["directory"] = {
+            "disk_bytes": disk_usage(corpus),
+            "read_all_seconds": scan,
+            "latest_seconds": latest,
+        }
+        print(f"directory: {results['directory']['disk_bytes']} bytes")
+        for codec in args.codec or CODECS:
+            try:
+                check_codec(codec)
+            except ValueError as e:
+                print(f"{codec}: skipped ({e})")
+                continue
+            results[codec] = run_codec(codec, corpus, workdir)
+            print(
+                f"{codec}: {results[codec]['disk_bytes']} bytes, "
+                f"{results[codec]['bodies']} bodies, "
+                f"export {results[codec]['export_seconds']}s"
+            )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Scheduler benchmark against a throttling, slow-tailed stand-in for the API.
+
+Runs a batch of topics through the real OpenAI client against
+``benchmarks.stand_in`` under each scheduler configuration (no retries, the
+default retries and AIMD concurrency, and retries plus hedging) and reports
+completed runs, elapsed time, run latency percentiles, the scheduler's
+counters and the 429s the stand-in sent:
+
+    python -m benchmarks.rate_limits --topics 24 --concurrency 8 --rpm gpt-4.1=120
+    python -m benchmarks.rate_limits --throttle-rate 0.2 --tail-rate 0.05
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict
+
+from benchmarks.stand_in import Faults, StandInServer, model_rates
+from benchmarks.workflow import make_topics, summarize
+from src.agents.batch import run_batch
+from src.agents.cache import PhaseCache
+from src.agents.clients import PooledOpenAIResponses
+from src.agents.scheduler import HedgePolicy, ModelLimits, RetryPolicy, Scheduler
+from src.agents.similarity import TopicIndex
+from src.agents.storage import SharedSqliteStorage
+
+
+def scenarios(args: argparse.Namespace) -> Dict[str, Scheduler]:
+    limits = {
+        model_id: ModelLimits(requests_per_minute=rpm)
+        for model_id, rpm in model_rates(args.client_rpm).items()
+    }
+    return {
+        "no_retries": Scheduler(limits=limits, retry=RetryPolicy(max_attempts=1)),
+        "scheduler": Scheduler(limits=limits),
+        "scheduler_hedged": Scheduler(
+            limits=limits, hedge=HedgePolicy(min_delay=0.5, min_samples=10)
+        ),
+    }
+
+
+def run_scenario(
+    name: str, scheduler: Scheduler, args: argparse.Namespace, workdir: str
+) -> Dict[str, Any]:
+    # A fresh server per scenario, so its rate windows start empty.
+    server = StandInServer(
+        Faults(
+            latency=args.latency,
+            tail_rate=args.tail_rate,
+            tail_latency=args.tail_latency,
+            rpm=model_rates(args.rpm),
+            throttle_rate=args.throttle_rate,
+            error_rate=args.error_rate,
+        ),
+        seed=args.seed,
+    )
+    base_url = server.start()
+    try:
+
+        def model(model_id: str) -> PooledOpenAIResponses:
+            return PooledOpenAIResponses(
+                id=model_id, base_url=base_url, api_key="stand-in", max_retries=0
+            )
+
+        path = os.path.join(workdir, "tmp", name)
+        output_path = os.path.join(path, "results.jsonl")
+        started = time.perf_counter()
+        summary = run_batch(
+            make_topics(args.topics, name),
+            output_path,
+            concurrency=args.concurrency,
+            use_cache=False,
+            storage=SharedSqliteStorage(
+                table_name="prompt_generation_workflows",
+                db_file=os.path.join(path, "storage.db"),
+            ),
+            phase_cache=PhaseCache(db_file=os.path.join(path, "cache.db")),
+            topic_index=TopicIndex(db_file=os.path.join(path, "topic_index.db")),
+            reuse_threshold=None,
+            seed_threshold=None,
+            generator_model=model("gpt-4.1"),
+            evaluator_model=model("o4-mini"),
+            scheduler=scheduler,
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+
+    with open(output_path, "r", encoding="utf-8") as f:
+        results = [json.loads(line) for line in f]
+    return {
+        "succeeded": summary.succeeded,
+        "failed": summary.failed,
+        "elapsed_seconds": round(elapsed, 3),
+        "run_latency": summarize(
+            [r["elapsed_seconds"] for r in results if r["status"] == "ok"]
+        ),
+        "scheduler": scheduler.stats(),
+        "stand_in": dict(server.stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--topics", type=int, default=16, help="Topics per scenario.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Topics in flight.")
+    parser.add_argument(
+        "--latency", type=float, default=0.1, help="Stand-in response latency (s)."
+    )
+    parser.add_argument(
+        "--tail-rate", type=float, default=0.05, help="Share of slow responses."
+    )
+    parser.add_argument(
+        "--tail-latency", type=float, default=2.0, help="Latency of slow responses."
+    )
+    parser.add_argument(
+        "--rpm",
+        nargs="*",
+        default=["gpt-4.1=120"],
+        metavar="MODEL=N",
+        help="Per-model limits enforced by the stand-in (429 beyond them).",
+    )
+    parser.add_argument(
+        "--client-rpm",
+        nargs="*",
+        default=[],
+        metavar="MODEL=N",
+        help="Per-model limits configured on the scheduler.",
+    )
+    parser.add_argument(
+        "--throttle-rate", type=float, default=0.1, help="Share of random 429s."
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of random 500s."
+    )
+    parser.add_argument("--seed", type=int, default=7, help="Fault injection seed.")
+    parser.add_argument(
+        "--scenario",
+        nargs="*",
+        help="Only run these scenarios (no_retries, scheduler, scheduler_hedged).",
+    )
+    args = parser.parse_args()
+
+    original_cwd = os.getcwd()
+    results: Dict[str, Any] = {"parameters": vars(args)}
+    with tempfile.TemporaryDirectory(prefix="promptgen-rate-limits-") as workdir:
+        # Final prompts are saved to the working directory; keep them out of the repo.
+        os.chdir(workdir)
+        try:
+            for name, scheduler in scenarios(args).items():
+                if args.scenario and name not in args.scenario:
+                    continue
+                results[name] = run_scenario(name, scheduler, args, workdir)
+                print(
+                    f"{name}: {results[name]['succeeded']} ok, "
+                    f"{results[name]['failed']} failed in "
+                    f"{results[name]['elapsed_seconds']}s"
+                )
+        finally:
+            os.chdir(original_cwd)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
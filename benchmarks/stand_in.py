@@ -0,0 +1,307 @@
+"""Local stand-in for the OpenAI Responses API that injects throttling and delays.
+
+It answers ``POST /v1/responses`` (plain and streamed) with the MockModel
+prompt, or the mock evaluation when JSON output is requested, after a
+configurable latency with an optional slow tail. Requests over the per-model
+rate limit, plus a random share of the others, get ``429`` with Retry-After;
+another share gets ``500``. Point a model at it with
+``base_url="http://127.0.0.1:<port>/v1"``:
+
+    python -m benchmarks.stand_in --port 8100 --rpm gpt-4.1=120 --throttle-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Tuple
+from uuid import uuid4
+
+from src.agents.budget import estimate_tokens
+from src.agents.mock import DEFAULT_EVALUATION, DEFAULT_RESPONSE
+
+
+@dataclass
+class Faults:
+    """What the stand-in does to each request."""
+
+    # Seconds before answering, and the share of requests that take tail_latency.
+    latency: float = 0.2
+    tail_rate: float = 0.0
+    tail_latency: float = 3.0
+    # Requests per minute allowed per model (e.g. {"gpt-4.1": 120}).
+    rpm: Dict[str, float] = field(default_factory=dict)
+    # Share of the requests within the limits that still get 429 or 500.
+    throttle_rate: float = 0.0
+    error_rate: float = 0.0
+    retry_after: float = 1.0
+    # Streaming speed of the output text.
+    tokens_per_second: float = 500.0
+
+
+class StandInServer:
+    """Serves the fake Responses API on its own event loop thread."""
+
+    def __init__(self, faults: Faults, seed: Optional[int] = None):
+        self.faults = faults
+        self.stats: Counter = Counter()
+        self._random = random.Random(seed)
+        self._windows: Dict[str, Deque[float]] = defaultdict(deque)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # --- Fault injection ---
+    def _rate_limited(self, model: str) -> Optional[float]:
+        """Records the request; returns the Retry-After delay if over the limit."""
+        limit = self.faults.rpm.get(model)
+        if not limit:
+            return None
+        now = time.monotonic()
+        window = self._windows[model]
+        while window and now - window[0] >= 60:
+            window.popleft()
+        if len(window) >= limit:
+            return max(0.1, 60 - (now - window[0]))
+        window.append(now)
+        return None
+
+    def _fault(self, model: str) -> Tuple[int, Optional[float]]:
+        """Returns the status to answer with and its Retry-After, if any."""
+        wait = self._rate_limited(model)
+        if wait is not None:
+            return 429, wait
+        roll = self._random.random()
+        if roll < self.faults.throttle_rate:
+            return 429, self.faults.retry_after
+        if roll < self.faults.throttle_rate + self.faults.error_rate:
+            return 500, None
+        return 200, None
+
+    def _latency(self) -> float:
+        if self._random.random() < self.faults.tail_rate:
+            self.stats["slow"] += 1
+            return self.faults.tail_latency
+        return self.faults.latency
+
+    # --- Responses API ---
+    @staticmethod
+    def _response(request: Dict[str, Any], text: str, status: str) -> Dict[str, Any]:
+        input_tokens = estimate_tokens(json.dumps(request.get("input", "")))
+        output_tokens = estimate_tokens(text) if text else 0
+        return {
+            "id": f"resp_{uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": request.get("model", "stand-in"),
+            "status": status,
+            "error": None,
+            "incomplete_details": None,
+            "instructions": None,
+            "metadata": {},
+            "parallel_tool_calls": True,
+            "temperature": None,
+            "tool_choice": "auto",
+            "tools": [],
+            "top_p": None,
+            "output": [
+                {
+                    "type": "message",
+                    "id": f"msg_{uuid4().hex}",
+                    "status": "completed",
+                    "role": "assistant",
+                    "content": [
+                        {"type": "output_text", "text": text, "annotations": []}
+                    ],
+                }
+            ]
+            if text
+            else [],
+            "usage": {
+                "input_tokens": input_tokens,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": output_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": input_tokens + output_tokens,
+            },
+        }
+
+    @staticmethod
+    def _output_text(request: Dict[str, Any]) -> str:
+        output_format = (request.get("text") or {}).get("format") or {}
+        if output_format.get("type") in ("json_object", "json_schema"):
+            return json.dumps(DEFAULT_EVALUATION)
+        return DEFAULT_RESPONSE
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers: Dict[str, str] = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", "0")))
+            if len(request_line) < 2 or not request_line[1].endswith("/responses"):
+                await self._send(writer, 404, {"error": {"message": "Not found"}})
+                return
+            await self._respond(writer, json.loads(body or b"{}"))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, request: Dict[str, Any]):
+        model = str(request.get("model", ""))
+        self.stats["requests"] += 1
+        status, wait = self._fault(model)
+        if status == 429:
+            self.stats["throttled"] += 1
+            await self._send(
+                writer,
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                {"Retry-After": f"{wait:.2f}"},
+            )
+            return
+        await asyncio.sleep(self._latency())
+        if status == 500:
+            self.stats["errors"] += 1
+            await self._send(writer, 500, {"error": {"message": "Injected error"}})
+            return
+        self.stats["ok"] += 1
+        text = self._output_text(request)
+        if not request.get("stream"):
+            await self._send(writer, 200, self._response(request, text, "completed"))
+            return
+        writer.write(self._head(200, "text/event-stream"))
+        sequence = iter(range(1_000_000))
+
+        async def event(payload: Dict[str, Any]):
+            payload["sequence_number"] = next(sequence)
+            data = json.dumps(payload)
+            writer.write(f"event: {payload['type']}\ndata: {data}\n\n".encode())
+            await writer.drain()
+
+        await event(
+            {
+                "type": "response.created",
+                "response": self._response(request, "", "in_progress"),
+            }
+        )
+        words = text.split(" ")
+        for index, word in enumerate(words):
+            delta = word if index == len(words) - 1 else word + " "
+            await asyncio.sleep(estimate_tokens(delta) / self.faults.tokens_per_second)
+            await event(
+                {
+                    "type": "response.output_text.delta",
+                    "item_id": "msg_stand_in",
+                    "output_index": 0,
+                    "content_index": 0,
+                    "delta": delta,
+                }
+            )
+        await event(
+            {
+                "type": "response.completed",
+                "response": self._response(request, text, "completed"),
+            }
+        )
+
+    @staticmethod
+    def _head(
+        status: int, content_type: str, headers: Optional[Dict[str, str]] = None
+    ) -> bytes:
+        lines = [f"HTTP/1.1 {status} X", f"Content-Type: {content_type}"]
+        lines += ["Connection: close"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        payload = json.dumps(body).encode("utf-8")
+        headers = {**(headers or {}), "Content-Length": str(len(payload))}
+        writer.write(self._head(status, "application/json", headers) + payload)
+        await writer.drain()
+
+    # --- Lifecycle ---
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Starts serving on a background thread and returns the API base URL."""
+        started = threading.Event()
+
+        async def serve():
+            self._loop = asyncio.get_running_loop()
+            self._server = await asyncio.start_server(self.handle, host, port)
+            started.set()
+            async with self._server:
+                try:
+                    await self._server.serve_forever()
+                except asyncio.CancelledError:
+                    pass
+
+        threading.Thread(
+            target=asyncio.run, args=(serve(),), name="stand-in", daemon=True
+        ).start()
+        started.wait()
+        bound_port = self._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}/v1"
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+
+def model_rates(values) -> Dict[str, float]:
+    rates = {}
+    for value in values:
+        model, _, rate = value.partition("=")
+        rates[model] = float(rate)
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-latency", type=float, default=3.0)
+    parser.add_argument(
+        "--rpm", nargs="*", default=[], metavar="MODEL=N", help="Per-model limits."
+    )
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StandInServer(
+        Faults(
+            latency=args.latency,
+            tail_rate=args.tail_rate,
+            tail_latency=args.tail_latency,
+            rpm=model_rates(args.rpm),
+            throttle_rate=args.throttle_rate,
+            error_rate=args.error_rate,
+        )
+    )
+    print(f"Serving the stand-in API at {server.start(args.host, args.port)}")
+    try:
+        while True:
+            time.sleep(10)
+            print(dict(server.stats))
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
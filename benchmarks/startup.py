@@ -0,0 +1,134 @@
+"""Startup-time benchmark and regression guard for the CLI and the workflow module.
+
+Each target is imported in a fresh interpreter under ``python -X importtime``.
+The run fails (exit status 1) when a target's median import time exceeds its
+budget, or when it imports a module that must stay deferred until first use
+(the OpenAI client, SQLAlchemy):
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --samples 10 --budget-ms 400
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules imported at startup: (label, Python code run under -X importtime).
+TARGETS: List[Tuple[str, str]] = [
+    ("workflow", "import src.agents.agents"),
+    ("batch", "import src.agents.batch"),
+    (
+        "cli --help",
+        "import runpy, sys; sys.argv = ['__main__.py', '--help']; "
+        "runpy.run_path('__main__.py', run_name='__main__')",
+    ),
+]
+
+# Modules that must only be imported once a model or the session storage is used.
+DEFERRED = ("openai", "sqlalchemy", "agno.storage.sqlite", "agno.models.openai")
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(code: str) -> Tuple[float, int, Dict[str, int]]:
+    """Runs ``code`` in a fresh interpreter.
+
+    Returns:
+        Tuple[float, int, Dict[str, int]]: The wall time in seconds, the total
+        import time and the cumulative import time of every module (both in
+        microseconds).
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{code!r} failed:\n{result.stderr[-2000:]}")
+    total = 0
+    modules: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        modules[name] = cumulative
+        # Nested imports are indented; their time is already in their parent's.
+        if len(indent) == 1:
+            total += cumulative
+    return elapsed, total, modules
+
+
+def measure(label: str, code: str, samples: int, top: int) -> Dict[str, Any]:
+    walls: List[float] = []
+    totals: List[int] = []
+    modules: Dict[str, int] = {}
+    for _ in range(samples):
+        wall, total, modules = import_times(code)
+        walls.append(wall)
+        totals.append(total)
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "label": label,
+        "wall_ms": statistics.median(walls) * 1000,
+        "import_ms": statistics.median(totals) / 1000,
+        "deferred": [name for name in DEFERRED if name in modules],
+        "slowest": [(name, micros / 1000) for name, micros in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--samples", type=int, default=5, help="Fresh interpreters per target."
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=500.0,
+        help="Maximum median import time of each target.",
+    )
+    parser.add_argument(
+        "--top", type=int, default=8, help="Slowest imports listed per target."
+    )
+    args = parser.parse_args()
+
+    failures: List[str] = []
+    for label, code in TARGETS:
+        result = measure(label, code, args.samples, args.top)
+        print(
+            f"{label}: import {result['import_ms']:.0f} ms, "
+            f"wall {result['wall_ms']:.0f} ms (median of {args.samples})"
+        )
+        for name, millis in result["slowest"]:
+            print(f"    {millis:8.1f} ms  {name}")
+        if result["import_ms"] > args.budget_ms:
+            failures.append(
+                f"{label} imports in {result['import_ms']:.0f} ms, "
+                f"over the {args.budget_ms:.0f} ms budget"
+            )
+        if result["deferred"]:
+            failures.append(
+                f"{label} imports {', '.join(result['deferred'])} at startup"
+            )
+
+    if failures:
+        print("\nStartup regressions:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nStartup within budget.")
+
+
+if __name__ == "__main__":
+    main()
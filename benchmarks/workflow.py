@@ -0,0 +1,338 @@
+"""Offline benchmarks for the PromptGeneration workflow.
+
+Every agent runs on MockModel, so the numbers measure the workflow itself
+(orchestration, caches, tools, SQLite) against a fixed, configurable model
+latency rather than OpenAI. Results are saved as JSON named after the current
+commit so runs can be compared across commits:
+
+    python -m benchmarks.workflow --concurrency 1 4 16
+    python -m benchmarks.workflow --compare benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from agno.workflow import RunEvent
+
+from src.agents.agents import PromptGeneration
+from src.agents.batch import run_batch, topic_session_id
+from src.agents.cache import PhaseCache
+from src.agents.mock import DEFAULT_SAVE_TOOL_CALLS, MockModel
+from src.agents.similarity import TopicIndex
+from src.agents.storage import SharedSqliteStorage
+
+PHASE_TITLES = {
+    "# 1.": "Phase 1",
+    "# 2.": "Phase 2",
+    "# 3.": "Phase 3",
+}
+
+SUBJECTS = [
+    "triages customer support tickets",
+    "reviews pull requests for security issues",
+    "plans multi-city travel itineraries",
+    "summarizes quarterly financial reports",
+    "tutors students in linear algebra",
+    "migrates legacy SQL schemas",
+    "writes release notes from commit logs",
+    "monitors cloud spending anomalies",
+]
+
+
+class TimedStorage(SharedSqliteStorage):
+    """SqliteStorage that records how long session reads and writes take."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._timing_lock = threading.Lock()
+        self.timings: Dict[str, List[float]] = {"read": [], "upsert": []}
+
+    def _record(self, operation: str, started: float):
+        with self._timing_lock:
+            self.timings[operation].append(time.perf_counter() - started)
+
+    def read(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().read(*args, **kwargs)
+        finally:
+            self._record("read", started)
+
+    def upsert(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().upsert(*args, **kwargs)
+        finally:
+            self._record("upsert", started)
+
+
+def make_topics(count: int, label: str) -> List[str]:
+    return [
+        f"{label} {i}: an agent that {SUBJECTS[i % len(SUBJECTS)]}"
+        for i in range(count)
+    ]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Mean and percentiles in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(
+            ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3
+        ),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+class Bench:
+    """Runs the benchmark scenarios inside a scratch working directory."""
+
+    def __init__(self, args: argparse.Namespace, workdir: str):
+        self.args = args
+        self.workdir = workdir
+        self.generator_model = MockModel(
+            id="mock-gpt-4.1",
+            latency=args.latency,
+            tokens_per_second=args.tokens_per_second,
+            tool_calls=DEFAULT_SAVE_TOOL_CALLS,
+        )
+        self.evaluator_model = MockModel(
+            id="mock-o4-mini",
+            latency=args.latency,
+            tokens_per_second=args.tokens_per_second,
+        )
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.workdir, "tmp", name)
+
+    def _storage(self, name: str) -> TimedStorage:
+        return TimedStorage(
+            table_name="prompt_generation_workflows", db_file=self._path(name)
+        )
+
+    def _workflow_kwargs(self, phase_cache: PhaseCache) -> Dict[str, Any]:
+        return {
+            "phase_cache": phase_cache,
+            "topic_index": TopicIndex(db_file=self._path("topic_index.db")),
+            # Near-duplicate reuse would skip phases; measure the exact caches.
+            "reuse_threshold": None,
+            "seed_threshold": None,
+            "generator_model": self.generator_model,
+            "evaluator_model": self.evaluator_model,
+            "save_with_tools": self.args.save_with_tools,
+        }
+
+    def phase_latency(self) -> Dict[str, Any]:
+        """Per-phase wall time of sequential, uncached runs."""
+        storage = self._storage("phase_latency.db")
+        phase_cache = PhaseCache(db_file=self._path("phase_latency_cache.db"))
+        samples: Dict[str, List[float]] = {phase: [] for phase in PHASE_TITLES.values()}
+        totals: List[float] = []
+        for topic in make_topics(self.args.samples, "Latency topic"):
+            workflow = PromptGeneration(
+                session_id=topic_session_id(topic),
+                storage=storage,
+                **self._workflow_kwargs(phase_cache),
+            )
+            started = last = time.perf_counter()
+            for response in workflow.run(topic=topic, use_cache=False):
+                now = time.perf_counter()
+                if response.event == RunEvent.run_error:
+                    raise RuntimeError(response.content)
+                for prefix, phase in PHASE_TITLES.items():
+                    if str(response.content).startswith(prefix):
+                        samples[phase].append(now - last)
+                last = now
+            totals.append(time.perf_counter() - started)
+        result = {phase: summarize(values) for phase, values in samples.items()}
+        result["end_to_end"] = summarize(totals)
+        return result
+
+    def throughput(self) -> Dict[str, Any]:
+        """Topics per second at each concurrency level, plus storage timings."""
+        results: Dict[str, Any] = {}
+        for concurrency in self.args.concurrency:
+            storage = self._storage(f"throughput_c{concurrency}.db")
+            phase_cache = PhaseCache(
+                db_file=self._path(f"throughput_c{concurrency}_cache.db")
+            )
+            topics = make_topics(self.args.topics, f"Throughput c{concurrency} topic")
+            summary = run_batch(
+                topics,
+                output_path=self._path(f"throughput_c{concurrency}.jsonl"),
+                concurrency=concurrency,
+                use_cache=False,
+                storage=storage,
+                **self._workflow_kwargs(phase_cache),
+            )
+            results[str(concurrency)] = {
+                "topics": summary.total,
+                "failed": summary.failed,
+                "elapsed_seconds": summary.elapsed_seconds,
+                "topics_per_second": round(summary.throughput, 3),
+                "storage": self._storage_overhead(storage, summary.elapsed_seconds),
+            }
+        return results
+
+    def _storage_overhead(
+        self, storage: TimedStorage, elapsed_seconds: float
+    ) -> Dict[str, Any]:
+        total = sum(storage.timings["read"]) + sum(storage.timings["upsert"])
+        return {
+            "read": summarize(storage.timings["read"]),
+            "upsert": summarize(storage.timings["upsert"]),
+            "total_ms": round(total * 1000, 3),
+            "share_of_wall_time": round(total / elapsed_seconds, 4)
+            if elapsed_seconds
+            else 0.0,
+            "db_bytes": os.path.getsize(storage.db_engine.url.database),
+        }
+
+    def cache(self) -> Dict[str, Any]:
+        """Runs the same topics cold, then warm in fresh sessions."""
+        phase_cache = PhaseCache(db_file=self._path("cache_bench.db"))
+        topics = make_topics(self.args.topics, "Cache topic")
+        passes = {}
+        for name in ("cold", "warm"):
+            # A fresh session store per pass, so warm hits come from the phase cache.
+            summary = run_batch(
+                topics,
+                output_path=self._path(f"cache_{name}.jsonl"),
+                concurrency=max(self.args.concurrency),
+                use_cache=True,
+                storage=self._storage(f"cache_{name}.db"),
+                **self._workflow_kwargs(phase_cache),
+            )
+            passes[name] = {
+                "elapsed_seconds": summary.elapsed_seconds,
+                "topics_per_second": round(summary.throughput, 3),
+            }
+        stats = phase_cache.stats()
+        hits = sum(counts["hits"] for counts in stats.values())
+        lookups = hits + sum(counts["misses"] for counts in stats.values())
+        return {
+            "passes": passes,
+            "phases": stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def git_commit(path: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=path,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """Prints the headline metrics next to a previous result file."""
+
+    def change(new: Optional[float], old: Optional[float]) -> str:
+        if not new or not old:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    print(f"\nCompared with {baseline['commit']} ({baseline['timestamp']}):")
+    for phase, stats in current["phase_latency"].items():
+        old = baseline["phase_latency"].get(phase, {}).get("mean_ms")
+        print(
+            f"  {phase:<12} mean {stats.get('mean_ms')} ms "
+            f"(was {old} ms, {change(stats.get('mean_ms'), old)})"
+        )
+    for concurrency, stats in current["throughput"].items():
+        old = baseline["throughput"].get(concurrency, {}).get("topics_per_second")
+        print(
+            f"  concurrency {concurrency:<3} {stats['topics_per_second']} topics/s "
+            f"(was {old}, {change(stats['topics_per_second'], old)})"
+        )
+    old_rate = baseline["cache"]["hit_rate"]
+    print(f"  cache hit rate {current['cache']['hit_rate']} (was {old_rate})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Mock time to first token (s)."
+    )
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=2000.0, help="Mock token rate."
+    )
+    parser.add_argument(
+        "--samples", type=int, default=5, help="Sequential runs for phase latency."
+    )
+    parser.add_argument(
+        "--topics", type=int, default=16, help="Topics per throughput/cache run."
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 4, 16],
+        help="Concurrency levels to measure throughput at.",
+    )
+    parser.add_argument(
+        "--save-with-tools",
+        action="store_true",
+        help="Save prompts through the agent's tool calls instead of directly.",
+    )
+    parser.add_argument(
+        "--output", default="benchmarks/results", help="Directory for result files."
+    )
+    parser.add_argument("--compare", help="A previous result file to compare with.")
+    args = parser.parse_args()
+
+    output_dir = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="promptgen-bench-") as workdir:
+        # Tool calls write to the working directory; keep them out of the repo.
+        os.chdir(workdir)
+        try:
+            bench = Bench(args, workdir)
+            results = {
+                "commit": git_commit(original_cwd),
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "parameters": vars(args),
+                "phase_latency": bench.phase_latency(),
+                "throughput": bench.throughput(),
+                "cache": bench.cache(),
+            }
+        finally:
+            os.chdir(original_cwd)
+
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    result_path = os.path.join(output_dir, f"{stamp}-{results['commit']}.json")
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"\nSaved results to {result_path}")
+
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,64 @@
+import asyncio
 import json
-from dotenv import load_dotenv
+import os
+import time
+from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from datetime import date, timezone
+from functools import partial
 from textwrap import dedent
-from typing import Dict, Iterator, Optional
-from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from uuid import uuid4
 from agno.agent import Agent
-from agno.models.openai import OpenAIResponses
-from agno.storage.sqlite import SqliteStorage
+from agno.memory.v2.memory import Memory
+from agno.memory.workflow import WorkflowMemory, WorkflowRun
+from agno.models.base import Model
+from agno.storage.base import Storage
+from agno.storage.session.workflow import WorkflowSession
 from agno.utils.log import logger
 from agno.workflow import RunEvent, RunResponse, Workflow
 from pydantic import BaseModel, Field
-from .tools.tools import FileSystemTools
-
-load_dotenv()
-
-
-class FinalPromptRecord(BaseModel):
-    """Model for storing the final generated prompts permanently."""
-
-    topic: str = Field(..., description="The original topic for the prompt.")
-    final_prompt: str = Field(..., description="The final, improved prompt.")
-    timestamp: datetime = Field(
-        default_factory=datetime.utcnow, description="When the prompt was saved."
-    )
+from .budget import ContextBudget, ContextUsage
+from .cascade import CascadePolicy, Tier
+from .checkpoints import (
+    CANCELLED,
+    COMPLETED,
+    FAILED,
+    SAVE_PHASE,
+    CheckpointStore,
+    RunCompletion,
+    RunRecord,
+    get_default_checkpoint_store,
+)
+from .convergence import ConvergencePolicy, ConvergenceState
+from .evaluation import PromptEvaluation
+from .lint import LintPolicy, LintReport, lint_prompt
+from .cache import PhaseCache, get_default_cache, normalize_topic, phase_cache_key
+from .metrics import (
+    MetricsRegistry,
+    RunMetrics,
+    SamplingProfiler,
+    get_default_registry,
+    write_jsonl,
+)
+from .history import FinalPromptRecord, FinalPromptStore, get_default_prompt_store
+from .persistence import PromptWriter, get_default_writer
+from .scheduler import Scheduler, get_default_scheduler
+from .similarity import TopicIndex, TopicMatch, get_default_index
 
 
 class GeneratedPrompt(BaseModel):
@@ -31,12 +68,22 @@ class GeneratedPrompt(BaseModel):
     improved_prompt: str = Field(..., description="Improved version of the prompt")
 
 
-class PromptEvaluation(BaseModel):
-    """Model for storing prompt evaluations"""
+@dataclass
+class AgentCall:
+    """A request from the workflow steps to run one agent to completion."""
+
+    agent: Agent
+    message: str
+    phase: str
+    title: Optional[str] = None
+    stream: bool = False
+    usage: Optional[ContextUsage] = None
 
-    prompt: str = Field(..., description="The prompt being evaluated")
-    evaluation: Dict[str, str] = Field(..., description="Evaluation results")
-    recommendations: str = Field(..., description="Suggested improvements")
+
+# Workflow steps yield output responses and agent call requests (a list of calls
+# runs concurrently); the driver sends back each call's content, so the same
+# steps run under both the sync and the async driver.
+WorkflowSteps = Generator[Union[RunResponse, AgentCall, List[AgentCall]], Any, None]
 
 
 class PromptGeneration(Workflow):
@@ -48,17 +95,10 @@ class PromptGeneration(Workflow):
     more concise, clear, and effective.
     """)
 
-    prompt_generator: Agent = Agent(
-        model=OpenAIResponses(id="gpt-4.1"),
-        instructions=dedent("""\
+    # Phase instructions; the tool-driven save (opt-in) appends the second block.
+    generator_instructions: str = dedent("""\
                 You are a world-class prompt engineer tasked with refining prompts to enhance clarity, conciseness, and effectiveness, ensuring they fully guide a language model to achieve the desired outcomes consistently.
 
-                # Agentic Workflow Reminders
-
-                - You are an agent - please keep going until the user's query is completely resolved, before ending your turn and yielding back to the user. Only terminate your turn when you are sure that the problem is solved.
-                - If you are not sure about file content or codebase structure pertaining to the user's request, use your tools to read files and gather the relevant information: do NOT guess or make up an answer.
-                - When you need to persist information or results, always use the available tools rather than relying on memory alone.
-
                 # Workflow
 
                 1. **Analyze the Prompt**: Identify and understand all key elements and instructions in the provided prompt.
@@ -66,15 +106,27 @@ class PromptGeneration(Workflow):
                 3. **Refine Clarity**: Ensure that the language used is easy to understand and free from ambiguity.
                 4. **Maintain Structure**: Keep the essential components and logical flow intact while improving brevity and clarity.
                 5. **Evaluate and Improve**: After generating the initial improved prompt, use the feedback and recommendations from the evaluator agent to further refine and enhance the prompt.
-                6. **Save the Final Prompt**: Once the prompt has been improved using the evaluator's recommendations and the workflow is complete, you MUST save the final improved prompt as a markdown file in the `prompt` directory using the available tools.
+        """)
+
+    tool_save_instructions: str = dedent("""\
+                # Agentic Workflow Reminders
+
+                - You are an agent - please keep going until the user's query is completely resolved, before ending your turn and yielding back to the user. Only terminate your turn when you are sure that the problem is solved.
+                - If you are not sure about file content or codebase structure pertaining to the user's request, use your tools to read files and gather the relevant information: do NOT guess or make up an answer.
+                - When you need to persist information or results, always use the available tools rather than relying on memory alone.
+
+                # Saving the Final Prompt
+
+                Once the prompt has been improved using the evaluator's recommendations and the workflow is complete, you MUST save the final improved prompt as a markdown file in the `prompt` directory using the available tools.
 
                 # Tool Usage Guidelines
 
                 - **create_folder**: Before saving a file, check if the `prompt` directory exists using `list_files`. If it does not exist, use `create_folder` to create it.
                 - **create_file**: After the workflow is complete and you have the final improved prompt, use `create_file` to save the prompt as a markdown file in the `prompt` directory. The filename should be based on the topic and the current date, formatted safely for filenames (replace spaces and special characters with underscores or dashes).
-                - **list_files**: Use this tool to check if a directory or file exists before creating or reading it.
-                - **read_file**: Use this tool if you need to read the content of an existing file for reference or to avoid overwriting.
-                - **edit_and_apply**: Use this tool if you need to update an existing file with new content, rather than creating a new file.
+                - **list_files**: Use this tool to check if a directory or file exists before creating or reading it. Narrow large listings with `pattern` (e.g. `*.md`) and page through them with `cursor`.
+                - **read_file**: Use this tool if you need to read the content of an existing file for reference or to avoid overwriting. For large files, read only the lines you need with `start_line`/`end_line`.
+                - **grep_file**: Use this tool to find the relevant lines of a large file before reading them.
+                - **edit_and_apply**: Use this tool if you need to update an existing file rather than creating a new file. Send only the changes, as a unified `diff` or a list of `edits`, instead of the full new content.
 
                 # Example
 
@@ -91,17 +143,10 @@ class PromptGeneration(Workflow):
                 - If you encounter any errors when saving, use the tools to diagnose and resolve the issue (e.g., create the directory if missing).
 
                 # Tools
-                You have tools to read files (`read_file`), list files (`list_files`), create folders (`create_folder`), create files (`create_file`), and edit files (`edit_and_apply`). Use them whenever necessary.
-        """),
-        tools=[FileSystemTools()],
-        reasoning=False,
-        markdown=True,
-        show_tool_calls=True,
-    )
-
-    evaluator: Agent = Agent(
-        model=OpenAIResponses(id="o4-mini"),
-        instructions=dedent("""\
+                You have tools to read files (`read_file`), search files (`grep_file`), list files (`list_files`), create folders (`create_folder`), create files (`create_file`), and edit files (`edit_and_apply`). Use them whenever necessary.
+        """)
+
+    evaluator_instructions: str = dedent("""\
                 Design a prompt for an agent responsible for assessing and enhancing the quality of prompts created by another agent.
 
                 # Evaluation Criteria (OpenAI GPT-4.1 Best Practices)
@@ -125,110 +170,1505 @@ class PromptGeneration(Workflow):
 
                 # Output Format
 
-                - **Prompt Evaluated**: "[Original Prompt Content]"
-                - **Evaluation**:
-                  - Clarity & Specificity:
-                  - Instruction Following:
-                  - Persistence & Completion:
-                  - Tool Usage:
-                  - Examples & Planning:
-                  - Best Practices Compliance:
-                  - Output Format:
-                - **Feedback**: [Detailed feedback]
-                - **Analysis**: [Summary of missing elements or deviations]
-                - **Recommendation**: [Actionable suggestions for improvement]
+                Respond with a JSON object with these fields:
+                - `evaluation`: your assessment for each criterion above, keyed by its name (e.g. "Clarity & Specificity").
+                - `scores`: a score from 0 to 10 for each criterion, with the same keys.
+                - `overall_score`: a score from 0 to 10 for the whole prompt.
+                - `recommendations`: the specific, actionable changes to make, with the feedback and analysis behind them. Only this field reaches the agent that rewrites the prompt, so make it self-contained.
+                - `prompt`: leave empty; do not repeat the evaluated prompt.
 
                 # Notes
                 - Reference the OpenAI GPT-4.1 Prompting Guide: https://cookbook.openai.com/examples/gpt4-1_prompting_guide
                 - Be rigorous and constructive. The goal is to ensure the prompt is maximally effective for GPT-4.1 agentic workflows.
-        """),
-        reasoning=False,
-        markdown=True,
-        show_tool_calls=True,
-    )
-
-    def __init__(self, *args, session_id=None, storage=None, **kwargs):
-        if storage is None:
-            storage = SqliteStorage(
-                table_name="prompt_generation_workflows",
-                db_file="tmp/prompt_generation.db",
-            )
+        """)
+
+    # Default models; agents are built on first use, so importing this module
+    # and constructing a workflow never touch the OpenAI client.
+    generator_model_id: str = "gpt-4.1"
+    evaluator_model_id: str = "o4-mini"
+
+    def __init__(
+        self,
+        *args,
+        session_id=None,
+        storage=None,
+        phase_cache: Optional[PhaseCache] = None,
+        topic_index: Optional[TopicIndex] = None,
+        reuse_threshold: Optional[float] = None,
+        seed_threshold: Optional[float] = 0.7,
+        phase_timeout: Optional[float] = None,
+        generator_model: Optional[Model] = None,
+        evaluator_model: Optional[Model] = None,
+        metrics_file: Optional[str] = None,
+        metrics_registry: Optional[MetricsRegistry] = None,
+        profile_threshold: Optional[float] = None,
+        profile_dir: str = "tmp/profiles",
+        prompt_writer: Optional[PromptWriter] = None,
+        save_with_tools: bool = False,
+        final_prompt_store: Optional[FinalPromptStore] = None,
+        context_budget: Optional[ContextBudget] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        scheduler: Optional[Scheduler] = None,
+        cascade: Optional[CascadePolicy] = None,
+        lint: Optional[LintPolicy] = None,
+        **kwargs,
+    ):
+        # Without a storage, the default SQLite storage is opened on first use.
+        self._storage: Optional[Storage] = None
         if session_id is not None:
             kwargs["session_id"] = session_id
         kwargs["storage"] = storage
         super().__init__(*args, **kwargs)
-        self.final_prompts_table = self.storage.get_table()
-        logger.info("Ensured 'final_prompts' table exists for permanent storage.")
+        # Per-instance agents, so concurrent workflows (e.g. batch mode) never
+        # share an agent's in-flight run state. They are built on first use; the
+        # models can be swapped, e.g. for the offline MockModel of the benchmarks.
+        self.generator_model = generator_model
+        self.evaluator_model = evaluator_model
+        self._prompt_generator: Optional[Agent] = None
+        self._evaluator: Optional[Agent] = None
+        # Cross-session cache shared by every workflow in the process.
+        self.phase_cache = (
+            phase_cache if phase_cache is not None else get_default_cache()
+        )
+        # Near-duplicate topics at or above seed_threshold seed Phase 1 with the
+        # earlier final prompt. Reusing it outright (reuse_threshold) is opt-in:
+        # a small edit such as an added "not" can still score close to 1.
+        self.topic_index = (
+            topic_index if topic_index is not None else get_default_index()
+        )
+        self.reuse_threshold = reuse_threshold
+        self.save_with_tools = save_with_tools
+        self.prompt_writer = (
+            prompt_writer if prompt_writer is not None else get_default_writer()
+        )
+        self.seed_threshold = seed_threshold
+        # Per-phase timeout and cancellation state for arun().
+        self.phase_timeout = phase_timeout
+        self._phase_task: Optional[asyncio.Future] = None
+        self._phase_cancelled = False
+        # Per-phase metrics of the current run, attached to the final response
+        # of each phase and exported once the session is written. Phases slower than
+        # profile_threshold seconds leave a folded-stack profile in profile_dir.
+        self.metrics_file = metrics_file
+        self.metrics_registry = (
+            metrics_registry if metrics_registry is not None else get_default_registry()
+        )
+        self.profile_threshold = profile_threshold
+        self.profile_dir = profile_dir
+        self.run_metrics: Optional[RunMetrics] = None
+        self._metrics_pending = False
+        self._phase_metrics_due = False
+        # Final prompts go to their own indexed table rather than the session
+        # blob, so the history can be searched without loading sessions.
+        self.final_prompt_store = (
+            final_prompt_store
+            if final_prompt_store is not None
+            else get_default_prompt_store()
+        )
+        # Compact agent payloads and per-phase input token budgets.
+        self.context_budget = (
+            context_budget if context_budget is not None else ContextBudget()
+        )
+        # Every phase output is checkpointed under the run ID as soon as the
+        # phase completes, so interrupted runs can be resumed.
+        self.checkpoint_store = (
+            checkpoint_store
+            if checkpoint_store is not None
+            else get_default_checkpoint_store()
+        )
+        self._run_record: Optional[RunRecord] = None
+        self._completion: Optional[RunCompletion] = None
+        self._resume_run_id: Optional[str] = None
+        self._run_failed = False
+        # Per-model rate limits, adaptive concurrency, retries and hedging for
+        # every agent call, shared by every workflow in the process.
+        self.scheduler = scheduler if scheduler is not None else get_default_scheduler()
+        # Cheaper model tiers tried first in Phases 1 and 2, built on first use.
+        self.cascade = cascade
+        self._cascade_agents: Dict[str, List[Agent]] = {}
+        # Static checks of the initial prompt that can replace or focus Phase 2.
+        self.lint = lint
+
+    def switch_session(self, session_id: str):
+        """Points the workflow at another session, keeping its agents warm.
+
+        The state loaded from the previous session is dropped and the agents'
+        run memories cleared, so one long-lived workflow (e.g. per server
+        worker) can serve any number of sessions in turn.
+        """
+        self.session_id = session_id
+        self.session_name = None
+        self.session_state = {}
+        self.workflow_session = None
+        self.memory = None
+        self.extra_data = None
+        self.images = self.videos = self.audio = None
+        agents = [self._prompt_generator, self._evaluator]
+        agents += [agent for tier in self._cascade_agents.values() for agent in tier]
+        for agent in agents:
+            if agent is not None:
+                agent.session_id = session_id
+                agent.memory = None
+
+    @property
+    def storage(self) -> Optional[Storage]:
+        if self._storage is None:
+            from .storage import default_storage
+
+            self._storage = default_storage()
+        return self._storage
+
+    @storage.setter
+    def storage(self, storage: Optional[Storage]):
+        self._storage = storage
+
+    # --- Agents, built on first use ---
+    @property
+    def prompt_generator(self) -> Agent:
+        if self._prompt_generator is None:
+            self._prompt_generator = self.build_prompt_generator()
+        return self._prompt_generator
+
+    @prompt_generator.setter
+    def prompt_generator(self, agent: Agent):
+        self._prompt_generator = agent
+
+    @property
+    def evaluator(self) -> Agent:
+        if self._evaluator is None:
+            self._evaluator = self.build_evaluator()
+        return self._evaluator
+
+    @evaluator.setter
+    def evaluator(self, agent: Agent):
+        self._evaluator = agent
+
+    def build_prompt_generator(self, model: Optional[Tier] = None) -> Agent:
+        instructions = self.generator_instructions
+        tools = None
+        # The final prompt is saved by the workflow itself; save_with_tools
+        # restores the agent-driven list_files/create_folder/create_file path.
+        if self.save_with_tools:
+            from .tools.tools import FileSystemTools
+
+            instructions = f"{instructions}\n{self.tool_save_instructions}"
+            tools = [FileSystemTools()]
+        return Agent(
+            model=self._model(
+                model if model is not None else self.generator_model,
+                self.generator_model_id,
+            ),
+            instructions=instructions,
+            tools=tools,
+            session_id=self.session_id,
+            reasoning=False,
+            markdown=True,
+            show_tool_calls=True,
+        )
+
+    def build_evaluator(self, model: Optional[Tier] = None) -> Agent:
+        return Agent(
+            model=self._model(
+                model if model is not None else self.evaluator_model,
+                self.evaluator_model_id,
+            ),
+            instructions=self.evaluator_instructions,
+            session_id=self.session_id,
+            # JSON mode rather than strict structured outputs, since the
+            # per-criterion dicts cannot be expressed in a strict schema.
+            response_model=PromptEvaluation,
+            use_json_mode=True,
+            reasoning=False,
+            markdown=False,
+            show_tool_calls=True,
+        )
+
+    @staticmethod
+    def _model(model: Optional[Tier], model_id: str) -> Model:
+        if isinstance(model, Model):
+            return deepcopy(model)
+        from .clients import default_model
+
+        return default_model(model if model is not None else model_id)
 
     # --- Explicit cache methods for each phase ---
-    def get_cached_initial_prompt(self, topic: str) -> Optional[str]:
+    # Lookups check the session state first, then the persistent cross-session
+    # phase cache when the phase input is known.
+    def _phase_cache_key(
+        self, phase: str, agent: Agent, topic: str, phase_input: str
+    ) -> str:
+        return phase_cache_key(
+            phase, topic, str(agent.model.id), str(agent.instructions), phase_input
+        )
+
+    def _get_cached_phase(
+        self, phase: str, agent: Agent, topic: str, phase_input: Optional[str]
+    ) -> Optional[str]:
+        cached = self.session_state.get(phase, {}).get(topic)
+        if cached is None and phase_input is not None and self.phase_cache is not None:
+            cached = self.phase_cache.get(
+                phase, self._phase_cache_key(phase, agent, topic, phase_input)
+            )
+            if cached is not None:
+                logger.info(f"Phase cache hit for topic '{topic}' - {phase} phase")
+                self.session_state.setdefault(phase, {})[topic] = cached
+        return cached
+
+    def _add_phase_to_cache(
+        self,
+        phase: str,
+        agent: Agent,
+        topic: str,
+        data: str,
+        phase_input: Optional[str],
+    ):
+        self.session_state.setdefault(phase, {})[topic] = data
+        if phase_input is not None and self.phase_cache is not None:
+            self.phase_cache.put(
+                phase, self._phase_cache_key(phase, agent, topic, phase_input), data
+            )
+
+    def get_cached_initial_prompt(
+        self, topic: str, phase_input: Optional[str] = None
+    ) -> Optional[str]:
         logger.debug(f"Checking cache for topic '{topic}' - initial_prompt phase")
-        return self.session_state.get("initial_prompts", {}).get(topic)
+        return self._get_cached_phase(
+            "initial_prompts", self.prompt_generator, topic, phase_input
+        )
 
-    def add_initial_prompt_to_cache(self, topic: str, data: str):
+    def add_initial_prompt_to_cache(
+        self, topic: str, data: str, phase_input: Optional[str] = None
+    ):
         logger.debug(f"Caching initial prompt for topic '{topic}'")
-        self.session_state.setdefault("initial_prompts", {})[topic] = data
+        self._add_phase_to_cache(
+            "initial_prompts", self.prompt_generator, topic, data, phase_input
+        )
 
-    def get_cached_evaluation(self, topic: str) -> Optional[str]:
+    def get_cached_evaluation(
+        self, topic: str, phase_input: Optional[str] = None
+    ) -> Optional[str]:
         logger.debug(f"Checking cache for topic '{topic}' - evaluation phase")
-        return self.session_state.get("evaluations", {}).get(topic)
+        return self._get_cached_phase("evaluations", self.evaluator, topic, phase_input)
 
-    def add_evaluation_to_cache(self, topic: str, data: str):
+    def add_evaluation_to_cache(
+        self, topic: str, data: str, phase_input: Optional[str] = None
+    ):
         logger.debug(f"Caching evaluation for topic '{topic}'")
-        self.session_state.setdefault("evaluations", {})[topic] = data
+        self._add_phase_to_cache(
+            "evaluations", self.evaluator, topic, data, phase_input
+        )
 
-    def get_cached_improved_prompt(self, topic: str) -> Optional[str]:
+    def get_cached_improved_prompt(
+        self, topic: str, phase_input: Optional[str] = None
+    ) -> Optional[str]:
         logger.debug(f"Checking cache for topic '{topic}' - improved_prompt phase")
-        return self.session_state.get("improved_prompts", {}).get(topic)
+        return self._get_cached_phase(
+            "improved_prompts", self.prompt_generator, topic, phase_input
+        )
 
-    def add_improved_prompt_to_cache(self, topic: str, data: str):
+    def add_improved_prompt_to_cache(
+        self, topic: str, data: str, phase_input: Optional[str] = None
+    ):
         logger.debug(f"Caching improved prompt for topic '{topic}'")
-        self.session_state.setdefault("improved_prompts", {})[topic] = data
+        self._add_phase_to_cache(
+            "improved_prompts", self.prompt_generator, topic, data, phase_input
+        )
+
+    def find_similar_topic(self, topic: str) -> Optional[TopicMatch]:
+        """Looks up a near-duplicate of ``topic`` among previously finished topics.
+
+        Topics the phase caches treat as identical are left to them; topics
+        that differ only in punctuation are not, so they are matched here.
+        """
+        thresholds = [
+            t for t in (self.reuse_threshold, self.seed_threshold) if t is not None
+        ]
+        if self.topic_index is None or not thresholds:
+            return None
+        match = self.topic_index.query(topic, threshold=min(thresholds))
+        if match is None or normalize_topic(match.topic) == normalize_topic(topic):
+            return None
+        logger.info(
+            f"Found similar topic '{match.topic}' (similarity {match.similarity:.2f})"
+        )
+        return match
+
+    def record_final_prompt(self, topic: str, final_prompt: str):
+        """Adds the final prompt to the searchable final prompt history."""
+        if self.final_prompt_store is None:
+            return
+        self.final_prompt_store.add(
+            FinalPromptRecord(
+                topic=topic,
+                final_prompt=final_prompt,
+                session_id=self.session_id,
+                run_id=self.run_id,
+            )
+        )
+        logger.info(f"Recorded final prompt for topic '{topic}' in the history.")
+
+    def save_final_prompt(
+        self,
+        topic: str,
+        final_prompt: str,
+        force: bool = False,
+        on_saved: Optional[Callable[[str], None]] = None,
+    ) -> Optional[str]:
+        """Persists the final prompt as markdown, unless the agent saves it via tools.
+
+        ``force`` saves it even then, for modes where the agent cannot know
+        which of its prompts is final. The file is named after the day the run
+        started, so a resumed run overwrites rather than duplicates it.
+
+        Returns:
+            Optional[str]: The file path, or None when saving is left to the agent.
+        """
+        if not self._saves_file(force):
+            return None
+        try:
+            path = self.prompt_writer.save(
+                topic, final_prompt, day=self._run_day(), on_saved=on_saved
+            )
+        except OSError as e:
+            logger.error(f"Error saving final prompt for topic '{topic}': {e}")
+            return None
+        self.session_state.setdefault("final_prompt_files", {})[topic] = path
+        return path
+
+    def _saves_file(self, force: bool = False) -> bool:
+        return (force or not self.save_with_tools) and self.prompt_writer is not None
+
+    def publish_final_prompt(self, topic: str, final_prompt: str, force: bool = False):
+        """Records, indexes and saves the final prompt of the run, once.
+
+        The history entry is keyed by the run ID and the topic index by the
+        topic, so a resumed run that repeats them adds nothing. The Save
+        checkpoint is written once the file is on disk, and the run is only
+        marked finished after that (see RunCompletion); a resumed run that
+        already got that far skips the save.
+        """
+        if self._resumed(SAVE_PHASE) is not None:
+            logger.info("Final prompt already saved by this run.")
+            return
+        self.record_final_prompt(topic, final_prompt)
+        if self.topic_index is not None:
+            self.topic_index.add(topic, final_prompt)
+        if self._run_record is None:
+            self.save_final_prompt(topic, final_prompt, force)
+            return
+        self._completion = RunCompletion(self.checkpoint_store, self.run_id)
+        if not self._saves_file(force):
+            # Saving is left to the agent's tools; nothing to wait for.
+            self._completion.saved("")
+            return
+        self.save_final_prompt(topic, final_prompt, force, self._completion.saved)
+
+    # --- Agent inputs for each phase ---
+    def _generator_input(
+        self, topic: str, similar_topic: Optional[TopicMatch] = None
+    ) -> Dict:
+        generator_input = {
+            "topic": topic,
+            "task": "Create an improved and structured prompt based on this topic",
+            "requirements": {
+                "format": "markdown",
+                "structure": "clear sections",
+                "style": "professional and engaging",
+            },
+        }
+        if similar_topic is not None:
+            generator_input["task"] = (
+                "Create an improved and structured prompt based on this topic, "
+                "adapting the reference prompt written for a similar topic"
+            )
+            generator_input["reference_topic"] = similar_topic.topic
+            generator_input["reference_prompt"] = similar_topic.final_prompt
+        return generator_input
+
+    def _evaluator_input(
+        self, prompt: str, lint_report: Optional[LintReport] = None
+    ) -> Dict:
+        evaluator_input = {
+            "prompt_to_evaluate": prompt,
+            "task": "Evaluate and improve this prompt.",
+            "evaluation_criteria": {
+                "clarity": "Check for clear and unambiguous instructions",
+                "structure": "Assess logical flow and organization",
+                "completeness": "Verify all necessary components are included",
+                "effectiveness": "Evaluate if it will achieve desired outcomes",
+            },
+        }
+        if lint_report is not None:
+            evaluator_input["task"] = (
+                "Evaluate and improve this prompt. A linter has already run the "
+                "static_checks: do not re-verify the passed ones; address the "
+                "failed ones and judge what static checks cannot."
+            )
+            evaluator_input["static_checks"] = lint_report.findings()
+        return evaluator_input
+
+    def _improvement_input(
+        self, prompt: str, recommendations: str, save: bool = False
+    ) -> Dict:
+        task = "Rewrite the original prompt applying the evaluator's recommendations to make it better."
+        if save:
+            task += " After that, use the create_file tool to save the improved prompt as a markdown file in the prompt directory."
+        return {
+            "original_prompt": prompt,
+            "recommendations": recommendations,
+            "task": task,
+            "requirements": {
+                "format": "markdown",
+                "structure": "clear sections",
+                "style": "professional and engaging",
+            },
+        }
+
+    def _call(
+        self,
+        agent: Agent,
+        phase: str,
+        payload: Dict,
+        shrinkable: Sequence[str] = (),
+        **kwargs: Any,
+    ) -> AgentCall:
+        """Builds an agent call whose message fits the phase's context budget."""
+        message, usage = self.context_budget.fit(
+            phase, str(agent.instructions), payload, shrinkable
+        )
+        return AgentCall(agent, message, phase=phase, usage=usage, **kwargs)
+
+    @staticmethod
+    def _parse_evaluation(data: Optional[str]) -> Optional[PromptEvaluation]:
+        # Evaluations are cached as JSON; older markdown entries count as misses.
+        if data is None:
+            return None
+        try:
+            return PromptEvaluation.model_validate_json(data)
+        except ValueError:
+            return None
+
+    # --- Model cascade: cheaper tiers first for Phases 1 and 2 ---
+    def _tier_agents(self, phase: str) -> List[Agent]:
+        """The phase's cascade tier agents, cheapest first, ending on its own agent."""
+        if phase not in self._cascade_agents:
+            tiers = self.cascade.tiers(phase) if self.cascade is not None else []
+            if phase == "Phase 1":
+                agents = [self.build_prompt_generator(tier) for tier in tiers]
+                agents.append(self.prompt_generator)
+            else:
+                agents = [self.build_evaluator(tier) for tier in tiers]
+                agents.append(self.evaluator)
+            self._cascade_agents[phase] = agents
+        return self._cascade_agents[phase]
+
+    def _tiered_input(self, phase: str, phase_input: str) -> str:
+        """Keys a phase's cache entries on its cascade tiers too, if it has any."""
+        tiers = self.cascade.tier_ids(phase) if self.cascade is not None else []
+        if not tiers:
+            return phase_input
+        return json.dumps({"input": phase_input, "tiers": tiers}, sort_keys=True)
+
+    def _record_tier(self, phase: str, agent: Agent, seconds: float, escalated: bool):
+        if self.run_metrics is not None:
+            self.run_metrics.phase(phase).add_tier(
+                str(agent.model.id), seconds, escalated
+            )
+
+    def _initial_prompt_steps(
+        self, generator_input: Dict, stream: bool
+    ) -> Generator[AgentCall, Any, Tuple[str, bool]]:
+        """Runs Phase 1 on each cascade tier until one writes an acceptable prompt.
+
+        Only the last tier is streamed, since an earlier tier's prompt may be
+        discarded. Returns the prompt and whether it was streamed.
+        """
+        agents = self._tier_agents("Phase 1")
+        for index, agent in enumerate(agents):
+            last = index == len(agents) - 1
+            started = time.perf_counter()
+            try:
+                prompt = yield self._call(
+                    agent,
+                    "Phase 1",
+                    generator_input,
+                    ("reference_prompt",),
+                    title="1. Initial Prompt Generation",
+                    stream=stream and last,
+                )
+                escalated = not last and not self.cascade.accepts_prompt(prompt)
+            except Exception as e:
+                if last:
+                    raise
+                logger.warning(f"Phase 1 on {agent.model.id} failed: {e}")
+                escalated = True
+            if len(agents) > 1:
+                self._record_tier(
+                    "Phase 1", agent, time.perf_counter() - started, escalated
+                )
+            if not escalated:
+                return prompt, stream and last
+            logger.info(f"Escalating Phase 1 from {agent.model.id}.")
+
+    def _evaluation_steps(
+        self, call: AgentCall
+    ) -> Generator[AgentCall, Any, PromptEvaluation]:
+        """Runs Phase 2 on each cascade tier until one returns an acceptable evaluation.
+
+        Every tier shares the evaluator's instructions, so each gets ``call``,
+        already fitted to the budget, with its own agent.
+        """
+        agents = self._tier_agents("Phase 2")
+        for index, agent in enumerate(agents):
+            last = index == len(agents) - 1
+            started = time.perf_counter()
+            try:
+                evaluation = yield replace(call, agent=agent)
+                if not isinstance(evaluation, PromptEvaluation):
+                    raise ValueError(
+                        "Agent (Phase 2) did not return a PromptEvaluation."
+                    )
+                escalated = not last and not self.cascade.accepts_evaluation(evaluation)
+            except Exception as e:
+                if last:
+                    raise
+                logger.warning(f"Phase 2 on {agent.model.id} failed: {e}")
+                escalated = True
+            if len(agents) > 1:
+                self._record_tier(
+                    "Phase 2", agent, time.perf_counter() - started, escalated
+                )
+            if not escalated:
+                return evaluation
+            logger.info(f"Escalating Phase 2 from {agent.model.id}.")
+
+    # --- Static lint of the initial prompt ---
+    def _lint_initial_prompt(self, prompt: str) -> LintReport:
+        report = lint_prompt(prompt)
+        logger.info(
+            f"Lint score {report.score:.1f}/10, {len(report.failed)} failed check(s)."
+        )
+        if self.run_metrics is not None:
+            self.run_metrics.lint_score = report.score
+        return report
+
+    # --- Tournament mode: several candidates, only the best are improved ---
+    def _cached_batch(
+        self,
+        cache_phase: str,
+        topic: str,
+        calls: List[AgentCall],
+        phase_inputs: List[str],
+        use_cache: bool,
+        dump: Callable[[Any], str] = str,
+        load: Callable[[str], Any] = lambda data: data,
+    ) -> Generator[List[AgentCall], Any, List[Any]]:
+        """Runs a batch of calls, each served from the phase cache by its own input.
+
+        Only the calls that miss are requested; their results are cached.
+        """
+        keys = [
+            self._phase_cache_key(cache_phase, call.agent, topic, phase_input)
+            for call, phase_input in zip(calls, phase_inputs)
+        ]
+        results: List[Any] = [None] * len(calls)
+        if use_cache and self.phase_cache is not None:
+            for i, key in enumerate(keys):
+                data = self.phase_cache.get(cache_phase, key)
+                results[i] = load(data) if data is not None else None
+            self._record_cache(calls[0].phase, None not in results)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            replies = yield [calls[i] for i in missing]
+            for i, reply in zip(missing, replies):
+                results[i] = reply
+                if self.phase_cache is not None:
+                    self.phase_cache.put(cache_phase, keys[i], dump(reply))
+        return results
+
+    def _tournament_steps(
+        self, topic: str, candidates: int, finalists: int, use_cache: bool = True
+    ) -> WorkflowSteps:
+        """Generates and evaluates several candidates at once, then improves the best.
+
+        Each step requests a batch of agent calls (one agent copy per call) that
+        the driver runs concurrently, so the tournament takes about the
+        wall-clock time of a single pass. Candidates and their evaluations are
+        cached one by one (a candidate by its index and the candidate count,
+        an evaluation by the prompt evaluated); the finalists are always improved.
+        """
+        finalists = max(1, min(finalists, candidates))
+        logger.info(
+            f"Running tournament with {candidates} candidates and {finalists} finalists."
+        )
+        try:
+            # Checkpoints hold every candidate, so a resumed run ranks the same ones.
+            resumed = self._resumed("Phase 1")
+            if resumed is not None:
+                drafts: List[str] = json.loads(resumed)
+            else:
+                generation_calls, generation_inputs = [], []
+                for index in range(candidates):
+                    generator_input = self._generator_input(topic)
+                    generator_input["candidate"] = (
+                        f"Candidate {index + 1} of {candidates}: "
+                        "take a distinct approach from the others"
+                    )
+                    generation_calls.append(
+                        self._call(
+                            self.prompt_generator.deep_copy(),
+                            "Phase 1",
+                            generator_input,
+                        )
+                    )
+                    generation_inputs.append(
+                        json.dumps(
+                            {**generator_input, "topic": normalize_topic(topic)},
+                            sort_keys=True,
+                        )
+                    )
+                drafts = yield from self._cached_batch(
+                    "initial_prompts",
+                    topic,
+                    generation_calls,
+                    generation_inputs,
+                    use_cache,
+                )
+            self._checkpoint("Phase 1", json.dumps(drafts))
+            resumed = self._resumed("Phase 2")
+            if resumed is not None:
+                evaluations: List[PromptEvaluation] = [
+                    PromptEvaluation.model_validate_json(e) for e in json.loads(resumed)
+                ]
+            else:
+                evaluation_calls = [
+                    self._call(
+                        self.evaluator.deep_copy(),
+                        "Phase 2",
+                        self._evaluator_input(draft),
+                        ("prompt_to_evaluate",),
+                    )
+                    for draft in drafts
+                ]
+                evaluations = yield from self._cached_batch(
+                    "evaluations",
+                    topic,
+                    evaluation_calls,
+                    [call.message for call in evaluation_calls],
+                    use_cache,
+                    dump=lambda evaluation: evaluation.model_dump_json(),
+                    load=self._parse_evaluation,
+                )
+            if not all(isinstance(e, PromptEvaluation) for e in evaluations):
+                raise ValueError("Agent (Phase 2) did not return a PromptEvaluation.")
+            self._checkpoint(
+                "Phase 2", json.dumps([e.model_dump_json() for e in evaluations])
+            )
+        except Exception as e:
+            logger.error(f"Error during candidate generation or evaluation: {e}")
+            yield RunResponse(
+                content=f"Error: Failed to generate or evaluate candidates.\nDetails: {e}",
+                event=RunEvent.run_error,
+            )
+            return
+
+        ranking = sorted(
+            range(candidates),
+            key=lambda i: evaluations[i].overall_score,
+            reverse=True,
+        )
+        best = ranking[0]
+        self.add_initial_prompt_to_cache(topic, drafts[best])
+        self.add_evaluation_to_cache(topic, evaluations[best].model_dump_json())
+        standings = "\n".join(
+            f"{place}. Candidate {i + 1}: {evaluations[i].overall_score:.1f}/10"
+            for place, i in enumerate(ranking, start=1)
+        )
+        yield RunResponse(
+            content=f"# 1-2. Candidate Generation and Evaluation\n\n{standings}\n\n"
+            f"## Best Candidate\n\n{drafts[best]}\n\n"
+            f"## Evaluation\n\n{evaluations[best].as_markdown()}",
+            event=RunEvent.run_response,
+        )
+
+        # Only the winner is saved; runners-up are kept as alternatives.
+        try:
+            resumed = self._resumed("Phase 3")
+            if resumed is not None:
+                improved: List[str] = json.loads(resumed)
+            else:
+                improved = yield [
+                    self._call(
+                        self.prompt_generator.deep_copy(),
+                        "Phase 3",
+                        self._improvement_input(
+                            drafts[i],
+                            evaluations[i].recommendations,
+                            save=self.save_with_tools and i == best,
+                        ),
+                        ("recommendations", "original_prompt"),
+                    )
+                    for i in ranking[:finalists]
+                ]
+            self._checkpoint("Phase 3", json.dumps(improved))
+        except Exception as e:
+            logger.error(f"Error during improved prompt generation: {e}")
+            yield RunResponse(
+                content=f"Error: Failed to generate improved prompt.\nDetails: {e}",
+                event=RunEvent.run_error,
+            )
+            return
+
+        improved_prompt_content = improved[0]
+        self.add_improved_prompt_to_cache(topic, improved_prompt_content)
+        if len(improved) > 1:
+            self.session_state.setdefault("final_prompt_alternatives", {})[topic] = (
+                improved[1:]
+            )
+        self.publish_final_prompt(topic, improved_prompt_content)
+        yield RunResponse(
+            content=f"# 3. Improved Prompt Generation\n\n{improved_prompt_content}",
+            event=RunEvent.run_response,
+        )
+        for place, alternative in enumerate(improved[1:], start=2):
+            yield RunResponse(
+                content=f"# 3. Improved Prompt Generation (Alternative {place})\n\n{alternative}",
+                event=RunEvent.run_response,
+            )
+
+    # --- Convergence mode: evaluate/improve rounds until the score plateaus ---
+    def _run_tokens(self) -> int:
+        if self.run_metrics is None:
+            return 0
+        return sum(
+            p.input_tokens + p.output_tokens for p in self.run_metrics.phases.values()
+        )
 
-    def run(self, topic: str, use_cache: bool = True) -> Iterator[RunResponse]:
+    def _get_cached_round(
+        self, phase: str, agent: Agent, topic: str, phase_input: str
+    ) -> Optional[str]:
+        # Rounds share the cross-session cache keyed by their input; the session
+        # state only keeps the final result per topic.
+        if self.phase_cache is None:
+            return None
+        return self.phase_cache.get(
+            phase, self._phase_cache_key(phase, agent, topic, phase_input)
+        )
+
+    def _add_round_to_cache(
+        self, phase: str, agent: Agent, topic: str, data: str, phase_input: str
+    ):
+        if self.phase_cache is not None:
+            self.phase_cache.put(
+                phase, self._phase_cache_key(phase, agent, topic, phase_input), data
+            )
+
+    def _convergence_steps(
+        self,
+        topic: str,
+        prompt: str,
+        evaluation: PromptEvaluation,
+        use_cache: bool,
+        stream: bool,
+        policy: ConvergencePolicy,
+        state: ConvergenceState,
+    ) -> WorkflowSteps:
+        """Improves and re-evaluates the prompt until ``policy`` stops the loop.
+
+        Each round's improved prompt and evaluation are cached by their input,
+        so a repeated run replays the rounds without model calls. A failing
+        round ends the loop with the best prompt so far.
+        """
+        summary = self.session_state.get("convergence", {}).get(topic)
+        cached_final = self.session_state.get("improved_prompts", {}).get(topic)
+        if use_cache and summary is not None and cached_final is not None:
+            logger.info("Using cached converged prompt.")
+            if self.run_metrics is not None:
+                self.run_metrics.rounds = len(summary["scores"]) - 1
+                self.run_metrics.stop_reason = summary["stop_reason"]
+            yield RunResponse(
+                content=f"# 3. Improved Prompt Generation (Cached, round "
+                f"{summary['best_round']})\n\n{cached_final}",
+                event=RunEvent.run_response,
+            )
+            return
+
+        prompts = [prompt]
+        reason = policy.stop_reason(state)
+        while reason is None:
+            round_number = state.rounds + 1
+            round_started, round_tokens = time.perf_counter(), self._run_tokens()
+            resumed = self._resumed(f"Round {round_number}")
+            if resumed is not None:
+                checkpoint = json.loads(resumed)
+                prompt = checkpoint["prompt"]
+                evaluation = PromptEvaluation.model_validate_json(
+                    checkpoint["evaluation"]
+                )
+                prompts.append(prompt)
+                state.add_round(evaluation.overall_score, 0.0, 0)
+                yield RunResponse(
+                    content=f"# 2. Prompt Evaluation (Round {round_number}, Resumed)"
+                    f"\n\n{evaluation.as_markdown()}",
+                    event=RunEvent.run_response,
+                )
+                reason = policy.stop_reason(state)
+                continue
+            try:
+                improvement_call = self._call(
+                    self.prompt_generator,
+                    "Phase 3",
+                    self._improvement_input(prompt, evaluation.recommendations),
+                    ("recommendations", "original_prompt"),
+                    title=f"3. Improved Prompt Generation (Round {round_number})",
+                    stream=stream,
+                )
+                cached_improved = (
+                    self._get_cached_round(
+                        "improved_prompts",
+                        self.prompt_generator,
+                        topic,
+                        improvement_call.message,
+                    )
+                    if use_cache
+                    else None
+                )
+                if cached_improved is not None:
+                    logger.info(
+                        f"Using cached improved prompt of round {round_number}."
+                    )
+                    improved = cached_improved
+                else:
+                    improved = yield improvement_call
+                    self._add_round_to_cache(
+                        "improved_prompts",
+                        self.prompt_generator,
+                        topic,
+                        improved,
+                        improvement_call.message,
+                    )
+                if cached_improved is not None or not stream:
+                    yield RunResponse(
+                        content=f"# {improvement_call.title}\n\n{improved}",
+                        event=RunEvent.run_response,
+                    )
+
+                evaluator_call = self._call(
+                    self.evaluator,
+                    "Phase 2",
+                    self._evaluator_input(improved),
+                    ("prompt_to_evaluate",),
+                )
+                evaluation = (
+                    self._parse_evaluation(
+                        self._get_cached_round(
+                            "evaluations", self.evaluator, topic, evaluator_call.message
+                        )
+                    )
+                    if use_cache
+                    else None
+                )
+                if evaluation is None:
+                    evaluation = yield evaluator_call
+                    if not isinstance(evaluation, PromptEvaluation):
+                        raise ValueError(
+                            "Agent (Phase 2) did not return a PromptEvaluation."
+                        )
+                    self._add_round_to_cache(
+                        "evaluations",
+                        self.evaluator,
+                        topic,
+                        evaluation.model_dump_json(),
+                        evaluator_call.message,
+                    )
+            except Exception as e:
+                logger.error(f"Error during round {round_number}: {e}")
+                reason = "error"
+                break
+            prompt = improved
+            prompts.append(prompt)
+            self._checkpoint(
+                f"Round {round_number}",
+                json.dumps(
+                    {"prompt": prompt, "evaluation": evaluation.model_dump_json()}
+                ),
+            )
+            state.add_round(
+                evaluation.overall_score,
+                time.perf_counter() - round_started,
+                self._run_tokens() - round_tokens,
+            )
+            yield RunResponse(
+                content=f"# 2. Prompt Evaluation (Round {round_number})\n\n"
+                f"{evaluation.as_markdown()}",
+                event=RunEvent.run_response,
+            )
+            reason = policy.stop_reason(state)
+
+        best = state.best_round
+        final_prompt = prompts[best]
+        logger.info(
+            f"Converged after {state.rounds} round(s) ({reason}); scores "
+            f"{', '.join(f'{s:.1f}' for s in state.scores)}, keeping round {best}."
+        )
+        self.session_state.setdefault("convergence", {})[topic] = {
+            "scores": state.scores,
+            "best_round": best,
+            "stop_reason": reason,
+        }
+        if self.run_metrics is not None:
+            self.run_metrics.rounds = state.rounds
+            self.run_metrics.stop_reason = reason
+        self.add_improved_prompt_to_cache(topic, final_prompt)
+        self._checkpoint("Phase 3", final_prompt)
+        self.publish_final_prompt(topic, final_prompt, force=True)
+        yield RunResponse(
+            content=f"# Final Prompt (round {best}, score {state.scores[best]:.1f}/10, "
+            f"stopped: {reason})\n\n{final_prompt}",
+            event=RunEvent.run_response,
+        )
+
+    # --- Checkpoints: durable phase outputs for resuming interrupted runs ---
+    @staticmethod
+    def _run_input(
+        topic: str,
+        use_cache: bool,
+        stream: bool,
+        candidates: int,
+        finalists: int,
+        convergence: Optional[ConvergencePolicy],
+    ) -> Dict[str, Any]:
+        return {
+            "topic": topic,
+            "use_cache": use_cache,
+            "stream": stream,
+            "candidates": candidates,
+            "finalists": finalists,
+            "convergence": asdict(convergence) if convergence is not None else None,
+        }
+
+    def _start_run(self, run_input: Dict[str, Any]):
+        """Starts the metrics and the checkpointed run record of a new run.
+
+        A resumed run keeps its original run ID and completed phases.
+        """
+        if self._resume_run_id is not None:
+            self.run_id, self._resume_run_id = self._resume_run_id, None
+            self.run_response.run_id = self.run_id
+        self._start_run_metrics(run_input["topic"])
+        self._run_failed = False
+        self._run_record = None
+        self._completion = None
+        if self.checkpoint_store is not None:
+            self._run_record = self.checkpoint_store.start_run(
+                self.run_id, self.session_id, run_input["topic"], run_input
+            )
+
+    def _resumed(self, phase: str) -> Optional[str]:
+        """Returns the checkpointed output of ``phase`` if this run is resumed."""
+        if self._run_record is None:
+            return None
+        output = self._run_record.phases.get(phase)
+        if output is not None and phase != SAVE_PHASE:
+            logger.info(f"Resuming from the {phase} checkpoint.")
+        return output
+
+    def _checkpoint(self, phase: str, output: str):
+        if (
+            self._run_record is not None
+            and self._run_record.phases.get(phase) != output
+        ):
+            self.checkpoint_store.checkpoint(self.run_id, phase, output)
+
+    def _finish_run(self, status: Optional[str] = None):
+        if self._run_record is not None:
+            status = status or (FAILED if self._run_failed else COMPLETED)
+            if self._completion is not None:
+                # Recorded once the final prompt is on disk, which with
+                # write-behind may be after the run's last step.
+                self._completion.finish(status)
+            else:
+                self.checkpoint_store.finish_run(self.run_id, status)
+            self._run_record = None
+            self._completion = None
+
+    def _run_day(self) -> Optional[date]:
+        if self._run_record is None:
+            return None
+        created_at = self._run_record.created_at.replace(tzinfo=timezone.utc)
+        return created_at.astimezone().date()
+
+    def resume(self, run_id: str, stream: bool = False) -> Iterator[RunResponse]:
+        """Resumes an interrupted run at its first incomplete phase.
+
+        Completed phases are replayed from their checkpoints without model
+        calls, and the final prompt is saved at most once per run.
+
+        Raises:
+            ValueError: If ``run_id`` has no checkpointed run.
+        """
+        record = (
+            self.checkpoint_store.get_run(run_id)
+            if self.checkpoint_store is not None
+            else None
+        )
+        if record is None:
+            raise ValueError(f"No checkpointed run with ID {run_id}")
+        logger.info(
+            f"Resuming run {run_id} for topic '{record.topic}' "
+            f"(last checkpoint: {record.phase or 'none'})"
+        )
+        if record.session_id is not None:
+            self.session_id = record.session_id
+        run_input = dict(record.run_input, stream=stream)
+        if run_input.get("convergence") is not None:
+            run_input["convergence"] = ConvergencePolicy(**run_input["convergence"])
+        self._resume_run_id = run_id
+        return self.run(**run_input)
+
+    # --- Metrics: per-phase timings, token usage, tool calls and cache results ---
+    def _start_run_metrics(self, topic: str):
+        self.run_metrics = RunMetrics(
+            run_id=self.run_id, session_id=self.session_id, topic=topic
+        )
+        self._metrics_pending = True
+        self._phase_metrics_due = False
+
+    def _record_cache(self, phase: str, hit: bool):
+        if self.run_metrics is not None:
+            self.run_metrics.phase(phase).cache = "hit" if hit else "miss"
+            self._phase_metrics_due = True
+
+    def _start_phase(self) -> Optional[SamplingProfiler]:
+        if self.profile_threshold is None:
+            return None
+        return SamplingProfiler().start()
+
+    def _finish_phase(
+        self,
+        calls: List[AgentCall],
+        started: float,
+        profiler: Optional[SamplingProfiler],
+    ):
+        """Adds the wall time and agent run metrics of one step to its phase."""
+        elapsed = time.perf_counter() - started
+        if profiler is not None:
+            profiler.stop()
+        if self.run_metrics is None:
+            return
+        phase_metrics = self.run_metrics.phase(calls[0].phase)
+        phase_metrics.wall_seconds += elapsed
+        self._phase_metrics_due = True
+        for call in calls:
+            phase_metrics.add_agent_run(call.agent.run_response)
+            if call.usage is not None:
+                phase_metrics.add_context(call.usage)
+        if profiler is not None and elapsed >= self.profile_threshold:
+            path = os.path.join(
+                self.profile_dir,
+                f"{self.run_id}-{calls[0].phase.lower().replace(' ', '-')}.folded",
+            )
+            profiler.write_folded(path)
+            phase_metrics.profile = path
+            logger.warning(
+                f"{calls[0].phase} took {elapsed:.2f}s; profile written to {path}"
+            )
+
+    def _with_metrics(self, response: RunResponse) -> RunResponse:
+        """Attaches the run's metrics to the first response after a phase ends.
+
+        Headings and streamed deltas go out without them, so a run copies its
+        metrics once per phase rather than once per response.
+        """
+        if self.run_metrics is not None and self._phase_metrics_due:
+            response.metrics = self.run_metrics.to_dict()
+            self._phase_metrics_due = False
+        return response
+
+    def write_to_storage(self) -> Optional[WorkflowSession]:
+        """Writes the session, then exports the metrics of the finished run."""
+        started = time.perf_counter()
+        session = super().write_to_storage()
+        if self._metrics_pending and self.run_metrics is not None:
+            self._metrics_pending = False
+            self.run_metrics.storage_seconds += time.perf_counter() - started
+            if self.metrics_registry is not None:
+                self.metrics_registry.observe(self.run_metrics)
+            if self.metrics_file is not None:
+                write_jsonl(self.metrics_file, self.run_metrics)
+        return session
+
+    # --- Drivers: execute the agent calls requested by the workflow steps ---
+    @staticmethod
+    def _call_tokens(call: AgentCall) -> int:
+        return call.usage.after if call.usage is not None else 0
+
+    @staticmethod
+    def _run_agent(call: AgentCall, agent: Agent) -> Any:
+        response: Optional[RunResponse] = agent.run(call.message, stream=False)
+        if not response or not response.content:
+            raise ValueError(f"Agent ({call.phase}) did not return content.")
+        return response.content
+
+    def _complete_call(self, call: AgentCall) -> Any:
+        # A hedged duplicate runs on an agent copy; keep the one that answered
+        # so its run metrics are recorded.
+        content, call.agent = self.scheduler.call(
+            call.phase,
+            call.agent,
+            partial(self._run_agent, call),
+            self._call_tokens(call),
+            # Tool calls have side effects that must not run twice.
+            hedge=not call.agent.tools,
+        )
+        return content
+
+    def _stream_call(self, call: AgentCall) -> Generator[RunResponse, None, str]:
+        yield RunResponse(content=f"# {call.title}\n\n", event=RunEvent.run_response)
+        chunks: List[str] = []
+        for chunk in self.scheduler.stream(
+            call.phase,
+            call.agent,
+            lambda agent: agent.run(call.message, stream=True),
+            self._call_tokens(call),
+        ):
+            if isinstance(chunk.content, str) and chunk.content:
+                chunks.append(chunk.content)
+                yield chunk
+        if not chunks:
+            raise ValueError(f"Agent ({call.phase}) did not return content.")
+        return "".join(chunks)
+
+    def _drive(self, steps: WorkflowSteps) -> Iterator[RunResponse]:
+        """Runs the workflow steps synchronously, using threads for call batches."""
+        reply: Any = None
+        error: Optional[Exception] = None
+        while True:
+            try:
+                step = steps.throw(error) if error is not None else steps.send(reply)
+            except StopIteration:
+                self._finish_run()
+                return
+            reply, error = None, None
+            if isinstance(step, RunResponse):
+                self._run_failed |= step.event == RunEvent.run_error
+                yield self._with_metrics(step)
+                continue
+            calls = step if isinstance(step, list) else [step]
+            started, profiler = time.perf_counter(), self._start_phase()
+            try:
+                if isinstance(step, list):
+                    with ThreadPoolExecutor(max_workers=len(step)) as pool:
+                        reply = list(pool.map(self._complete_call, step))
+                elif step.stream:
+                    reply = yield from self._stream_call(step)
+                else:
+                    reply = self._complete_call(step)
+            except Exception as e:
+                error = e
+            finally:
+                self._finish_phase(calls, started, profiler)
+            if isinstance(step, AgentCall) and step.stream and error is None:
+                yield self._with_metrics(
+                    RunResponse(content="\n\n", event=RunEvent.run_response)
+                )
+
+    @staticmethod
+    async def _arun_agent(call: AgentCall, agent: Agent) -> Any:
+        response: Optional[RunResponse] = await agent.arun(call.message, stream=False)
+        if not response or not response.content:
+            raise ValueError(f"Agent ({call.phase}) did not return content.")
+        return response.content
+
+    async def _acomplete_call(self, call: AgentCall) -> Any:
+        content, call.agent = await self.scheduler.acall(
+            call.phase,
+            call.agent,
+            partial(self._arun_agent, call),
+            self._call_tokens(call),
+            hedge=not call.agent.tools,
+        )
+        return content
+
+    async def _run_phase_task(self, awaitable: Awaitable) -> Any:
+        """Awaits one unit of phase work as a task that cancel_phase() can cancel."""
+        self._phase_task = asyncio.ensure_future(awaitable)
+        try:
+            return await self._phase_task
+        finally:
+            self._phase_task = None
+
+    @staticmethod
+    def _advance(steps: WorkflowSteps, reply: Any, error: Optional[Exception]) -> Any:
+        # StopIteration cannot cross asyncio.to_thread(), so it becomes None.
+        try:
+            return steps.throw(error) if error is not None else steps.send(reply)
+        except StopIteration:
+            return None
+
+    async def _adrive(self, steps: WorkflowSteps) -> AsyncIterator[RunResponse]:
+        """Runs the workflow steps on the event loop, gathering call batches.
+
+        The steps themselves do blocking I/O between agent calls (SQLite
+        caches, checkpoints, history, the prompt file), so they are advanced
+        in a worker thread and never stall other runs on the loop.
+        """
+        reply: Any = None
+        error: Optional[Exception] = None
+        while True:
+            step = await asyncio.to_thread(self._advance, steps, reply, error)
+            if step is None:
+                await asyncio.to_thread(self._finish_run)
+                return
+            reply, error = None, None
+            if isinstance(step, RunResponse):
+                self._run_failed |= step.event == RunEvent.run_error
+                yield self._with_metrics(step)
+                continue
+            self._phase_cancelled = False
+            calls = step if isinstance(step, list) else [step]
+            started, profiler = time.perf_counter(), self._start_phase()
+            try:
+                async with asyncio.timeout(self.phase_timeout):
+                    if isinstance(step, list):
+                        reply = await self._run_phase_task(
+                            asyncio.gather(*(self._acomplete_call(c) for c in step))
+                        )
+                        reply = list(reply)
+                    elif step.stream:
+                        yield RunResponse(
+                            content=f"# {step.title}\n\n", event=RunEvent.run_response
+                        )
+                        chunks: List[str] = []
+                        deltas = self.scheduler.astream(
+                            step.phase,
+                            step.agent,
+                            lambda agent: agent.arun(step.message, stream=True),
+                            self._call_tokens(step),
+                        )
+                        while True:
+                            try:
+                                chunk = await self._run_phase_task(deltas.__anext__())
+                            except StopAsyncIteration:
+                                break
+                            if isinstance(chunk.content, str) and chunk.content:
+                                chunks.append(chunk.content)
+                                yield chunk
+                        if not chunks:
+                            raise ValueError(
+                                f"Agent ({step.phase}) did not return content."
+                            )
+                        reply = "".join(chunks)
+                    else:
+                        reply = await self._run_phase_task(self._acomplete_call(step))
+            except asyncio.CancelledError:
+                if not self._phase_cancelled:
+                    raise
+                logger.warning("Workflow phase cancelled.")
+                steps.close()
+                await asyncio.to_thread(self._finish_run, CANCELLED)
+                yield RunResponse(
+                    content="Cancelled: the current phase was cancelled.",
+                    event=RunEvent.run_cancelled,
+                )
+                return
+            except TimeoutError:
+                error = TimeoutError(
+                    f"Phase timed out after {self.phase_timeout} seconds."
+                )
+            except Exception as e:
+                error = e
+            finally:
+                self._finish_phase(calls, started, profiler)
+            if isinstance(step, AgentCall) and step.stream and error is None:
+                yield self._with_metrics(
+                    RunResponse(content="\n\n", event=RunEvent.run_response)
+                )
+
+    def cancel_phase(self) -> bool:
+        """Cancels the phase currently awaited by arun(); the run then ends.
+
+        Returns:
+            bool: True if a running phase was cancelled.
+        """
+        if self._phase_task is None or self._phase_task.done():
+            return False
+        self._phase_cancelled = True
+        return self._phase_task.cancel()
+
+    def run(
+        self,
+        topic: str,
+        use_cache: bool = True,
+        stream: bool = False,
+        candidates: int = 1,
+        finalists: int = 1,
+        convergence: Optional[ConvergencePolicy] = None,
+    ) -> Iterator[RunResponse]:
+        """Generates, evaluates and improves a prompt for ``topic``.
+
+        With ``candidates`` > 1 the workflow runs in tournament mode: that many
+        initial prompts are generated and scored concurrently and only the top
+        ``finalists`` are improved. Tournament output is not token-streamed.
+
+        With a ``convergence`` policy, evaluation and improvement repeat while
+        the score keeps improving, and the best-scored prompt is kept. A prompt
+        that already meets the target score is not improved at all.
+        """
+        self._start_run(
+            self._run_input(
+                topic, use_cache, stream, candidates, finalists, convergence
+            )
+        )
+        return self._drive(
+            self._steps(topic, use_cache, stream, candidates, finalists, convergence)
+        )
+
+    async def arun(
+        self,
+        topic: str,
+        use_cache: bool = True,
+        stream: bool = False,
+        candidates: int = 1,
+        finalists: int = 1,
+        convergence: Optional[ConvergencePolicy] = None,
+    ) -> AsyncIterator[RunResponse]:
+        """Async counterpart of run(), driven by the agents' async APIs.
+
+        Mirrors Workflow.run_workflow(): the session is loaded before the first
+        phase and written back once the run completes. Each phase can be
+        cancelled with cancel_phase() or bounded by ``phase_timeout``.
+        """
+        self.set_storage_mode()
+        self.set_debug()
+        self.set_workflow_id()
+        self.set_session_id()
+        self.initialize_memory()
+        self.run_id = str(uuid4())
+        self.run_input = self._run_input(
+            topic, use_cache, stream, candidates, finalists, convergence
+        )
+        self.run_response = RunResponse(
+            run_id=self.run_id,
+            session_id=self.session_id,
+            workflow_id=self.workflow_id,
+            content="",
+        )
+        await asyncio.to_thread(self.read_from_storage)
+        self.update_agent_session_ids()
+        self._start_run(self.run_input)
+
+        steps = self._steps(
+            topic, use_cache, stream, candidates, finalists, convergence
+        )
+        async for response in self._adrive(steps):
+            response.run_id = self.run_id
+            response.session_id = self.session_id
+            response.workflow_id = self.workflow_id
+            if isinstance(response.content, str):
+                self.run_response.content += response.content
+            yield response
+
+        if isinstance(self.memory, WorkflowMemory):
+            self.memory.add_run(
+                WorkflowRun(input=self.run_input, response=self.run_response)
+            )
+        elif isinstance(self.memory, Memory):
+            self.memory.add_run(session_id=self.session_id, run=self.run_response)
+        await asyncio.to_thread(self.write_to_storage)
+
+    def _steps(
+        self,
+        topic: str,
+        use_cache: bool,
+        stream: bool,
+        candidates: int,
+        finalists: int,
+        convergence: Optional[ConvergencePolicy] = None,
+    ) -> WorkflowSteps:
+        started = time.perf_counter()
         logger.info(
-            f"Generating and improving a prompt on: {topic} (Session Cache: {use_cache})"
+            f"Generating and improving a prompt on: {topic} (Session Cache: {use_cache}, Stream: {stream})"
         )
         generated_prompt_content: Optional[str] = None
-        evaluation_content: Optional[str] = None
+        evaluation: Optional[PromptEvaluation] = None
         improved_prompt_content: Optional[str] = None
 
+        # --- Similar topic lookup: reuse or seed from an earlier final prompt ---
+        similar_topic = self.find_similar_topic(topic) if use_cache else None
+        if (
+            similar_topic is not None
+            and self.reuse_threshold is not None
+            and similar_topic.similarity >= self.reuse_threshold
+        ):
+            logger.info("Reusing final prompt of a similar topic.")
+            self.session_state.setdefault("improved_prompts", {})[topic] = (
+                similar_topic.final_prompt
+            )
+            self.record_final_prompt(topic, similar_topic.final_prompt)
+            yield RunResponse(
+                content=f"# Reused Prompt (similar topic: {similar_topic.topic}, "
+                f"similarity {similar_topic.similarity:.2f})\n\n{similar_topic.final_prompt}",
+                event=RunEvent.run_response,
+            )
+            return
+
+        if candidates > 1:
+            if convergence is not None:
+                logger.warning("Convergence mode is not used in tournament mode.")
+            if self.cascade is not None:
+                logger.warning("The model cascade is not used in tournament mode.")
+            if self.lint is not None:
+                logger.warning("The prompt linter is not used in tournament mode.")
+            yield from self._tournament_steps(topic, candidates, finalists, use_cache)
+            return
+
         # --- Phase 1: Initial Prompt Generation ---
-        cached_initial_prompt = (
-            self.get_cached_initial_prompt(topic) if use_cache else None
+        if (
+            similar_topic is not None
+            and self.seed_threshold is not None
+            and similar_topic.similarity >= self.seed_threshold
+        ):
+            logger.info("Seeding initial prompt from a similar topic.")
+        else:
+            similar_topic = None
+        generator_input = self._generator_input(topic, similar_topic)
+        # Key Phase 1 on the normalized topic so case/spacing variants share it.
+        generator_cache_input = self._tiered_input(
+            "Phase 1",
+            json.dumps(
+                {**generator_input, "topic": normalize_topic(topic)}, sort_keys=True
+            ),
         )
+        cached_initial_prompt = self._resumed("Phase 1")
+        # Replayed checkpoints are labelled apart from cache hits.
+        source = "Resumed" if cached_initial_prompt is not None else "Cached"
+        if cached_initial_prompt is None and use_cache:
+            cached_initial_prompt = self.get_cached_initial_prompt(
+                topic, generator_cache_input
+            )
+            self._record_cache("Phase 1", cached_initial_prompt is not None)
         if cached_initial_prompt:
-            logger.info("Using cached initial prompt from session state.")
+            logger.info(f"Using {source.lower()} initial prompt.")
             generated_prompt_content = cached_initial_prompt
             yield RunResponse(
-                content=f"# 1. Initial Prompt Generation (Cached)\n\n{generated_prompt_content}",
+                content=f"# 1. Initial Prompt Generation ({source})\n\n{generated_prompt_content}",
                 event=RunEvent.run_response,
             )
         else:
             logger.info("Generating initial prompt.")
-            generator_input = {
-                "topic": topic,
-                "task": "Create an improved and structured prompt based on this topic",
-                "requirements": {
-                    "format": "markdown",
-                    "structure": "clear sections",
-                    "style": "professional and engaging",
-                },
-            }
             try:
-                initial_prompt_response: Optional[RunResponse] = (
-                    self.prompt_generator.run(
-                        json.dumps(generator_input, indent=4), stream=False
-                    )
+                generated_prompt_content, streamed = yield from (
+                    self._initial_prompt_steps(generator_input, stream)
                 )
-                if not initial_prompt_response or not initial_prompt_response.content:
-                    raise ValueError("Agent (Phase 1) did not return content.")
-                generated_prompt_content = initial_prompt_response.content
-                self.add_initial_prompt_to_cache(topic, generated_prompt_content)
-                yield RunResponse(
-                    content=f"# 1. Initial Prompt Generation\n\n{generated_prompt_content}",
-                    event=RunEvent.run_response,
+                self.add_initial_prompt_to_cache(
+                    topic, generated_prompt_content, generator_cache_input
                 )
+                if not streamed:
+                    yield RunResponse(
+                        content=f"# 1. Initial Prompt Generation\n\n{generated_prompt_content}",
+                        event=RunEvent.run_response,
+                    )
             except Exception as e:
                 logger.error(f"Error during initial prompt generation: {e}")
                 yield RunResponse(
@@ -236,54 +1676,123 @@ class PromptGeneration(Workflow):
                     event=RunEvent.run_error,
                 )
                 return
+        self._checkpoint("Phase 1", generated_prompt_content)
 
         # --- Phase 2: Prompt Evaluation ---
-        cached_evaluation = self.get_cached_evaluation(topic) if use_cache else None
-        if cached_evaluation:
-            logger.info("Using cached evaluation from session state.")
-            evaluation_content = cached_evaluation
+        # The evaluation is structured, so it is never token-streamed and only
+        # its recommendations are passed on to Phase 3.
+        evaluation = self._parse_evaluation(self._resumed("Phase 2"))
+        source = "Resumed" if evaluation is not None else "Cached"
+        lint_report = (
+            self._lint_initial_prompt(generated_prompt_content)
+            if evaluation is None and self.lint is not None
+            else None
+        )
+        if lint_report is not None and self.lint.skips(lint_report):
+            logger.info(
+                f"Lint score {lint_report.score:.1f} clears the threshold; "
+                "skipping the evaluator."
+            )
+            evaluation = lint_report.to_evaluation()
+            if self.run_metrics is not None:
+                self.run_metrics.lint_skipped = True
             yield RunResponse(
-                content=f"# 2. Prompt Evaluation (Cached)\n\n{evaluation_content}",
+                content=f"# 2. Prompt Evaluation (Lint)\n\n{evaluation.as_markdown()}",
                 event=RunEvent.run_response,
             )
         else:
-            logger.info("Evaluating prompt.")
-            evaluator_input = {
-                "prompt_to_evaluate": generated_prompt_content,
-                "task": "Evaluate and improve this prompt.",
-                "evaluation_criteria": {
-                    "clarity": "Check for clear and unambiguous instructions",
-                    "structure": "Assess logical flow and organization",
-                    "completeness": "Verify all necessary components are included",
-                    "effectiveness": "Evaluate if it will achieve desired outcomes",
-                },
-            }
-            try:
-                evaluation_response: Optional[RunResponse] = self.evaluator.run(
-                    json.dumps(evaluator_input, indent=4), stream=False
+            lint_hints = (
+                lint_report if self.lint is not None and self.lint.hints else None
+            )
+            # Built once: its message is both the cache key and the request.
+            evaluation_call = self._call(
+                self.evaluator,
+                "Phase 2",
+                self._evaluator_input(generated_prompt_content, lint_hints),
+                ("prompt_to_evaluate",),
+                title="2. Prompt Evaluation",
+            )
+            evaluator_cache_input = self._tiered_input(
+                "Phase 2", evaluation_call.message
+            )
+            if evaluation is None and use_cache:
+                evaluation = self._parse_evaluation(
+                    self.get_cached_evaluation(topic, evaluator_cache_input)
                 )
-                if not evaluation_response or not evaluation_response.content:
-                    raise ValueError("Agent (Phase 2) did not return content.")
-                evaluation_content = evaluation_response.content
-                self.add_evaluation_to_cache(topic, evaluation_content)
+                self._record_cache("Phase 2", evaluation is not None)
+            if evaluation is not None:
+                logger.info(f"Using {source.lower()} evaluation.")
                 yield RunResponse(
-                    content=f"# 2. Prompt Evaluation\n\n{evaluation_content}",
+                    content=f"# 2. Prompt Evaluation ({source})\n\n{evaluation.as_markdown()}",
                     event=RunEvent.run_response,
                 )
-            except Exception as e:
-                logger.error(f"Error during prompt evaluation: {e}")
-                yield RunResponse(
-                    content=f"Error: Failed to evaluate prompt.\nDetails: {e}",
-                    event=RunEvent.run_error,
-                )
-                return
+            else:
+                logger.info("Evaluating prompt.")
+                try:
+                    evaluation = yield from self._evaluation_steps(evaluation_call)
+                    self.add_evaluation_to_cache(
+                        topic, evaluation.model_dump_json(), evaluator_cache_input
+                    )
+                    yield RunResponse(
+                        content=f"# 2. Prompt Evaluation\n\n{evaluation.as_markdown()}",
+                        event=RunEvent.run_response,
+                    )
+                except Exception as e:
+                    logger.error(f"Error during prompt evaluation: {e}")
+                    yield RunResponse(
+                        content=f"Error: Failed to evaluate prompt.\nDetails: {e}",
+                        event=RunEvent.run_error,
+                    )
+                    return
+        self._checkpoint("Phase 2", evaluation.model_dump_json())
+
+        if convergence is not None:
+            yield from self._convergence_steps(
+                topic,
+                generated_prompt_content,
+                evaluation,
+                use_cache,
+                stream,
+                convergence,
+                ConvergenceState(
+                    scores=[evaluation.overall_score],
+                    tokens=self._run_tokens(),
+                    started=started,
+                ),
+            )
+            return
 
         # --- Phase 3: Prompt Improvement based on Feedback ---
+        improved_prompt_content = self._resumed("Phase 3")
+        if improved_prompt_content is not None:
+            # Interrupted after Phase 3; only saving the final prompt may remain.
+            self.publish_final_prompt(topic, improved_prompt_content)
+            yield RunResponse(
+                content=f"# 3. Improved Prompt Generation (Resumed)\n\n{improved_prompt_content}",
+                event=RunEvent.run_response,
+            )
+            return
+        improvement_call = self._call(
+            self.prompt_generator,
+            "Phase 3",
+            self._improvement_input(
+                generated_prompt_content,
+                evaluation.recommendations,
+                save=self.save_with_tools,
+            ),
+            ("recommendations", "original_prompt"),
+            title="3. Improved Prompt Generation",
+            stream=stream,
+        )
         cached_improved_prompt = (
-            self.get_cached_improved_prompt(topic) if use_cache else None
+            self.get_cached_improved_prompt(topic, improvement_call.message)
+            if use_cache
+            else None
         )
+        if use_cache:
+            self._record_cache("Phase 3", cached_improved_prompt is not None)
         if cached_improved_prompt:
-            logger.info("Using cached improved prompt from session state.")
+            logger.info("Using cached improved prompt.")
             improved_prompt_content = cached_improved_prompt
             yield RunResponse(
                 content=f"# 3. Improved Prompt Generation (Cached)\n\n{improved_prompt_content}",
@@ -291,34 +1800,18 @@ class PromptGeneration(Workflow):
             )
             return
         logger.info("Generating improved prompt (will be saved permanently).")
-        improvement_input = {
-            "original_prompt": generated_prompt_content,
-            "evaluation_feedback": evaluation_content,
-            "task": "Rewrite the original prompt incorporating the evaluation feedback to make it better. After that, use the create_file tool to save the improved prompt as a markdown file in the prompt directory.",
-            "requirements": {
-                "format": "markdown",
-                "structure": "clear sections",
-                "style": "professional and engaging",
-            },
-        }
         try:
-            improved_prompt_response: Optional[RunResponse] = self.prompt_generator.run(
-                json.dumps(improvement_input, indent=4), stream=False
-            )
-            if not improved_prompt_response or not improved_prompt_response.content:
-                raise ValueError("Agent (Phase 3) did not return content.")
-            improved_prompt_content = improved_prompt_response.content
-            self.add_improved_prompt_to_cache(topic, improved_prompt_content)
-            self.session_state.setdefault("final_prompts", {})[topic] = (
-                improved_prompt_content
-            )
-            logger.info(
-                f"Saved final prompt for topic '{topic}' to session_state['final_prompts']."
-            )
-            yield RunResponse(
-                content=f"# 3. Improved Prompt Generation\n\n{improved_prompt_content}",
-                event=RunEvent.run_response,
+            improved_prompt_content = yield improvement_call
+            self.add_improved_prompt_to_cache(
+                topic, improved_prompt_content, improvement_call.message
             )
+            self._checkpoint("Phase 3", improved_prompt_content)
+            self.publish_final_prompt(topic, improved_prompt_content)
+            if not stream:
+                yield RunResponse(
+                    content=f"# 3. Improved Prompt Generation\n\n{improved_prompt_content}",
+                    event=RunEvent.run_response,
+                )
         except Exception as e:
             logger.error(f"Error during improved prompt generation: {e}")
             yield RunResponse(
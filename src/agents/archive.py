@@ -0,0 +1,457 @@
+import gzip
+import hashlib
+import os
+import re
+import sqlite3
+import struct
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from agno.utils.log import logger
+
+from .persistence import atomic_write, prompt_slug
+
+CODECS = ("none", "gzip", "zstd")
+
+# Every stored body is preceded by a header, so a segment can be verified
+# (and the index rebuilt) without the index: magic, SHA-256, codec, length.
+_RECORD = struct.Struct(">4s32sBI")
+_MAGIC = b"PRM1"
+_FILENAME = re.compile(r"^(?P<slug>.+)-(?P<day>\d{4}-\d{2}-\d{2})\.md$")
+
+
+def _zstd():
+    try:
+        from compression import zstd  # Python 3.14+
+
+        return zstd.compress, zstd.decompress
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError(
+            "zstd compression needs Python 3.14 or the 'zstandard' package"
+        ) from None
+    return (
+        lambda data: zstandard.ZstdCompressor(level=10).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+
+
+def check_codec(codec: str):
+    """Raises ValueError if ``codec`` is unknown or its module is not installed."""
+    if codec not in CODECS:
+        raise ValueError(f"compression must be one of {', '.join(CODECS)}")
+    if codec == "zstd":
+        _zstd()
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if codec == "zstd":
+        return _zstd()[0](data)
+    return data
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        return _zstd()[1](data)
+    return data
+
+
+def normalize_body(content: str) -> str:
+    """Line endings and trailing whitespace never make two prompts distinct."""
+    return content.replace("\r\n", "\n").rstrip() + "\n"
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(normalize_body(content).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ArchiveEntry:
+    """One saved prompt: a topic and day pointing at a stored body."""
+
+    topic: str
+    slug: str
+    day: date
+    digest: str
+    size: int
+
+    @property
+    def filename(self) -> str:
+        return f"{self.slug}-{self.day.isoformat()}.md"
+
+
+@dataclass
+class ArchiveStats:
+    entries: int
+    bodies: int
+    segments: int
+    body_bytes: int
+    stored_bytes: int
+
+    @property
+    def ratio(self) -> float:
+        """Bytes the saved prompts would take as files per byte stored."""
+        return self.body_bytes / self.stored_bytes if self.stored_bytes else 0.0
+
+
+class PromptArchive:
+    """Content-addressed, deduplicated store of final prompts.
+
+    Bodies are keyed by the SHA-256 of their (normalized) text and stored once,
+    optionally compressed, appended to packed segment files of up to
+    ``segment_bytes`` each. A SQLite index maps each topic and day to its
+    body, so listing, lookups and exports never scan a directory of files.
+    """
+
+    def __init__(
+        self,
+        directory: str = "tmp/archive",
+        compression: str = "gzip",
+        segment_bytes: int = 64 << 20,
+    ):
+        check_codec(compression)
+        self.directory = directory
+        self.compression = compression
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        # Size of each segment before the open transaction first appended to it.
+        self._appended: Dict[int, int] = {}
+
+        os.makedirs(os.path.join(directory, "segments"), exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "index.db"), check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS bodies (
+                id INTEGER PRIMARY KEY,
+                digest BLOB NOT NULL UNIQUE,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                stored INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                codec TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                slug TEXT NOT NULL,
+                day TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                body_id INTEGER NOT NULL REFERENCES bodies (id),
+                PRIMARY KEY (slug, day)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_entries_body ON entries (body_id);
+            """
+        )
+        self._conn.commit()
+
+    # --- Segments ---
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, "segments", f"{segment:06d}.pack")
+
+    def _current_segment(self, incoming: int) -> int:
+        row = self._conn.execute("SELECT MAX(segment) FROM bodies").fetchone()
+        segment = row[0] or 1
+        path = self._segment_path(segment)
+        if (
+            os.path.exists(path)
+            and os.path.getsize(path) > 0
+            and os.path.getsize(path) + incoming > self.segment_bytes
+        ):
+            segment += 1
+        return segment
+
+    def _append(self, digest: bytes, data: bytes) -> Tuple[int, int]:
+        """Appends one record; returns its segment and body offset."""
+        record = _RECORD.pack(_MAGIC, digest, CODECS.index(self.compression), len(data))
+        segment = self._current_segment(len(record) + len(data))
+        with open(self._segment_path(segment), "ab") as f:
+            start = f.tell()
+            self._appended.setdefault(segment, start)
+            f.write(record + data)
+        return segment, start + _RECORD.size
+
+    def _sync(self, segments: Iterable[int]):
+        for segment in segments:
+            with open(self._segment_path(segment), "ab") as f:
+                os.fsync(f.fileno())
+
+    def _commit(self):
+        self._conn.commit()
+        self._appended.clear()
+
+    def _rollback(self):
+        """Rolls back the index and cuts the appended bodies off their segments."""
+        self._conn.rollback()
+        appended, self._appended = self._appended, {}
+        for segment, size in appended.items():
+            with open(self._segment_path(segment), "r+b") as f:
+                f.truncate(size)
+
+    # --- Writes ---
+    def _store(
+        self, slug: str, topic: str, content: str, day: date
+    ) -> Tuple[bytes, Optional[int]]:
+        """Indexes one prompt, appending its body if new; the caller commits.
+
+        Returns the body's digest and, if it was appended, its segment.
+        """
+        body = normalize_body(content).encode("utf-8")
+        digest = hashlib.sha256(body).digest()
+        segment = None
+        row = self._conn.execute(
+            "SELECT id FROM bodies WHERE digest = ?", (digest,)
+        ).fetchone()
+        if row is None:
+            data = _compress(self.compression, body)
+            segment, offset = self._append(digest, data)
+            body_id = self._conn.execute(
+                "INSERT INTO bodies (digest, segment, offset, stored, size, codec) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, segment, offset, len(data), len(body), self.compression),
+            ).lastrowid
+        else:
+            body_id = row[0]
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (slug, day, topic, body_id) "
+            "VALUES (?, ?, ?, ?)",
+            (slug, day.isoformat(), topic, body_id),
+        )
+        return digest, segment
+
+    def put(self, topic: str, content: str, day: Optional[date] = None) -> str:
+        """Archives ``content`` as the prompt of ``topic`` on ``day`` (default today).
+
+        An identical body already in the archive is not stored again; the
+        topic and day just point at it.
+
+        Returns:
+            str: The body's SHA-256 hex digest.
+        """
+        with self._lock:
+            try:
+                digest, segment = self._store(
+                    prompt_slug(topic), topic, content, day or date.today()
+                )
+                # The body is on disk before the index points at it.
+                self._sync([] if segment is None else [segment])
+                self._commit()
+            except BaseException:
+                self._rollback()
+                raise
+        return digest.hex()
+
+    def ingest(self, directory: str = "prompt") -> Tuple[int, int]:
+        """Archives the ``<slug>-<date>.md`` files of a prompt directory.
+
+        The topic of an ingested file is its slug, which is kept as is, so an
+        export writes the same file names back. Files are left in place.
+
+        Returns:
+            Tuple[int, int]: Files archived and bodies that were new.
+        """
+        files = new = 0
+        segments = set()
+        with self._lock:
+            try:
+                for name in sorted(os.listdir(directory)):
+                    match = _FILENAME.match(name)
+                    if match is None:
+                        continue
+                    path = os.path.join(directory, name)
+                    with open(path, "r", encoding="utf-8") as f:
+                        content = f.read()
+                    slug = match["slug"]
+                    _, segment = self._store(
+                        slug, slug, content, date.fromisoformat(match["day"])
+                    )
+                    files += 1
+                    if segment is not None:
+                        new += 1
+                        segments.add(segment)
+                # One transaction and one fsync per segment for the whole directory.
+                self._sync(segments)
+                self._commit()
+            except BaseException:
+                self._rollback()
+                raise
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return files, new
+
+    # --- Reads ---
+    def contains(self, digest: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM bodies WHERE digest = ?", (bytes.fromhex(digest),)
+            ).fetchone()
+        return row is not None
+
+    def get(self, digest: str) -> Optional[str]:
+        """Returns the body with this SHA-256 hex digest, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT segment, offset, stored, codec FROM bodies WHERE digest = ?",
+                (bytes.fromhex(digest),),
+            ).fetchone()
+        if row is None:
+            return None
+        segment, offset, stored, codec = row
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            return _decompress(codec, f.read(stored)).decode("utf-8")
+
+    def latest(self, topic: str) -> Optional[str]:
+        """Returns the most recent archived prompt of ``topic``, or None."""
+        entries = self.entries(topic)
+        return self.get(entries[-1].digest) if entries else None
+
+    def entries(self, topic: Optional[str] = None) -> List[ArchiveEntry]:
+        """Archived prompts, oldest day first, optionally for a single topic."""
+        query = (
+            "SELECT e.topic, e.slug, e.day, b.digest, b.size FROM entries e "
+            "JOIN bodies b ON b.id = e.body_id"
+        )
+        params: Tuple = ()
+        if topic is not None:
+            query += " WHERE e.slug = ?"
+            params = (prompt_slug(topic),)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY e.day, e.slug", params)
+            return [
+                ArchiveEntry(
+                    topic=row[0],
+                    slug=row[1],
+                    day=date.fromisoformat(row[2]),
+                    digest=row[3].hex(),
+                    size=row[4],
+                )
+                for row in rows.fetchall()
+            ]
+
+    def _bodies(self) -> Iterator[Tuple[int, bytes, int, int, int, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, digest, segment, offset, stored, codec FROM bodies "
+                "ORDER BY segment, offset"
+            ).fetchall()
+        yield from rows
+
+    def _read_bodies(self, ids: Optional[set] = None) -> Iterator[Tuple[int, bytes]]:
+        """Yields (body id, raw body) in segment order, opening each segment once."""
+        segment_file = None
+        current = None
+        try:
+            for body_id, _, segment, offset, stored, codec in self._bodies():
+                if ids is not None and body_id not in ids:
+                    continue
+                if segment != current:
+                    if segment_file is not None:
+                        segment_file.close()
+                    segment_file = open(self._segment_path(segment), "rb")
+                    current = segment
+                segment_file.seek(offset)
+                yield body_id, _decompress(codec, segment_file.read(stored))
+        finally:
+            if segment_file is not None:
+                segment_file.close()
+
+    # --- Export and maintenance ---
+    def export(self, directory: str = "prompt", overwrite: bool = False) -> int:
+        """Writes every archived prompt back to ``<slug>-<date>.md`` files.
+
+        Bodies are read segment by segment in storage order, and each file is
+        written atomically but not fsynced, since it can always be exported
+        again. Existing files are kept unless ``overwrite`` is set.
+
+        Returns:
+            int: The number of files written.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT slug, day, body_id FROM entries"
+            ).fetchall()
+        existing = set(os.listdir(directory)) if os.path.isdir(directory) else set()
+        paths: Dict[int, List[str]] = {}
+        for slug, day, body_id in rows:
+            name = f"{slug}-{day}.md"
+            if overwrite or name not in existing:
+                paths.setdefault(body_id, []).append(os.path.join(directory, name))
+        written = 0
+        for body_id, body in self._read_bodies(set(paths)):
+            for path in paths[body_id]:
+                atomic_write(path, body.decode("utf-8"), fsync=False)
+                written += 1
+        logger.info(f"Exported {written} archived prompts to {directory}")
+        return written
+
+    def verify(self) -> List[str]:
+        """Checks every stored body against its header and hash, and every entry.
+
+        Returns:
+            List[str]: The problems found; empty if the archive is intact.
+        """
+        problems: List[str] = []
+        for body_id, digest, segment, offset, stored, codec in self._bodies():
+            path = self._segment_path(segment)
+            try:
+                with open(path, "rb") as f:
+                    f.seek(offset - _RECORD.size)
+                    header = f.read(_RECORD.size)
+                    data = f.read(stored)
+            except OSError as e:
+                problems.append(f"body {digest.hex()[:12]}: {e}")
+                continue
+            if len(header) < _RECORD.size or len(data) < stored:
+                problems.append(f"body {digest.hex()[:12]}: truncated in {path}")
+                continue
+            magic, header_digest, codec_index, length = _RECORD.unpack(header)
+            if (
+                magic != _MAGIC
+                or header_digest != digest
+                or length != stored
+                or CODECS[codec_index] != codec
+            ):
+                problems.append(f"body {digest.hex()[:12]}: bad header in {path}")
+                continue
+            try:
+                body = _decompress(codec, data)
+            except (OSError, ValueError) as e:
+                problems.append(f"body {digest.hex()[:12]}: cannot decompress: {e}")
+                continue
+            if hashlib.sha256(body).digest() != digest:
+                problems.append(f"body {digest.hex()[:12]}: content hash mismatch")
+        with self._lock:
+            dangling = self._conn.execute(
+                "SELECT e.slug, e.day FROM entries e LEFT JOIN bodies b "
+                "ON b.id = e.body_id WHERE b.id IS NULL"
+            ).fetchall()
+        problems += [f"entry {slug} {day}: missing body" for slug, day in dangling]
+        return problems
+
+    def stats(self) -> ArchiveStats:
+        with self._lock:
+            entries, body_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM entries e "
+                "JOIN bodies b ON b.id = e.body_id"
+            ).fetchone()
+            bodies, segments, stored = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT segment), COALESCE(SUM(stored), 0) "
+                "FROM bodies"
+            ).fetchone()
+        return ArchiveStats(
+            entries=entries,
+            bodies=bodies,
+            segments=segments,
+            body_bytes=body_bytes,
+            stored_bytes=stored,
+        )
@@ -0,0 +1,278 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from agno.storage.base import Storage
+from agno.utils.log import logger
+from agno.workflow import RunEvent
+
+from .agents import PromptGeneration
+from .checkpoints import get_default_checkpoint_store
+from .convergence import ConvergencePolicy
+from .history import get_default_prompt_store
+
+
+def topic_session_id(topic: str) -> str:
+    """Derives the workflow session_id for a topic (URL-safe, lower-case)."""
+    url_safe_topic = topic.lower().replace(" ", "-")
+    return f"generate-prompt-on-{url_safe_topic}"
+
+
+def read_topics(path: str) -> List[str]:
+    """Reads topics from a JSONL or CSV file.
+
+    JSONL lines may be either a JSON string or an object with a ``topic`` key.
+    CSV files use the ``topic`` column if present, otherwise the first column.
+
+    Args:
+        path (str): The path of the topics file.
+
+    Returns:
+        List[str]: The non-empty topics, in file order.
+    """
+    topics: List[str] = []
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        if rows and "topic" in rows[0]:
+            column = rows[0].index("topic")
+            rows = rows[1:]
+        else:
+            column = 0
+        topics = [row[column].strip() for row in rows if len(row) > column]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    record = record.get("topic")
+                if not isinstance(record, str):
+                    logger.warning(f"Skipping line {line_number} of {path}: no topic")
+                    continue
+                topics.append(record.strip())
+    return [topic for topic in topics if topic]
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one topic in a batch run, written as one output JSONL line."""
+
+    topic: str
+    session_id: str
+    status: str
+    initial_prompt: Optional[str] = None
+    evaluation: Optional[str] = None
+    final_prompt: Optional[str] = None
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+    metrics: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class BatchSummary:
+    """Aggregate counters for a batch run."""
+
+    total: int
+    succeeded: int
+    failed: int
+    elapsed_seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """Completed topics per second."""
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return (self.succeeded + self.failed) / self.elapsed_seconds
+
+
+def _run_topic(
+    topic: str,
+    storage: Storage,
+    use_cache: bool,
+    workflow_kwargs: Dict[str, Any],
+    convergence: Optional[ConvergencePolicy] = None,
+    resume_run_id: Optional[str] = None,
+) -> BatchResult:
+    """Runs the full three-phase workflow for a single topic, or resumes a run."""
+    session_id = topic_session_id(topic)
+    started = time.perf_counter()
+    result = BatchResult(topic=topic, session_id=session_id, status="ok")
+    try:
+        workflow = PromptGeneration(
+            session_id=session_id, storage=storage, **workflow_kwargs
+        )
+        # Phases run strictly in order within the topic; the pool overlaps topics.
+        responses = (
+            workflow.resume(resume_run_id)
+            if resume_run_id is not None
+            else workflow.run(topic=topic, use_cache=use_cache, convergence=convergence)
+        )
+        for response in responses:
+            if response.event == RunEvent.run_error:
+                result.status = "error"
+                result.error = response.content
+        result.initial_prompt = workflow.get_cached_initial_prompt(topic)
+        result.evaluation = workflow.get_cached_evaluation(topic)
+        result.final_prompt = workflow.get_cached_improved_prompt(topic)
+        if workflow.run_metrics is not None:
+            result.metrics = workflow.run_metrics.to_dict()
+    except Exception as e:
+        logger.error(f"Batch run failed for topic '{topic}': {e}")
+        result.status = "error"
+        result.error = str(e)
+    result.elapsed_seconds = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(
+    topics: List[str],
+    output_path: str,
+    concurrency: int = 4,
+    use_cache: bool = True,
+    storage: Optional[Storage] = None,
+    convergence: Optional[ConvergencePolicy] = None,
+    **workflow_kwargs: Any,
+) -> BatchSummary:
+    """Runs PromptGeneration for many topics with bounded concurrency.
+
+    Each topic keeps the generate → evaluate → improve ordering, while up to
+    ``concurrency`` topics are in flight at once. Results are appended to
+    ``output_path`` as JSON lines in completion order.
+
+    Args:
+        topics (List[str]): The topics to generate prompts for.
+        output_path (str): The JSONL file results are appended to.
+        concurrency (int, optional): Maximum topics in flight. Defaults to 4.
+        use_cache (bool, optional): Reuse cached phase results. Defaults to True.
+        storage (Storage, optional): Storage shared by all workflows.
+        convergence (ConvergencePolicy, optional): Run every topic in convergence mode.
+        **workflow_kwargs: Extra PromptGeneration arguments (e.g. models).
+
+    Returns:
+        BatchSummary: Counters and throughput for the run.
+    """
+    if storage is None:
+        from .storage import default_storage
+
+        storage = default_storage()
+    logger.info(
+        f"Starting batch of {len(topics)} topics with concurrency {concurrency}"
+    )
+    return _run_all(
+        [
+            partial(_run_topic, topic, storage, use_cache, workflow_kwargs, convergence)
+            for topic in topics
+        ],
+        output_path,
+        concurrency,
+        workflow_kwargs,
+    )
+
+
+def resume_runs(
+    output_path: str,
+    run_ids: Optional[List[str]] = None,
+    include_failed: bool = False,
+    concurrency: int = 4,
+    storage: Optional[Storage] = None,
+    **workflow_kwargs: Any,
+) -> BatchSummary:
+    """Resumes interrupted runs at their first incomplete phase.
+
+    Args:
+        output_path (str): The JSONL file results are appended to.
+        run_ids (List[str], optional): The runs to resume. Defaults to every run
+            whose process died before it finished.
+        include_failed (bool, optional): Also retry runs that ended with an error.
+        concurrency (int, optional): Maximum runs in flight. Defaults to 4.
+        storage (Storage, optional): Storage shared by all workflows.
+        **workflow_kwargs: Extra PromptGeneration arguments (e.g. models).
+
+    Returns:
+        BatchSummary: Counters and throughput for the resumed runs.
+    """
+    if storage is None:
+        from .storage import default_storage
+
+        storage = default_storage()
+    checkpoint_store = (
+        workflow_kwargs.get("checkpoint_store") or get_default_checkpoint_store()
+    )
+    if run_ids:
+        records = [checkpoint_store.get_run(run_id) for run_id in run_ids]
+        for run_id, record in zip(run_ids, records):
+            if record is None:
+                logger.warning(f"No checkpointed run with ID {run_id}")
+        records = [record for record in records if record is not None]
+    else:
+        records = checkpoint_store.interrupted(include_failed=include_failed)
+    logger.info(f"Resuming {len(records)} runs with concurrency {concurrency}")
+    return _run_all(
+        [
+            partial(
+                _run_topic,
+                record.topic,
+                storage,
+                True,
+                workflow_kwargs,
+                resume_run_id=record.run_id,
+            )
+            for record in records
+        ],
+        output_path,
+        concurrency,
+        workflow_kwargs,
+    )
+
+
+def _run_all(
+    jobs: List[Callable[[], BatchResult]],
+    output_path: str,
+    concurrency: int,
+    workflow_kwargs: Dict[str, Any],
+) -> BatchSummary:
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    succeeded = failed = 0
+    started = time.perf_counter()
+    # Final prompts are written to the history in bulk, and flushed at the end.
+    history = workflow_kwargs.get("final_prompt_store")
+    if history is None:
+        history = get_default_prompt_store()
+    with (
+        history.batched(),
+        open(output_path, "a", encoding="utf-8") as output,
+        ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool,
+    ):
+        futures = [pool.submit(job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            output.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+            output.flush()
+            if result.status == "ok":
+                succeeded += 1
+            else:
+                failed += 1
+            done = succeeded + failed
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"[{done}/{len(jobs)}] {result.status} in {result.elapsed_seconds}s: "
+                f"{result.topic[:60]} ({done / elapsed:.2f} topics/s)"
+            )
+
+    return BatchSummary(
+        total=len(jobs),
+        succeeded=succeeded,
+        failed=failed,
+        elapsed_seconds=round(time.perf_counter() - started, 3),
+    )
@@ -0,0 +1,151 @@
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from agno.utils.log import logger
+
+# Sentence ends, for the extractive summary.
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+STRATEGIES = ("truncate", "summarize")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def compact_json(payload: Any) -> str:
+    """Serializes an agent payload without indentation or escaped non-ASCII text."""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Keeps the start of ``text`` within ``max_tokens``, cut on a line break."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens * 4)
+    cut = text.rfind("\n", 0, limit)
+    kept = text[: cut if cut > limit // 2 else limit].rstrip()
+    return f"{kept}\n[... {estimate_tokens(text[len(kept) :])} tokens truncated]"
+
+
+def summarize_text(text: str, max_tokens: int) -> str:
+    """Shrinks markdown to its outline: every heading plus the first sentence of
+    each paragraph or list item, truncated if that is still over budget."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    outline: List[str] = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            outline.append(line)
+            continue
+        outline.append(_SENTENCE_END.split(line, maxsplit=1)[0])
+    summary = re.sub(r"\n{3,}", "\n\n", "\n".join(outline)).strip()
+    return truncate_text(summary, max_tokens)
+
+
+@dataclass
+class ContextUsage:
+    """Estimated input tokens of one agent call, before and after budgeting."""
+
+    phase: str
+    instruction_tokens: int
+    # The message as it was sent before budgeting (indented JSON, nothing cut).
+    raw_message_tokens: int
+    message_tokens: int
+    budget: Optional[int] = None
+    shrunk: List[str] = field(default_factory=list)
+
+    @property
+    def before(self) -> int:
+        return self.instruction_tokens + self.raw_message_tokens
+
+    @property
+    def after(self) -> int:
+        return self.instruction_tokens + self.message_tokens
+
+
+class ContextBudget:
+    """Serializes agent payloads compactly and keeps each phase within its budget.
+
+    ``limits`` maps a phase name (e.g. ``"Phase 3"``) to its input token budget,
+    instructions included; ``default`` applies to the other phases. Over budget,
+    the payload's shrinkable fields are truncated or summarized, each in
+    proportion to its size, until the call fits.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, int]] = None,
+        default: Optional[int] = None,
+        strategy: str = "truncate",
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown budget strategy {strategy!r}, use {STRATEGIES}")
+        self.limits = dict(limits or {})
+        self.default = default
+        self.strategy = strategy
+
+    def limit_for(self, phase: str) -> Optional[int]:
+        return self.limits.get(phase, self.default)
+
+    def fit(
+        self,
+        phase: str,
+        instructions: str,
+        payload: Dict[str, Any],
+        shrinkable: Sequence[str] = (),
+    ) -> Tuple[str, ContextUsage]:
+        """Returns the message for ``payload`` and its token accounting.
+
+        Args:
+            phase (str): The phase the call belongs to.
+            instructions (str): The agent's static instructions, sent with every call.
+            payload (Dict[str, Any]): The agent input.
+            shrinkable (Sequence[str], optional): Text fields that may be shortened.
+
+        Returns:
+            Tuple[str, ContextUsage]: The compact message and its token counts.
+        """
+        message = compact_json(payload)
+        usage = ContextUsage(
+            phase=phase,
+            instruction_tokens=estimate_tokens(instructions),
+            raw_message_tokens=estimate_tokens(json.dumps(payload, indent=4)),
+            message_tokens=estimate_tokens(message),
+            budget=self.limit_for(phase),
+        )
+        if usage.budget is not None and usage.after > usage.budget:
+            shrink = truncate_text if self.strategy == "truncate" else summarize_text
+            # Each field gives up a share of the excess proportional to its size.
+            sizes = {
+                key: estimate_tokens(compact_json(payload[key]))
+                for key in shrinkable
+                if isinstance(payload.get(key), str)
+            }
+            over, total = usage.after - usage.budget, sum(sizes.values())
+            payload = dict(payload)
+            for key, size in sizes.items():
+                target = size - math.ceil(over * size / total)
+                # Escaped quotes and newlines make the field longer in JSON.
+                escaping = size - estimate_tokens(payload[key])
+                payload[key] = shrink(payload[key], max(0, target - escaping))
+                usage.shrunk.append(key)
+            message = compact_json(payload)
+            usage.message_tokens = estimate_tokens(message)
+            if usage.after > usage.budget:
+                logger.warning(
+                    f"{phase} input is {usage.after} tokens, over its budget of "
+                    f"{usage.budget} even after shrinking {usage.shrunk or 'nothing'}"
+                )
+        logger.info(
+            f"{phase} input: {usage.before} -> {usage.after} tokens "
+            f"(instructions {usage.instruction_tokens}, budget {usage.budget or 'none'}"
+            + (f", {self.strategy}d {', '.join(usage.shrunk)}" if usage.shrunk else "")
+            + ")"
+        )
+        return message, usage
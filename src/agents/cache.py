@@ -0,0 +1,162 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+from agno.utils.log import logger
+
+
+def normalize_topic(topic: str) -> str:
+    """Normalizes a topic for cache keys (case and whitespace insensitive)."""
+    return " ".join(topic.lower().split())
+
+
+def phase_cache_key(
+    phase: str, topic: str, model_id: str, instructions: str, phase_input: str
+) -> str:
+    """Builds the content hash identifying one phase result.
+
+    Any change to the agent's model or instructions yields a new key, so stale
+    entries are never returned and simply age out through eviction.
+    """
+    digest = hashlib.sha256()
+    for part in (phase, normalize_topic(topic), model_id, instructions, phase_input):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class PhaseCache:
+    """Persistent, process-shared cache of phase outputs stored in SQLite.
+
+    Entries expire after ``ttl_seconds`` and the least recently used entries are
+    evicted once ``max_entries`` or ``max_bytes`` is exceeded.
+    """
+
+    def __init__(
+        self,
+        db_file: str = "tmp/phase_cache.db",
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        max_entries: int = 10_000,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.db_file = db_file
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS phase_cache (
+                key TEXT PRIMARY KEY,
+                phase TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_phase_cache_last_accessed "
+            "ON phase_cache (last_accessed)"
+        )
+        self._conn.commit()
+
+    def get(self, phase: str, key: str) -> Optional[str]:
+        """Returns the cached value for ``key`` or None, updating recency and counters."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM phase_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1], now):
+                self._conn.execute("DELETE FROM phase_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses[phase] += 1
+                return None
+            self._conn.execute(
+                "UPDATE phase_cache SET last_accessed = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits[phase] += 1
+            return row[0]
+
+    def put(self, phase: str, key: str, value: str):
+        """Stores ``value`` under ``key`` and enforces the TTL and size caps."""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO phase_cache "
+                "(key, phase, value, size, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, phase, value, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Returns per-phase hit/miss counters for this process."""
+        phases = set(self.hits) | set(self.misses)
+        return {
+            phase: {"hits": self.hits[phase], "misses": self.misses[phase]}
+            for phase in sorted(phases)
+        }
+
+    def clear(self):
+        """Removes every cached entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM phase_cache")
+            self._conn.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _evict(self, now: float):
+        """Drops expired entries, then least recently used ones over the caps."""
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM phase_cache WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+        count, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM phase_cache"
+        ).fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM phase_cache ORDER BY last_accessed"
+        ).fetchall():
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM phase_cache WHERE key = ?", (key,))
+            count -= 1
+            total_bytes -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} phase cache entries")
+
+
+_default_cache: Optional[PhaseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> PhaseCache:
+    """Returns the phase cache shared by every workflow in this process."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PhaseCache()
+        return _default_cache
@@ -0,0 +1,74 @@
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, List, Union
+
+if TYPE_CHECKING:
+    from agno.models.base import Model
+
+# A cascade tier: a model ID for the pooled OpenAI client, or a model instance.
+Tier = Union[str, "Model"]
+
+_HEADING = re.compile(r"^#{1,6}\s+\S", re.MULTILINE)
+_LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+\S", re.MULTILINE)
+_OUTPUT_HEADING = re.compile(
+    r"^#{1,6}\s+.*\b(?:output|format|response)\b", re.IGNORECASE | re.MULTILINE
+)
+
+
+def prompt_quality(prompt: str) -> float:
+    """Scores a generated prompt's structure from 0 to 1 without a model call.
+
+    The share of these checks it passes: at least 60 words, two or more
+    section headings, list-form instructions, an output format section, and
+    balanced code fences (a truncated answer often leaves one open).
+    """
+    checks = [
+        len(prompt.split()) >= 60,
+        len(_HEADING.findall(prompt)) >= 2,
+        _LIST_ITEM.search(prompt) is not None,
+        _OUTPUT_HEADING.search(prompt) is not None,
+        prompt.count("```") % 2 == 0,
+    ]
+    return sum(checks) / len(checks)
+
+
+@dataclass
+class CascadePolicy:
+    """Cheaper models tried before the workflow's own for Phases 1 and 2.
+
+    Each phase runs on its tiers in order, cheapest first, and ends on the
+    workflow's generator or evaluator. A Phase 1 prompt is escalated to the
+    next tier when ``quality_check`` scores it below ``min_quality``; a Phase 2
+    evaluation is escalated when it has no scores or recommendations, or its
+    overall score is below ``min_score``, since a weak prompt deserves the
+    stronger evaluator's recommendations. A tier that fails is escalated too.
+    """
+
+    generator_tiers: List[Tier] = field(default_factory=list)
+    evaluator_tiers: List[Tier] = field(default_factory=list)
+    min_quality: float = 0.8
+    min_score: float = 7.0
+    quality_check: Callable[[str], float] = prompt_quality
+
+    def tiers(self, phase: str) -> List[Tier]:
+        if phase == "Phase 1":
+            return list(self.generator_tiers)
+        if phase == "Phase 2":
+            return list(self.evaluator_tiers)
+        return []
+
+    def tier_ids(self, phase: str) -> List[str]:
+        return [
+            tier if isinstance(tier, str) else str(tier.id)
+            for tier in self.tiers(phase)
+        ]
+
+    def accepts_prompt(self, prompt: str) -> bool:
+        return self.quality_check(prompt) >= self.min_quality
+
+    def accepts_evaluation(self, evaluation: Any) -> bool:
+        return (
+            bool(evaluation.scores)
+            and bool(evaluation.recommendations.strip())
+            and evaluation.overall_score >= self.min_score
+        )
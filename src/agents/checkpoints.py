@@ -0,0 +1,245 @@
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from agno.utils.log import logger
+
+# Run statuses; "running" runs whose process has died are interrupted.
+RUNNING, COMPLETED, FAILED, CANCELLED = "running", "completed", "failed", "cancelled"
+
+# Checkpoint of the final prompt's side effects (history, index and file).
+SAVE_PHASE = "Save"
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@dataclass
+class RunRecord:
+    """A workflow run and the outputs of the phases it has completed."""
+
+    run_id: str
+    session_id: Optional[str]
+    topic: str
+    run_input: Dict[str, Any]
+    status: str
+    phase: Optional[str]
+    pid: int
+    created_at: datetime
+    updated_at: datetime
+    phases: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def interrupted(self) -> bool:
+        return self.status == RUNNING and not _process_alive(self.pid)
+
+
+class CheckpointStore:
+    """Durable per-phase checkpoints of workflow runs in SQLite.
+
+    Every phase output is committed as soon as the phase completes, keyed by
+    the run ID, so a run whose process dies can be resumed at its first
+    incomplete phase. Commits use WAL with full synchronization: a checkpoint
+    that was written survives a crash of the process or the machine.
+    """
+
+    def __init__(self, db_file: str = "tmp/checkpoints.db"):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                session_id TEXT,
+                topic TEXT NOT NULL,
+                run_input TEXT NOT NULL,
+                status TEXT NOT NULL,
+                phase TEXT,
+                pid INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, updated_at);
+            CREATE TABLE IF NOT EXISTS run_phases (
+                run_id TEXT NOT NULL,
+                phase TEXT NOT NULL,
+                output TEXT NOT NULL,
+                completed_at TEXT NOT NULL,
+                PRIMARY KEY (run_id, phase)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def start_run(
+        self,
+        run_id: str,
+        session_id: Optional[str],
+        topic: str,
+        run_input: Dict[str, Any],
+    ) -> RunRecord:
+        """Marks ``run_id`` as running in this process.
+
+        A new run is created; a resumed run keeps its input and checkpoints.
+
+        Returns:
+            RunRecord: The run, with the outputs of its completed phases.
+        """
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, session_id, topic, run_input, status, "
+                "pid, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (run_id) DO UPDATE SET status = excluded.status, "
+                "pid = excluded.pid, updated_at = excluded.updated_at",
+                (
+                    run_id,
+                    session_id,
+                    topic,
+                    json.dumps(run_input),
+                    RUNNING,
+                    os.getpid(),
+                    now,
+                    now,
+                ),
+            )
+            self._conn.commit()
+        return self.get_run(run_id)
+
+    def checkpoint(self, run_id: str, phase: str, output: str):
+        """Durably records the output of a completed phase."""
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_phases (run_id, phase, output, completed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (run_id, phase, output, now),
+            )
+            self._conn.execute(
+                "UPDATE runs SET phase = ?, updated_at = ? WHERE run_id = ?",
+                (phase, now, run_id),
+            )
+            self._conn.commit()
+        logger.debug(f"Checkpointed {phase} of run {run_id}")
+
+    def finish_run(self, run_id: str, status: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?",
+                (status, datetime.utcnow().isoformat(), run_id),
+            )
+            self._conn.commit()
+
+    def get_run(self, run_id: str) -> Optional[RunRecord]:
+        records = self._select("WHERE run_id = ?", (run_id,))
+        return records[0] if records else None
+
+    def interrupted(self, include_failed: bool = False) -> List[RunRecord]:
+        """Returns the runs to resume, oldest first.
+
+        Args:
+            include_failed (bool, optional): Also return runs that ended with an
+                error (e.g. a model API failure). Defaults to False.
+
+        Returns:
+            List[RunRecord]: Runs whose process died before they finished.
+        """
+        statuses = (RUNNING, FAILED) if include_failed else (RUNNING,)
+        records = self._select(
+            f"WHERE status IN ({', '.join('?' * len(statuses))}) ORDER BY created_at",
+            statuses,
+        )
+        return [r for r in records if r.status == FAILED or r.interrupted]
+
+    def _select(self, where: str, params: tuple) -> List[RunRecord]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT run_id, session_id, topic, run_input, status, phase, pid, "
+                f"created_at, updated_at FROM runs {where}",
+                params,
+            ).fetchall()
+            records = [
+                RunRecord(
+                    run_id=row[0],
+                    session_id=row[1],
+                    topic=row[2],
+                    run_input=json.loads(row[3]),
+                    status=row[4],
+                    phase=row[5],
+                    pid=row[6],
+                    created_at=datetime.fromisoformat(row[7]),
+                    updated_at=datetime.fromisoformat(row[8]),
+                )
+                for row in rows
+            ]
+            for record in records:
+                record.phases = dict(
+                    self._conn.execute(
+                        "SELECT phase, output FROM run_phases WHERE run_id = ?",
+                        (record.run_id,),
+                    ).fetchall()
+                )
+        return records
+
+
+class RunCompletion:
+    """Records a run's final status only once its final prompt is on disk.
+
+    With a write-behind writer the file can be written after the workflow
+    steps have ended. The Save checkpoint is written by saved(), after the
+    write, and the status by whichever of saved() and finish() comes last,
+    so a crash before the write leaves the run running and resumable.
+    """
+
+    def __init__(self, store: CheckpointStore, run_id: str):
+        self.store = store
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._saved = False
+        self._status: Optional[str] = None
+
+    def saved(self, path: str):
+        self.store.checkpoint(self.run_id, SAVE_PHASE, path)
+        with self._lock:
+            self._saved = True
+            status = self._status
+        if status is not None:
+            self.store.finish_run(self.run_id, status)
+
+    def finish(self, status: str):
+        with self._lock:
+            if not self._saved:
+                self._status = status
+                return
+        self.store.finish_run(self.run_id, status)
+
+
+_default_store: Optional[CheckpointStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_checkpoint_store() -> CheckpointStore:
+    """Returns the checkpoint store shared by every workflow in this process."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = CheckpointStore()
+        return _default_store
@@ -0,0 +1,84 @@
+import asyncio
+import functools
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+import httpx
+from agno.models.openai import OpenAIResponses
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, OpenAI
+
+# Connection pool shared by every agent in the process.
+POOL_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=50)
+
+_lock = threading.Lock()
+_sync_clients: Dict[Tuple, OpenAI] = {}
+# Async connections are bound to the event loop that opened them.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, AsyncOpenAI]]" = weakref.WeakKeyDictionary()
+
+
+def _params_key(client_params: Dict[str, Any]) -> Tuple:
+    return tuple(sorted((name, repr(value)) for name, value in client_params.items()))
+
+
+def get_shared_client(client_params: Dict[str, Any]) -> OpenAI:
+    """Returns the process-wide OpenAI client for the given client parameters."""
+    key = _params_key(client_params)
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None:
+            client = OpenAI(
+                **client_params, http_client=httpx.Client(limits=POOL_LIMITS)
+            )
+            _sync_clients[key] = client
+        return client
+
+
+def get_shared_async_client(client_params: Dict[str, Any]) -> AsyncOpenAI:
+    """Returns the AsyncOpenAI client shared on the running event loop."""
+    loop = asyncio.get_running_loop()
+    key = _params_key(client_params)
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = AsyncOpenAI(
+                **client_params, http_client=httpx.AsyncClient(limits=POOL_LIMITS)
+            )
+            clients[key] = client
+        return client
+
+
+@dataclass
+class PooledOpenAIResponses(OpenAIResponses):
+    """OpenAIResponses model that draws its clients from a process-wide pool.
+
+    Clients are never stored on the model, so agent copies stay cheap and every
+    workflow instance reuses the same keep-alive connections.
+    """
+
+    def get_client(self) -> OpenAI:
+        if self.http_client is not None:
+            return super().get_client()
+        return get_shared_client(self._get_client_params())
+
+    def get_async_client(self) -> AsyncOpenAI:
+        if self.http_client is not None:
+            return super().get_async_client()
+        return get_shared_async_client(self._get_client_params())
+
+
+@functools.cache
+def load_environment():
+    """Loads the ``.env`` file once per process, before the first client is built."""
+    load_dotenv()
+
+
+def default_model(model_id: str) -> PooledOpenAIResponses:
+    """Returns a pooled OpenAI model, with the API key taken from ``.env``."""
+    load_environment()
+    # Retries are left to the Scheduler, so throttled requests are not retried
+    # twice and their outcomes reach its concurrency limiter.
+    return PooledOpenAIResponses(id=model_id, max_retries=0)
@@ -0,0 +1,79 @@
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class ConvergencePolicy:
+    """When the evaluate/improve loop of convergence mode stops.
+
+    A round improves the current prompt and evaluates the result. The loop
+    skips rounds once the score reaches ``target_score``, stops when a round
+    gains less than ``min_improvement`` points, and never starts a round that
+    the last round's cost says would exceed the latency or token budget. Both
+    budgets cover the whole run, initial generation and evaluation included.
+    """
+
+    max_rounds: int = 3
+    min_improvement: float = 0.25
+    target_score: Optional[float] = 9.0
+    max_seconds: Optional[float] = None
+    max_tokens: Optional[int] = None
+
+    def stop_reason(self, state: "ConvergenceState") -> Optional[str]:
+        """Returns why no further round should run, or None to run one."""
+        if self.target_score is not None and state.score >= self.target_score:
+            return "target"
+        if state.rounds >= self.max_rounds:
+            return "rounds"
+        if len(state.scores) > 1 and (
+            state.scores[-1] - state.scores[-2] < self.min_improvement
+        ):
+            return "plateau"
+        next_seconds = state.round_seconds[-1] if state.round_seconds else 0.0
+        if (
+            self.max_seconds is not None
+            and state.elapsed + next_seconds > self.max_seconds
+        ):
+            return "latency"
+        next_tokens = state.round_tokens[-1] if state.round_tokens else 0
+        if self.max_tokens is not None and state.tokens + next_tokens > self.max_tokens:
+            return "tokens"
+        return None
+
+
+@dataclass
+class ConvergenceState:
+    """Scores and costs of the rounds run so far (round 0 is the initial prompt).
+
+    ``tokens`` and ``started`` start at the run's totals, so the budgets
+    include the phases before the loop.
+    """
+
+    scores: List[float]
+    tokens: int = 0
+    round_seconds: List[float] = field(default_factory=list)
+    round_tokens: List[int] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def rounds(self) -> int:
+        return len(self.scores) - 1
+
+    @property
+    def score(self) -> float:
+        return self.scores[-1]
+
+    @property
+    def best_round(self) -> int:
+        return max(range(len(self.scores)), key=lambda i: (self.scores[i], -i))
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def add_round(self, score: float, seconds: float, tokens: int):
+        self.scores.append(score)
+        self.round_seconds.append(seconds)
+        self.round_tokens.append(tokens)
+        self.tokens += tokens
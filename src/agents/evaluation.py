@@ -0,0 +1,33 @@
+from typing import Dict
+
+from pydantic import BaseModel, Field
+
+
+class PromptEvaluation(BaseModel):
+    """Model for storing prompt evaluations"""
+
+    prompt: str = Field(
+        "", description="Left empty; the evaluated prompt is not repeated"
+    )
+    evaluation: Dict[str, str] = Field(..., description="Evaluation results")
+    scores: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Score from 0 to 10 for each evaluation criterion",
+    )
+    overall_score: float = Field(
+        0.0, description="Overall score from 0 to 10, used to rank prompts"
+    )
+    recommendations: str = Field(..., description="Suggested improvements")
+
+    def as_markdown(self) -> str:
+        """Renders the evaluation (without the evaluated prompt) as markdown."""
+        lines = [
+            f"- **Overall Score**: {self.overall_score:.1f}/10",
+            "- **Evaluation**:",
+        ]
+        for criterion, feedback in self.evaluation.items():
+            score = self.scores.get(criterion)
+            suffix = f" ({score:g}/10)" if score is not None else ""
+            lines.append(f"  - {criterion}{suffix}: {feedback}")
+        lines.append(f"- **Recommendation**: {self.recommendations}")
+        return "\n".join(lines)
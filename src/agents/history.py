@@ -0,0 +1,226 @@
+import atexit
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional
+
+from agno.utils.log import logger
+from pydantic import BaseModel, Field
+
+from .cache import normalize_topic
+
+
+class FinalPromptRecord(BaseModel):
+    """Model for storing the final generated prompts permanently."""
+
+    topic: str = Field(..., description="The original topic for the prompt.")
+    final_prompt: str = Field(..., description="The final, improved prompt.")
+    timestamp: datetime = Field(
+        default_factory=datetime.utcnow, description="When the prompt was saved."
+    )
+    session_id: Optional[str] = Field(
+        None, description="The workflow session that produced the prompt."
+    )
+    run_id: Optional[str] = Field(
+        None, description="The run that produced the prompt; recorded at most once."
+    )
+
+
+class FinalPromptStore:
+    """Permanent, searchable history of final prompts in its own SQLite table.
+
+    One row per final prompt, indexed by topic and timestamp, with an FTS5 index
+    over topic and prompt text kept in sync by triggers. A record whose run ID
+    is already stored is ignored, so a resumed run never adds a second
+    entry. Each record is written as soon as it is added, so a run's final
+    prompt is in the history once the run ends. Batch mode buffers them
+    instead with batched(), trading that for fewer transactions; pending
+    records are flushed before every query and at interpreter exit.
+    """
+
+    def __init__(self, db_file: str = "tmp/final_prompts.db", batch_size: int = 1):
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: List[FinalPromptRecord] = []
+
+        db_dir = os.path.dirname(db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS final_prompts (
+                id INTEGER PRIMARY KEY,
+                topic TEXT NOT NULL,
+                normalized_topic TEXT NOT NULL,
+                final_prompt TEXT NOT NULL,
+                session_id TEXT,
+                timestamp TEXT NOT NULL,
+                run_id TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_final_prompts_topic
+                ON final_prompts (normalized_topic, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_final_prompts_timestamp
+                ON final_prompts (timestamp);
+            CREATE VIRTUAL TABLE IF NOT EXISTS final_prompts_fts USING fts5 (
+                topic, final_prompt, content='final_prompts', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS final_prompts_ai AFTER INSERT ON final_prompts
+            BEGIN
+                INSERT INTO final_prompts_fts (rowid, topic, final_prompt)
+                VALUES (new.id, new.topic, new.final_prompt);
+            END;
+            CREATE TRIGGER IF NOT EXISTS final_prompts_ad AFTER DELETE ON final_prompts
+            BEGIN
+                INSERT INTO final_prompts_fts (final_prompts_fts, rowid, topic, final_prompt)
+                VALUES ('delete', old.id, old.topic, old.final_prompt);
+            END;
+            """
+        )
+        columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(final_prompts)")
+        }
+        if "run_id" not in columns:
+            # Histories written before run IDs were recorded.
+            self._conn.execute("ALTER TABLE final_prompts ADD COLUMN run_id TEXT")
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_final_prompts_run "
+            "ON final_prompts (run_id) WHERE run_id IS NOT NULL"
+        )
+        self._conn.commit()
+        atexit.register(self.flush)
+
+    def add(self, record: FinalPromptRecord):
+        """Queues a record, writing the batch once ``batch_size`` are pending."""
+        with self._lock:
+            self._pending.append(record)
+            if len(self._pending) >= self.batch_size:
+                self._write_pending()
+
+    def add_many(self, records: Iterable[FinalPromptRecord]):
+        """Writes many records in one transaction."""
+        with self._lock:
+            self._pending.extend(records)
+            self._write_pending()
+
+    def flush(self):
+        """Writes every pending record."""
+        with self._lock:
+            self._write_pending()
+
+    @contextmanager
+    def batched(self, batch_size: int = 32) -> Iterator["FinalPromptStore"]:
+        """Writes records ``batch_size`` at a time until the block exits, then flushes.
+
+        For bulk runs (batch mode): a crash can lose the records still pending.
+        """
+        previous, self.batch_size = self.batch_size, batch_size
+        try:
+            yield self
+        finally:
+            self.batch_size = previous
+            self.flush()
+
+    def search(self, query: str, limit: int = 20) -> List[FinalPromptRecord]:
+        """Full-text search over topics and prompts, best matches first.
+
+        Args:
+            query (str): An FTS5 query, e.g. ``zombie AND leader`` or ``"space travel"``.
+            limit (int, optional): Maximum number of records. Defaults to 20.
+
+        Returns:
+            List[FinalPromptRecord]: The matching records ranked by BM25.
+
+        Raises:
+            ValueError: If the query is not valid FTS5 syntax.
+        """
+        try:
+            return self._select(
+                "SELECT p.topic, p.final_prompt, p.timestamp, p.session_id "
+                "FROM final_prompts_fts JOIN final_prompts p ON p.id = final_prompts_fts.rowid "
+                "WHERE final_prompts_fts MATCH ? ORDER BY bm25(final_prompts_fts) LIMIT ?",
+                (query, limit),
+            )
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query {query!r}: {e}") from e
+
+    def by_topic(self, topic: str, limit: int = 20) -> List[FinalPromptRecord]:
+        """Returns the prompts for ``topic`` (case/whitespace insensitive), newest first."""
+        return self._select(
+            "SELECT topic, final_prompt, timestamp, session_id FROM final_prompts "
+            "WHERE normalized_topic = ? ORDER BY timestamp DESC LIMIT ?",
+            (normalize_topic(topic), limit),
+        )
+
+    def recent(
+        self, limit: int = 20, since: Optional[datetime] = None
+    ) -> List[FinalPromptRecord]:
+        """Returns the newest prompts, optionally only those saved after ``since``."""
+        return self._select(
+            "SELECT topic, final_prompt, timestamp, session_id FROM final_prompts "
+            "WHERE timestamp >= ? ORDER BY timestamp DESC LIMIT ?",
+            ((since or datetime.min).isoformat(), limit),
+        )
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM final_prompts"
+            ).fetchone()
+        return count
+
+    def _select(self, sql: str, parameters: tuple) -> List[FinalPromptRecord]:
+        with self._lock:
+            self._write_pending()
+            rows = self._conn.execute(sql, parameters).fetchall()
+        return [
+            FinalPromptRecord(
+                topic=topic,
+                final_prompt=final_prompt,
+                timestamp=datetime.fromisoformat(timestamp),
+                session_id=session_id,
+            )
+            for topic, final_prompt, timestamp, session_id in rows
+        ]
+
+    def _write_pending(self):
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO final_prompts "
+                "(topic, normalized_topic, final_prompt, session_id, timestamp, run_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        record.topic,
+                        normalize_topic(record.topic),
+                        record.final_prompt,
+                        record.session_id,
+                        record.timestamp.isoformat(),
+                        record.run_id,
+                    )
+                    for record in self._pending
+                ],
+            )
+        logger.debug(f"Wrote {len(self._pending)} final prompts")
+        self._pending.clear()
+
+
+_default_store: Optional[FinalPromptStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_prompt_store() -> FinalPromptStore:
+    """Returns the final prompt store shared by every workflow in this process."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = FinalPromptStore()
+        return _default_store
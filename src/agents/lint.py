@@ -0,0 +1,343 @@
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from agno.utils.log import logger
+
+from .evaluation import PromptEvaluation
+
+# The rules match English and Spanish prompts: the workflow writes prompts in
+# the language of their topic.
+_HEADING = re.compile(r"^#{1,6}\s+(.+)$", re.MULTILINE)
+_LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+\S", re.MULTILINE)
+_NUMBERED_ITEM = re.compile(r"^\s*\d+[.)]\s+\S", re.MULTILINE)
+_DIRECTIVE = re.compile(
+    r"\b(?:must|always|never|do not|don't|only"
+    r"|debes?|deben|siempre|nunca|jamás|no debe[sn]?|solo|sólo|únicamente)\b",
+    re.IGNORECASE,
+)
+_VAGUE = re.compile(
+    r"\b(?:etc\.?|something|somehow|as needed|if possible|try to|maybe|and so on"
+    r"|algo|de alguna manera|según sea necesario|si es posible|intenta|tal vez"
+    r"|quizás|y así sucesivamente)\b",
+    re.IGNORECASE,
+)
+_PERSISTENCE = re.compile(
+    r"keep going|until (?:the )?\w+(?: \w+){0,5} (?:is |are )?(?:completely |fully )?"
+    r"(?:resolved|complete|completed|done|finished|solved)"
+    r"|do not (?:stop|end|yield)|\bpersist"
+    r"|(?:continúa|sigue)\b[^.\n]{0,40}\bhasta que\b"
+    r"|hasta que (?:\w+ ){0,6}(?:esté|estén|quede|queden) (?:completamente |totalmente )?"
+    r"(?:resuelt|complet|terminad|acabad)"
+    r"|no (?:te detengas|termines tu turno|pares)",
+    re.IGNORECASE,
+)
+_TOOLS = re.compile(
+    r"\btools?\b|\bfunction calls?\b|\bherramientas?\b|\bllamadas? a funciones\b",
+    re.IGNORECASE,
+)
+_NO_GUESSING = re.compile(
+    r"(?:instead of|rather than|do not|don't|never)\s+(?:\w+\s+){0,2}"
+    r"(?:guess|guessing|make (?:things |anything )?up|making (?:things )?up|hallucinat)"
+    r"|(?:en lugar de|en vez de|\bno|nunca)\s+(?:\w+\s+){0,2}"
+    r"(?:adivin|invent|supon|supong|alucin)",
+    re.IGNORECASE,
+)
+_EXAMPLE = re.compile(
+    r"\bfor example\b|\be\.g\.|\bexample:|\bpor ejemplo\b|\bp\. ?ej\.|\bejemplo:",
+    re.IGNORECASE,
+)
+_PLANNING = re.compile(
+    r"\bplan\b|\bplanning\b|step[- ]by[- ]step|think (?:\w+ ){0,3}before"
+    r"|\bplanific|paso a paso|piensa (?:\w+ ){0,3}antes",
+    re.IGNORECASE,
+)
+_OUTPUT_SPEC = re.compile(
+    r"\b(?:respond|return|answer|reply|output|format"
+    r"|responde|devuelve|contesta|entrega|salida|formato)\b[^.\n]{0,40}"
+    r"\b(?:markdown|json|table|list|bullets?|sections?|paragraphs?|yaml|csv"
+    r"|tablas?|listas?|viñetas?|secci[oó]n|secciones|párrafos?)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class _Prompt:
+    """A prompt split into the parts the rules look at."""
+
+    text: str
+    headings: List[str]
+    words: int
+    list_items: int
+    numbered_items: int
+
+    @classmethod
+    def parse(cls, text: str) -> "_Prompt":
+        return cls(
+            text=text,
+            headings=[h.strip().lower() for h in _HEADING.findall(text)],
+            words=len(text.split()),
+            list_items=len(_LIST_ITEM.findall(text)),
+            numbered_items=len(_NUMBERED_ITEM.findall(text)),
+        )
+
+    def has_heading(self, *keywords: str) -> bool:
+        """Whether a heading has a word starting with one of ``keywords``."""
+        starts = re.compile(rf"\b(?:{'|'.join(keywords)})")
+        return any(starts.search(heading) for heading in self.headings)
+
+
+@dataclass(frozen=True)
+class LintRule:
+    """One mechanical check of a prompt, under an evaluator criterion."""
+
+    criterion: str
+    name: str
+    check: Callable[[_Prompt], bool]
+    recommendation: str
+
+
+# The evaluator's criteria, each scored by the share of its rules that pass.
+RULES: Tuple[LintRule, ...] = (
+    LintRule(
+        "Clarity & Specificity",
+        "role",
+        lambda p: (
+            p.has_heading(
+                "role", "objective", "purpose", "rol", "objetivo", "propósito"
+            )
+            or re.search(r"\byou are\b|\beres\b|\bactúa como\b", p.text[:300].lower())
+            is not None
+        ),
+        "Open with a role and objective section that says who the agent is and what it must achieve.",
+    ),
+    LintRule(
+        "Clarity & Specificity",
+        "length",
+        lambda p: 80 <= p.words <= 3000,
+        "Keep the prompt between 80 and 3000 words: detailed enough to guide the agent, short enough to follow.",
+    ),
+    LintRule(
+        "Clarity & Specificity",
+        "vague_wording",
+        lambda p: len(_VAGUE.findall(p.text)) <= 2,
+        "Replace vague wording (etc., something, try to, as needed) with concrete instructions.",
+    ),
+    LintRule(
+        "Instruction Following",
+        "instructions_section",
+        lambda p: p.has_heading(
+            "instruction",
+            "rule",
+            "guideline",
+            "requirement",
+            "instruc",
+            "regla",
+            "pauta",
+            "directriz",
+            "directrices",
+            "requisito",
+        ),
+        "Add an Instructions section that lists the rules the agent must follow.",
+    ),
+    LintRule(
+        "Instruction Following",
+        "list_instructions",
+        lambda p: p.list_items >= 3,
+        "Write the instructions as a list of short, literal items.",
+    ),
+    LintRule(
+        "Instruction Following",
+        "directives",
+        lambda p: len(_DIRECTIVE.findall(p.text)) >= 2,
+        "State hard requirements explicitly with must, always, never or do not.",
+    ),
+    LintRule(
+        "Persistence & Completion",
+        "persistence",
+        lambda p: _PERSISTENCE.search(p.text) is not None,
+        "Tell the agent to keep going until the task is completely resolved before ending its turn.",
+    ),
+    LintRule(
+        "Tool Usage",
+        "tools",
+        lambda p: _TOOLS.search(p.text) is not None,
+        "Say which tools the agent has and when to use them.",
+    ),
+    LintRule(
+        "Tool Usage",
+        "no_guessing",
+        lambda p: _NO_GUESSING.search(p.text) is not None,
+        "Tell the agent to use its tools to gather information instead of guessing.",
+    ),
+    LintRule(
+        "Examples & Planning",
+        "examples",
+        lambda p: (
+            p.has_heading("example", "ejemplo") or _EXAMPLE.search(p.text) is not None
+        ),
+        "Add at least one example of a request and the expected behaviour.",
+    ),
+    LintRule(
+        "Examples & Planning",
+        "planning",
+        lambda p: _PLANNING.search(p.text) is not None or p.numbered_items >= 3,
+        "Ask the agent to plan before acting, or give it numbered workflow steps.",
+    ),
+    LintRule(
+        "Best Practices Compliance",
+        "sections",
+        lambda p: len(p.headings) >= 4,
+        "Structure the prompt in sections (role, instructions, workflow, examples, output format).",
+    ),
+    LintRule(
+        "Best Practices Compliance",
+        "workflow_section",
+        lambda p: p.has_heading(
+            "workflow",
+            "step",
+            "process",
+            "reasoning",
+            "plan",
+            "flujo",
+            "paso",
+            "proceso",
+            "razonamiento",
+        ),
+        "Add a workflow or reasoning steps section.",
+    ),
+    LintRule(
+        "Best Practices Compliance",
+        "closed_code_fences",
+        lambda p: p.text.count("```") % 2 == 0,
+        "Close every code fence; an open fence usually means the prompt was truncated.",
+    ),
+    LintRule(
+        "Output Format",
+        "output_section",
+        lambda p: p.has_heading("output", "format", "response", "salida", "respuesta"),
+        "Add an Output Format section.",
+    ),
+    LintRule(
+        "Output Format",
+        "output_spec",
+        lambda p: _OUTPUT_SPEC.search(p.text) is not None,
+        "Specify the shape of the answer (e.g. markdown sections, a JSON object, a table).",
+    ),
+)
+
+
+@dataclass
+class LintReport:
+    """Rule results of one prompt, scored like the evaluator (0 to 10)."""
+
+    results: List[Tuple[LintRule, bool]] = field(default_factory=list)
+
+    @property
+    def passed(self) -> List[LintRule]:
+        return [rule for rule, passed in self.results if passed]
+
+    @property
+    def failed(self) -> List[LintRule]:
+        return [rule for rule, passed in self.results if not passed]
+
+    @property
+    def scores(self) -> Dict[str, float]:
+        totals: Dict[str, List[int]] = {}
+        for rule, passed in self.results:
+            counts = totals.setdefault(rule.criterion, [0, 0])
+            counts[0] += int(passed)
+            counts[1] += 1
+        return {
+            criterion: round(10 * passed / total, 1)
+            for criterion, (passed, total) in totals.items()
+        }
+
+    @property
+    def score(self) -> float:
+        scores = self.scores
+        return round(sum(scores.values()) / len(scores), 2) if scores else 0.0
+
+    def findings(self) -> Dict[str, List[str]]:
+        """The checks that passed and the fixes for those that failed."""
+        return {
+            "passed": [f"{r.criterion}: {r.name}" for r in self.passed],
+            "failed": [f"{r.criterion}: {r.recommendation}" for r in self.failed],
+        }
+
+    def to_evaluation(self) -> PromptEvaluation:
+        feedback: Dict[str, List[str]] = {}
+        for rule in self.failed:
+            feedback.setdefault(rule.criterion, []).append(rule.recommendation)
+        scores = self.scores
+        return PromptEvaluation(
+            evaluation={
+                criterion: " ".join(feedback.get(criterion, []))
+                or "Passes every static check."
+                for criterion in scores
+            },
+            scores=scores,
+            overall_score=self.score,
+            recommendations=" ".join(r.recommendation for r in self.failed)
+            or "Every static check passes; tighten the wording and make the examples "
+            "specific to the topic.",
+        )
+
+
+def lint_prompt(prompt: str, rules: Iterable[LintRule] = RULES) -> LintReport:
+    """Checks a prompt against the rules in a few milliseconds, without a model."""
+    parsed = _Prompt.parse(prompt)
+    return LintReport(results=[(rule, rule.check(parsed)) for rule in rules])
+
+
+def _prompt_files(path: str, pattern: str) -> Iterator[str]:
+    if not os.path.isdir(path):
+        yield path
+        return
+    for directory, subdirectories, names in os.walk(path):
+        subdirectories.sort()
+        for name in sorted(names):
+            if name.endswith(pattern):
+                yield os.path.join(directory, name)
+
+
+def scan(
+    paths: Iterable[str] = ("prompt",),
+    pattern: str = ".md",
+    on_error: Optional[Callable[[str, Exception], None]] = None,
+) -> Iterator[Tuple[str, LintReport]]:
+    """Lints every prompt file under ``paths`` (files or directories), in name order.
+
+    Directories are searched recursively. A file that cannot be read or is not
+    UTF-8 is passed to ``on_error`` (by default, logged) and skipped.
+    """
+    for path in paths:
+        for file_path in _prompt_files(path, pattern):
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    text = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                if on_error is None:
+                    logger.warning(f"Could not lint {file_path}: {e}")
+                else:
+                    on_error(file_path, e)
+                continue
+            yield file_path, lint_prompt(text)
+
+
+@dataclass
+class LintPolicy:
+    """How the workflow uses the linter in Phase 2.
+
+    A prompt whose lint score reaches ``skip_threshold`` is not sent to the
+    evaluator: its lint report becomes the evaluation. Otherwise, with
+    ``hints``, the lint findings are sent along so the evaluator can focus on
+    what the static checks cannot judge.
+    """
+
+    skip_threshold: Optional[float] = 9.0
+    hints: bool = True
+
+    def skips(self, report: LintReport) -> bool:
+        return self.skip_threshold is not None and report.score >= self.skip_threshold
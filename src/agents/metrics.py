@@ -0,0 +1,371 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from agno.run.response import RunResponse
+
+from .budget import ContextUsage
+
+# Upper bounds (seconds) of the phase wall time histogram buckets.
+PHASE_SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+@dataclass
+class ToolCallMetrics:
+    """Call count and total duration of one tool within a phase."""
+
+    calls: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class TierMetrics:
+    """Calls, wall time and escalations of one cascade tier within a phase."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    escalations: int = 0
+
+
+@dataclass
+class PhaseMetrics:
+    """Structured metrics for one workflow phase."""
+
+    phase: str
+    wall_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    model_turns: int = 0
+    # Estimated input size of the phase's agent calls, before and after the
+    # context budget compacted them.
+    context_tokens_before: int = 0
+    context_tokens: int = 0
+    tool_calls: Dict[str, ToolCallMetrics] = field(default_factory=dict)
+    # Cascade tiers tried in this phase, by model ID.
+    tiers: Dict[str, TierMetrics] = field(default_factory=dict)
+    # "hit" or "miss" for cache lookups; None when the cache was bypassed.
+    cache: Optional[str] = None
+    profile: Optional[str] = None
+
+    def add_agent_run(self, response: Optional[RunResponse]):
+        """Adds the token usage, model turns and tool calls of one agent run."""
+        if response is None:
+            return
+        # Agent metrics hold one entry per assistant message, i.e. per model turn.
+        agent_metrics = response.metrics or {}
+        self.input_tokens += sum(agent_metrics.get("input_tokens", []))
+        self.output_tokens += sum(agent_metrics.get("output_tokens", []))
+        self.model_turns += len(agent_metrics.get("input_tokens", []))
+        for tool in response.tools or []:
+            name = tool.get("tool_name") or "unknown"
+            tool_metrics = self.tool_calls.setdefault(name, ToolCallMetrics())
+            tool_metrics.calls += 1
+            tool_metrics.seconds += _tool_seconds(tool.get("metrics"))
+
+    def add_tier(self, model_id: str, seconds: float, escalated: bool):
+        """Adds one cascade tier call and whether it escalated to the next tier."""
+        tier_metrics = self.tiers.setdefault(model_id, TierMetrics())
+        tier_metrics.calls += 1
+        tier_metrics.seconds += seconds
+        tier_metrics.escalations += int(escalated)
+
+    def add_context(self, usage: ContextUsage):
+        """Adds the estimated input size of one agent call."""
+        self.context_tokens_before += usage.before
+        self.context_tokens += usage.after
+
+
+def _tool_seconds(metrics: Any) -> float:
+    if isinstance(metrics, dict):
+        return metrics.get("time") or 0.0
+    return getattr(metrics, "time", None) or 0.0
+
+
+@dataclass
+class RunMetrics:
+    """Per-phase metrics of one workflow run, plus the session write."""
+
+    run_id: Optional[str]
+    session_id: Optional[str]
+    topic: str
+    started_at: float = field(default_factory=time.time)
+    phases: Dict[str, PhaseMetrics] = field(default_factory=dict)
+    storage_seconds: float = 0.0
+    # Evaluate/improve rounds and why they stopped, in convergence mode.
+    rounds: int = 0
+    stop_reason: Optional[str] = None
+    # Lint score of the initial prompt, and whether it replaced the evaluator.
+    lint_score: Optional[float] = None
+    lint_skipped: bool = False
+
+    def phase(self, name: str) -> PhaseMetrics:
+        """Returns the metrics of phase ``name``, creating them on first use."""
+        if name not in self.phases:
+            self.phases[name] = PhaseMetrics(phase=name)
+        return self.phases[name]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def write_jsonl(path: str, run_metrics: RunMetrics):
+    """Appends one run's metrics as a JSON line."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run_metrics.to_dict(), ensure_ascii=False) + "\n")
+
+
+def _labels(**labels: str) -> str:
+    escaped = (
+        name
+        + '="'
+        + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class MetricsRegistry:
+    """Process-wide aggregate of run metrics, rendered in Prometheus text format."""
+
+    def __init__(self, buckets: Tuple[float, ...] = PHASE_SECONDS_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.lint_skips = 0
+        self.storage_seconds = 0.0
+        self.phase_seconds: Dict[str, float] = defaultdict(float)
+        self.phase_count: Dict[str, int] = defaultdict(int)
+        self.phase_buckets: Dict[str, List[int]] = defaultdict(
+            lambda: [0] * len(self.buckets)
+        )
+        self.tokens: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.model_turns: Dict[str, int] = defaultdict(int)
+        self.tool_calls: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.tool_seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.cache: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.context_tokens: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.tier_calls: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.tier_seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.tier_escalations: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def observe(self, run_metrics: RunMetrics):
+        """Adds a finished run to the aggregates."""
+        with self._lock:
+            self.runs += 1
+            self.lint_skips += int(run_metrics.lint_skipped)
+            self.storage_seconds += run_metrics.storage_seconds
+            for name, phase in run_metrics.phases.items():
+                if phase.model_turns:
+                    self.phase_seconds[name] += phase.wall_seconds
+                    self.phase_count[name] += 1
+                    counts = self.phase_buckets[name]
+                    for index, bound in enumerate(self.buckets):
+                        if phase.wall_seconds <= bound:
+                            counts[index] += 1
+                self.tokens[(name, "input")] += phase.input_tokens
+                self.tokens[(name, "output")] += phase.output_tokens
+                self.model_turns[name] += phase.model_turns
+                self.context_tokens[(name, "before")] += phase.context_tokens_before
+                self.context_tokens[(name, "after")] += phase.context_tokens
+                for tool, tool_metrics in phase.tool_calls.items():
+                    self.tool_calls[(name, tool)] += tool_metrics.calls
+                    self.tool_seconds[(name, tool)] += tool_metrics.seconds
+                for model_id, tier_metrics in phase.tiers.items():
+                    self.tier_calls[(name, model_id)] += tier_metrics.calls
+                    self.tier_seconds[(name, model_id)] += tier_metrics.seconds
+                    self.tier_escalations[(name, model_id)] += tier_metrics.escalations
+                if phase.cache is not None:
+                    self.cache[(name, phase.cache)] += 1
+
+    def prometheus_text(self) -> str:
+        """Renders the aggregates in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            metric("promptgen_runs_total", "counter", "Completed workflow runs.")
+            lines.append(f"promptgen_runs_total {self.runs}")
+
+            metric(
+                "promptgen_phase_seconds",
+                "histogram",
+                "Wall time of phases that called a model.",
+            )
+            for phase in sorted(self.phase_count):
+                for bound, count in zip(self.buckets, self.phase_buckets[phase]):
+                    labels = _labels(phase=phase, le=f"{bound:g}")
+                    lines.append(f"promptgen_phase_seconds_bucket{labels} {count}")
+                labels = _labels(phase=phase, le="+Inf")
+                lines.append(
+                    f"promptgen_phase_seconds_bucket{labels} {self.phase_count[phase]}"
+                )
+                labels = _labels(phase=phase)
+                lines.append(
+                    f"promptgen_phase_seconds_sum{labels} {self.phase_seconds[phase]}"
+                )
+                lines.append(
+                    f"promptgen_phase_seconds_count{labels} {self.phase_count[phase]}"
+                )
+
+            metric("promptgen_tokens_total", "counter", "Model tokens per phase.")
+            for (phase, direction), value in sorted(self.tokens.items()):
+                labels = _labels(phase=phase, direction=direction)
+                lines.append(f"promptgen_tokens_total{labels} {value}")
+
+            metric(
+                "promptgen_context_tokens_total",
+                "counter",
+                "Estimated agent input tokens before and after budgeting.",
+            )
+            for (phase, stage), value in sorted(self.context_tokens.items()):
+                labels = _labels(phase=phase, stage=stage)
+                lines.append(f"promptgen_context_tokens_total{labels} {value}")
+
+            metric("promptgen_model_turns_total", "counter", "Model turns per phase.")
+            for phase, value in sorted(self.model_turns.items()):
+                lines.append(
+                    f"promptgen_model_turns_total{_labels(phase=phase)} {value}"
+                )
+
+            metric("promptgen_tool_calls_total", "counter", "FileSystemTools calls.")
+            for (phase, tool), value in sorted(self.tool_calls.items()):
+                labels = _labels(phase=phase, tool=tool)
+                lines.append(f"promptgen_tool_calls_total{labels} {value}")
+
+            metric(
+                "promptgen_tool_seconds_total", "counter", "Time spent in tool calls."
+            )
+            for (phase, tool), value in sorted(self.tool_seconds.items()):
+                labels = _labels(phase=phase, tool=tool)
+                lines.append(f"promptgen_tool_seconds_total{labels} {value}")
+
+            metric("promptgen_cache_lookups_total", "counter", "Phase cache lookups.")
+            for (phase, result), value in sorted(self.cache.items()):
+                labels = _labels(phase=phase, result=result)
+                lines.append(f"promptgen_cache_lookups_total{labels} {value}")
+
+            metric("promptgen_tier_calls_total", "counter", "Model cascade tier calls.")
+            for (phase, model_id), value in sorted(self.tier_calls.items()):
+                labels = _labels(phase=phase, model=model_id)
+                lines.append(f"promptgen_tier_calls_total{labels} {value}")
+
+            metric(
+                "promptgen_tier_seconds_total",
+                "counter",
+                "Wall time of model cascade tier calls.",
+            )
+            for (phase, model_id), value in sorted(self.tier_seconds.items()):
+                labels = _labels(phase=phase, model=model_id)
+                lines.append(f"promptgen_tier_seconds_total{labels} {value}")
+
+            metric(
+                "promptgen_tier_escalations_total",
+                "counter",
+                "Model cascade tier results escalated to the next tier.",
+            )
+            for (phase, model_id), value in sorted(self.tier_escalations.items()):
+                labels = _labels(phase=phase, model=model_id)
+                lines.append(f"promptgen_tier_escalations_total{labels} {value}")
+
+            metric(
+                "promptgen_lint_skips_total",
+                "counter",
+                "Evaluations replaced by the static prompt linter.",
+            )
+            lines.append(f"promptgen_lint_skips_total {self.lint_skips}")
+
+            metric(
+                "promptgen_storage_seconds_total",
+                "counter",
+                "Time spent writing workflow sessions to storage.",
+            )
+            lines.append(f"promptgen_storage_seconds_total {self.storage_seconds}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Writes the Prometheus text to ``path`` atomically (e.g. for node_exporter)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
+
+
+_default_registry: Optional[MetricsRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry() -> MetricsRegistry:
+    """Returns the metrics registry shared by every workflow in this process."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = MetricsRegistry()
+        return _default_registry
+
+
+class SamplingProfiler:
+    """Low-overhead sampling profiler for slow phases.
+
+    A background thread snapshots every other thread's Python stack each
+    ``interval`` seconds and counts them as folded stacks, the input format of
+    flamegraph.pl and speedscope. Threads of concurrent workflows are sampled
+    too, so profile one run at a time for a clean picture.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(
+            target=self._sample, name="promptgen-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.samples
+
+    def write_folded(self, path: str):
+        """Writes the samples as folded stacks (``frame;frame;frame count``)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                    )
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import count
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from agno.models.base import Model
+from agno.models.message import Message
+from agno.models.response import ModelResponse
+
+from .budget import estimate_tokens
+
+DEFAULT_RESPONSE = """\
+# Role and Objective
+
+You are a meticulous assistant that completes the user's task end to end.
+
+# Instructions
+
+- Keep going until the task is completely resolved before ending your turn.
+- Use your tools to gather information instead of guessing.
+- Plan before each tool call and reflect on the outcome afterwards.
+
+# Workflow
+
+1. Analyze the request and list the required steps.
+2. Execute each step, verifying intermediate results.
+3. Summarize the outcome for the user.
+
+# Example
+
+User: "Summarize the attached report." You read the file, outline its sections
+and return a five-bullet summary.
+
+# Output Format
+
+Respond in markdown with a short summary followed by the detailed result.
+"""
+
+DEFAULT_EVALUATION = {
+    "evaluation": {
+        "Clarity & Specificity": "Clear role and objective.",
+        "Instruction Following": "Explicit, literal instructions.",
+        "Persistence & Completion": "Includes a persistence reminder.",
+        "Tool Usage": "Encourages tool use over guessing.",
+        "Examples & Planning": "One short example and planning steps.",
+        "Best Practices Compliance": "Follows the agentic prompt structure.",
+        "Output Format": "Output format is specified.",
+    },
+    "scores": {
+        "Clarity & Specificity": 8,
+        "Instruction Following": 8,
+        "Persistence & Completion": 9,
+        "Tool Usage": 7,
+        "Examples & Planning": 6,
+        "Best Practices Compliance": 8,
+        "Output Format": 8,
+    },
+    "overall_score": 7.7,
+    "recommendations": "Add a second example and describe error handling for tools.",
+}
+
+# The tool round-trips Phase 3 asks the generator to make when saving a prompt.
+DEFAULT_SAVE_TOOL_CALLS: List[Dict[str, Any]] = [
+    {"name": "list_files", "arguments": {"path": "."}},
+    {"name": "create_folder", "arguments": {"path": "prompt"}},
+    {
+        "name": "create_file",
+        "arguments": {"path": "prompt/mock-prompt-{date}.md", "content": "{content}"},
+    },
+]
+
+
+@dataclass
+class MockModel(Model):
+    """Offline stand-in for an OpenAI model with configurable timing and outputs.
+
+    Responses cycle through ``responses``; when the agent requests JSON output the
+    model returns ``json_response`` instead. If the latest user message contains
+    ``tool_trigger``, the model first issues ``tool_calls`` one per turn, exactly
+    like a real model doing tool round-trips, and only then answers.
+    """
+
+    id: str = "mock"
+    name: str = "MockModel"
+    provider: str = "Mock"
+    # Seconds before the first token and generation speed afterwards.
+    latency: float = 0.2
+    tokens_per_second: float = 200.0
+    responses: List[str] = field(default_factory=lambda: [DEFAULT_RESPONSE])
+    json_response: Dict[str, Any] = field(
+        default_factory=lambda: dict(DEFAULT_EVALUATION)
+    )
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+    tool_trigger: Optional[str] = "create_file"
+
+    def __post_init__(self):
+        super().__post_init__()
+        self._response_index = count()
+        self._tool_call_ids = count(1)
+
+    def __deepcopy__(self, memo):
+        copied = super().__deepcopy__(memo)
+        copied._response_index = count()
+        copied._tool_call_ids = count(1)
+        return copied
+
+    # --- Response planning ---
+    def _next_response(self, messages: List[Message]) -> ModelResponse:
+        pending = self._pending_tool_call(messages)
+        if pending is not None:
+            return ModelResponse(
+                role="assistant",
+                tool_calls=[pending],
+                response_usage=self._usage(messages, json.dumps(pending)),
+            )
+        if isinstance(self.response_format, dict):
+            content = json.dumps(self.json_response)
+        else:
+            content = self.responses[next(self._response_index) % len(self.responses)]
+        return ModelResponse(
+            role="assistant",
+            content=content,
+            response_usage=self._usage(messages, content),
+        )
+
+    def _pending_tool_call(self, messages: List[Message]) -> Optional[Dict[str, Any]]:
+        """Returns the next scripted tool call for the current turn, if any."""
+        if not self.tool_calls or self._functions is None:
+            return None
+        user_index = max(
+            (i for i, m in enumerate(messages) if m.role == "user"), default=-1
+        )
+        if user_index < 0:
+            return None
+        trigger_text = messages[user_index].get_content_string()
+        if self.tool_trigger is not None and self.tool_trigger not in trigger_text:
+            return None
+        turns_taken = sum(
+            1 for m in messages[user_index + 1 :] if m.role == "assistant"
+        )
+        if turns_taken >= len(self.tool_calls):
+            return None
+        script = self.tool_calls[turns_taken]
+        arguments = {
+            name: value.format(content=self.responses[0], date=date.today().isoformat())
+            if isinstance(value, str)
+            else value
+            for name, value in script.get("arguments", {}).items()
+        }
+        return {
+            "id": f"call_mock_{next(self._tool_call_ids)}",
+            "type": "function",
+            "function": {"name": script["name"], "arguments": json.dumps(arguments)},
+        }
+
+    def _usage(self, messages: List[Message], output: str) -> Dict[str, int]:
+        input_tokens = sum(estimate_tokens(m.get_content_string()) for m in messages)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": estimate_tokens(output),
+        }
+
+    def _generation_time(self, response: ModelResponse) -> float:
+        output_tokens = (response.response_usage or {}).get("output_tokens", 0)
+        return output_tokens / self.tokens_per_second if self.tokens_per_second else 0
+
+    def _deltas(self, response: ModelResponse) -> Iterator[ModelResponse]:
+        """Splits a planned response into word-sized streaming deltas."""
+        if response.tool_calls:
+            yield response
+            return
+        words = (response.content or "").split(" ")
+        for index, word in enumerate(words):
+            yield ModelResponse(
+                role="assistant" if index == 0 else None,
+                content=word if index == len(words) - 1 else word + " ",
+            )
+        yield ModelResponse(response_usage=response.response_usage)
+
+    def _delta_delay(self, delta: ModelResponse) -> float:
+        if not self.tokens_per_second or delta.content is None:
+            return 0.0
+        return estimate_tokens(delta.content) / self.tokens_per_second
+
+    # --- Model interface ---
+    def invoke(self, messages: List[Message]) -> ModelResponse:
+        response = self._next_response(messages)
+        time.sleep(self.latency + self._generation_time(response))
+        return response
+
+    async def ainvoke(self, messages: List[Message]) -> ModelResponse:
+        response = self._next_response(messages)
+        await asyncio.sleep(self.latency + self._generation_time(response))
+        return response
+
+    def invoke_stream(self, messages: List[Message]) -> Iterator[ModelResponse]:
+        response = self._next_response(messages)
+        time.sleep(self.latency)
+        for delta in self._deltas(response):
+            time.sleep(self._delta_delay(delta))
+            yield delta
+
+    async def ainvoke_stream(
+        self, messages: List[Message]
+    ) -> AsyncIterator[ModelResponse]:
+        response = self._next_response(messages)
+        await asyncio.sleep(self.latency)
+        for delta in self._deltas(response):
+            await asyncio.sleep(self._delta_delay(delta))
+            yield delta
+
+    def parse_provider_response(self, response: ModelResponse) -> ModelResponse:
+        return response
+
+    def parse_provider_response_delta(self, response: ModelResponse) -> ModelResponse:
+        return response
@@ -0,0 +1,192 @@
+import atexit
+import hashlib
+import os
+import queue
+import re
+import stat
+import tempfile
+import threading
+import unicodedata
+from datetime import date
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+from agno.utils.log import logger
+
+from .cache import normalize_topic
+
+if TYPE_CHECKING:
+    from .archive import PromptArchive
+
+_NON_SLUG = re.compile(r"[^a-z0-9]+")
+
+# The process umask, read once: os.umask() can only be read by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# A queued write-behind save: path, topic, content, day and on_saved callback.
+_SaveRequest = Tuple[str, str, str, Optional[date], Optional[Callable[[str], None]]]
+
+
+def prompt_slug(topic: str, max_length: int = 80) -> str:
+    """Folds accents to ASCII and every other run of non-alphanumerics to a dash.
+
+    The first ``max_length`` characters are followed by a short hash of the
+    topic (ignoring case and whitespace, like the phase caches), so topics
+    that fold or truncate to the same text still get distinct slugs.
+    """
+    ascii_topic = (
+        unicodedata.normalize("NFKD", topic).encode("ascii", "ignore").decode("ascii")
+    )
+    slug = _NON_SLUG.sub("-", ascii_topic.lower()).strip("-")
+    digest = hashlib.sha256(normalize_topic(topic).encode("utf-8")).hexdigest()
+    return f"{slug[:max_length].rstrip('-') or 'prompt'}-{digest[:8]}"
+
+
+def prompt_filename(
+    topic: str, day: Optional[date] = None, max_length: int = 80
+) -> str:
+    """Derives a safe markdown filename from a topic and a date.
+
+    E.g. "AI for Space Exploration" on 2024-06-10 becomes
+    ``ai-for-space-exploration-17899cd4-2024-06-10.md``.
+    """
+    return f"{prompt_slug(topic, max_length)}-{(day or date.today()).isoformat()}.md"
+
+
+def atomic_write(path: str, content: str, fsync: bool = True):
+    """Writes ``content`` to ``path`` so readers never see a partial file.
+
+    The content goes to a temporary file in the same directory, is flushed to
+    disk (unless ``fsync`` is False) and then renamed over the destination.
+    The file keeps the destination's permissions, or gets those of a file
+    created with open() if it is new (mkstemp would make it owner-only).
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            os.fchmod(f.fileno(), mode)
+            f.write(content)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class PromptWriter:
+    """Saves final prompts as markdown files in ``directory``.
+
+    With ``write_behind`` the files are written by a background thread and
+    save() returns as soon as the write is queued; pending writes are flushed
+    at interpreter exit or by calling flush().
+
+    With an ``archive``, prompts go to that content-addressed store instead,
+    each distinct body stored once; exporting the archive writes the files.
+    """
+
+    def __init__(
+        self,
+        directory: str = "prompt",
+        write_behind: bool = False,
+        archive: Optional["PromptArchive"] = None,
+    ):
+        self.directory = directory
+        self.write_behind = write_behind
+        self.archive = archive
+        self._queue: "queue.Queue[_SaveRequest]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    def path_for(self, topic: str, day: Optional[date] = None) -> str:
+        """Returns the file a prompt for ``topic`` is saved to."""
+        return os.path.join(self.directory, prompt_filename(topic, day))
+
+    def save(
+        self,
+        topic: str,
+        content: str,
+        day: Optional[date] = None,
+        on_saved: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Saves ``content`` for ``topic`` and returns the file path.
+
+        Args:
+            topic (str): The topic the prompt was generated for.
+            content (str): The final prompt.
+            day (date, optional): The date used in the filename. Defaults to today.
+            on_saved (Callable[[str], None], optional): Called with the path once
+                the file is on disk (with write-behind, from the writer thread).
+
+        Returns:
+            str: The path of the saved (or, with write-behind, queued) file;
+                with an archive, the path the prompt is exported to.
+        """
+        path = self.path_for(topic, day)
+        if self.write_behind:
+            self._ensure_worker()
+            self._queue.put((path, topic, content, day, on_saved))
+        else:
+            self._write(path, topic, content, day)
+            if on_saved is not None:
+                on_saved(path)
+        return path
+
+    def _write(self, path: str, topic: str, content: str, day: Optional[date]):
+        if self.archive is not None:
+            digest = self.archive.put(topic, content, day)
+            logger.info(f"Archived final prompt for {path} as {digest[:12]}")
+        else:
+            atomic_write(path, content)
+            logger.info(f"Saved final prompt to {path}")
+
+    def flush(self):
+        """Blocks until every queued write has been written."""
+        if self._worker is not None:
+            self._queue.join()
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._drain, name="prompt-writer", daemon=True
+                )
+                self._worker.start()
+                atexit.register(self.flush)
+
+    def _drain(self):
+        while True:
+            path, topic, content, day, on_saved = self._queue.get()
+            try:
+                self._write(path, topic, content, day)
+                if on_saved is not None:
+                    on_saved(path)
+            except Exception as e:
+                logger.error(f"Error saving final prompt to {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+_default_writer: Optional[PromptWriter] = None
+_default_writer_lock = threading.Lock()
+
+
+def get_default_writer() -> PromptWriter:
+    """Returns the prompt writer shared by every workflow in this process."""
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = PromptWriter()
+        return _default_writer
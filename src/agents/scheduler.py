@@ -0,0 +1,655 @@
+import asyncio
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from agno.agent import Agent
+from agno.utils.log import logger
+
+T = TypeVar("T")
+
+# Outcomes of one model request, as seen by the concurrency limiter.
+OK, THROTTLED, RETRYABLE, FATAL, CANCELLED = (
+    "ok",
+    "throttled",
+    "retryable",
+    "fatal",
+    "cancelled",
+)
+
+_RETRYABLE_STATUS = {408, 409, 500, 502, 503, 504}
+_RETRYABLE_ERRORS = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "ConnectError",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "RemoteProtocolError",
+}
+
+
+def _error_chain(error: BaseException) -> Iterator[BaseException]:
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def classify_error(error: BaseException) -> str:
+    """Classifies a failed model request as throttled, retryable or fatal.
+
+    Works on the provider errors without importing the OpenAI SDK: agno wraps
+    them in a ModelProviderError that keeps the HTTP status code.
+    """
+    for cause in _error_chain(error):
+        status = getattr(cause, "status_code", None)
+        if status == 429:
+            return THROTTLED
+        if isinstance(status, int) and (status in _RETRYABLE_STATUS or status > 500):
+            return RETRYABLE
+        if isinstance(cause, (TimeoutError, ConnectionError)) or (
+            type(cause).__name__ in _RETRYABLE_ERRORS
+        ):
+            return RETRYABLE
+    return FATAL
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Returns the server's Retry-After delay in seconds, if it sent one."""
+    for cause in _error_chain(error):
+        headers = getattr(getattr(cause, "response", None), "headers", None)
+        if not headers:
+            continue
+        try:
+            if headers.get("retry-after-ms") is not None:
+                return float(headers["retry-after-ms"]) / 1000
+            if headers.get("retry-after") is not None:
+                return float(headers["retry-after"])
+        except ValueError:
+            return None
+    return None
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, holding up to ``capacity``.
+
+    take() reserves tokens immediately and returns how long the caller must
+    wait before using them, so waiters are served in arrival order without
+    polling and the same bucket works for threads and coroutines.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, amount: float) -> "TokenBucket":
+        # Bursts of up to a second's worth (at least one request).
+        return cls(amount / 60.0)
+
+    def take(self, amount: float = 1.0) -> float:
+        """Reserves ``amount`` tokens and returns the seconds to wait for them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+
+class AIMDLimiter:
+    """Concurrency limit that adapts to throttling (additive increase,
+    multiplicative decrease).
+
+    Every successful request raises the limit by ``increase / limit``, i.e. by
+    ``increase`` per window of requests; a throttled request cuts it by the
+    ``decrease`` factor, at most once per ``cooldown`` seconds so one burst of
+    429s counts as a single congestion signal.
+    """
+
+    def __init__(
+        self,
+        initial: int = 32,
+        minimum: int = 1,
+        maximum: int = 256,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+    ):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._changed = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def _try_acquire(self) -> bool:
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+    def acquire(self):
+        with self._changed:
+            while not self._try_acquire():
+                self._changed.wait()
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._changed:
+                if self._try_acquire():
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, outcome: str):
+        with self._changed:
+            self.in_flight -= 1
+            if outcome == OK:
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            elif outcome == THROTTLED:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+            self._changed.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+@dataclass
+class ModelLimits:
+    """Rate limits and concurrency bounds of one model."""
+
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    initial_concurrency: int = 32
+    min_concurrency: int = 1
+    max_concurrency: int = 256
+
+
+@dataclass
+class RetryPolicy:
+    """Retries throttled and transient failures with full-jitter exponential backoff.
+
+    A Retry-After header from the server takes precedence over the backoff.
+    """
+
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    def delay(self, attempt: int, error: BaseException) -> Optional[float]:
+        """Returns the seconds to wait before retrying, or None to give up.
+
+        Args:
+            attempt (int): The number of the failed attempt, from 0.
+            error (BaseException): Why it failed.
+        """
+        if attempt + 1 >= self.max_attempts or classify_error(error) == FATAL:
+            return None
+        backoff = min(self.max_delay, self.base_delay * 2**attempt)
+        hinted = retry_after(error)
+        if hinted is not None:
+            # Spread the retries of a throttled burst over a short window.
+            return min(self.max_delay, hinted) + random.uniform(0, self.base_delay)
+        return random.uniform(0, backoff)
+
+
+@dataclass
+class HedgePolicy:
+    """Sends a duplicate of a non-streamed request that is slower than usual.
+
+    The duplicate starts once the request has run longer than the ``quantile``
+    of the model's recent latencies (and at least ``min_delay`` seconds); the
+    first response wins. Until ``min_samples`` latencies are known, requests
+    are not hedged.
+    """
+
+    quantile: float = 0.95
+    min_delay: float = 1.0
+    min_samples: int = 20
+
+    def delay(self, latencies: List[float]) -> Optional[float]:
+        if len(latencies) < max(2, self.min_samples):
+            return None
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        index = min(98, max(0, round(self.quantile * 100) - 1))
+        return max(self.min_delay, cuts[index])
+
+
+@dataclass
+class ModelStats:
+    """Counters of one model's requests in this process."""
+
+    requests: int = 0
+    throttled: int = 0
+    failed: int = 0
+    retries: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    wait_seconds: float = 0.0
+
+
+class ModelScheduler:
+    """Request and token buckets, adaptive concurrency and latency samples of a model."""
+
+    def __init__(self, model_id: str, limits: ModelLimits):
+        self.model_id = model_id
+        self.limits = limits
+        self.requests = (
+            TokenBucket.per_minute(limits.requests_per_minute)
+            if limits.requests_per_minute
+            else None
+        )
+        self.tokens = (
+            TokenBucket.per_minute(limits.tokens_per_minute)
+            if limits.tokens_per_minute
+            else None
+        )
+        self.limiter = AIMDLimiter(
+            initial=limits.initial_concurrency,
+            minimum=limits.min_concurrency,
+            maximum=limits.max_concurrency,
+        )
+        self.latencies: Deque[float] = deque(maxlen=200)
+        self.stats = ModelStats()
+        self._lock = threading.Lock()
+
+    def latency_samples(self) -> List[float]:
+        with self._lock:
+            return list(self.latencies)
+
+    def _bucket_wait(self, tokens: int) -> float:
+        waits = [0.0]
+        if self.requests is not None:
+            waits.append(self.requests.take())
+        if self.tokens is not None and tokens:
+            waits.append(self.tokens.take(tokens))
+        return max(waits)
+
+    def acquire(self, tokens: int = 0):
+        started = time.perf_counter()
+        delay = self._bucket_wait(tokens)
+        if delay:
+            time.sleep(delay)
+        self.limiter.acquire()
+        self.record(wait_seconds=time.perf_counter() - started)
+
+    async def aacquire(self, tokens: int = 0):
+        started = time.perf_counter()
+        delay = self._bucket_wait(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+        await self.limiter.aacquire()
+        self.record(wait_seconds=time.perf_counter() - started)
+
+    def release(self, outcome: str, seconds: Optional[float] = None):
+        self.limiter.release(outcome)
+        if outcome == OK and seconds is not None:
+            with self._lock:
+                self.latencies.append(seconds)
+        elif outcome == THROTTLED:
+            self.record(throttled=1)
+        elif outcome in (RETRYABLE, FATAL):
+            self.record(failed=1)
+
+    def record(self, **counts: float):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+            if "wait_seconds" in counts:
+                self.stats.requests += 1
+
+
+class Scheduler:
+    """Schedules the workflow's model requests per model.
+
+    Each model (by id) gets a request and a token bucket from its
+    ``ModelLimits`` and an AIMD concurrency limit that halves on throttling
+    and grows back on success. Failed requests are retried per phase with
+    jittered backoff, and non-streamed requests can be hedged.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, ModelLimits]] = None,
+        default_limits: Optional[ModelLimits] = None,
+        retry: Optional[RetryPolicy] = None,
+        phase_retries: Optional[Dict[str, RetryPolicy]] = None,
+        hedge: Optional[HedgePolicy] = None,
+    ):
+        self.limits = dict(limits or {})
+        self.default_limits = default_limits or ModelLimits()
+        self.retry = retry or RetryPolicy()
+        self.phase_retries = dict(phase_retries or {})
+        self.hedge = hedge
+        self._models: Dict[str, ModelScheduler] = {}
+        self._lock = threading.Lock()
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+
+    def model(self, agent: Agent) -> ModelScheduler:
+        model_id = str(agent.model.id)
+        with self._lock:
+            scheduler = self._models.get(model_id)
+            if scheduler is None:
+                scheduler = ModelScheduler(
+                    model_id, self.limits.get(model_id, self.default_limits)
+                )
+                self._models[model_id] = scheduler
+            return scheduler
+
+    def retry_policy(self, phase: str) -> RetryPolicy:
+        return self.phase_retries.get(phase, self.retry)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the request counters and current concurrency limit per model."""
+        with self._lock:
+            models = dict(self._models)
+        return {
+            model_id: {
+                **vars(model.stats),
+                "concurrency_limit": round(model.limiter.limit, 2),
+            }
+            for model_id, model in sorted(models.items())
+        }
+
+    def _retry_delay(
+        self, phase: str, model: ModelScheduler, attempt: int, error: Exception
+    ) -> Optional[float]:
+        delay = self.retry_policy(phase).delay(attempt, error)
+        if delay is not None:
+            model.record(retries=1)
+            logger.warning(
+                f"{phase} request to {model.model_id} failed "
+                f"({classify_error(error)}: {error}); retry {attempt + 1} in {delay:.2f}s"
+            )
+        return delay
+
+    # --- Synchronous requests ---
+    def call(
+        self,
+        phase: str,
+        agent: Agent,
+        request: Callable[[Agent], T],
+        tokens: int = 0,
+        hedge: bool = True,
+    ) -> Tuple[T, Agent]:
+        """Runs ``request(agent)`` under the model's limits, retrying failures.
+
+        A hedged request runs both attempts on copies of ``agent``: the slower
+        one keeps running after the call returns, so it must not share the
+        caller's agent, which the workflow uses again in its next phase.
+
+        Returns:
+            Tuple[T, Agent]: The result and the agent that produced it (a copy
+            of ``agent`` when the request was hedged).
+        """
+        model = self.model(agent)
+        attempt = 0
+        while True:
+            try:
+                return self._hedged(model, agent, request, tokens, hedge)
+            except Exception as e:
+                delay = self._retry_delay(phase, model, attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    def _attempt(
+        self,
+        model: ModelScheduler,
+        agent: Agent,
+        request: Callable[[Agent], T],
+        tokens: int,
+    ) -> Tuple[T, Agent]:
+        model.acquire(tokens)
+        started, outcome = time.perf_counter(), CANCELLED
+        try:
+            result = request(agent)
+            outcome = OK
+            return result, agent
+        except Exception as e:
+            outcome = classify_error(e)
+            raise
+        finally:
+            model.release(outcome, time.perf_counter() - started)
+
+    def _hedged(
+        self,
+        model: ModelScheduler,
+        agent: Agent,
+        request: Callable[[Agent], T],
+        tokens: int,
+        hedge: bool,
+    ) -> Tuple[T, Agent]:
+        delay = (
+            self.hedge.delay(model.latency_samples()) if hedge and self.hedge else None
+        )
+        if delay is None:
+            return self._attempt(model, agent, request, tokens)
+        pool = self._pool()
+        primary = pool.submit(self._attempt, model, agent.deep_copy(), request, tokens)
+        if wait([primary], timeout=delay).done:
+            return primary.result()
+        model.record(hedges=1)
+        backup = pool.submit(self._attempt, model, agent.deep_copy(), request, tokens)
+        # The slower request cannot be cancelled; it finishes in the background.
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        model.record(hedge_wins=1)
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(thread_name_prefix="hedge")
+            return self._hedge_pool
+
+    def stream(
+        self,
+        phase: str,
+        agent: Agent,
+        request: Callable[[Agent], Iterator[T]],
+        tokens: int = 0,
+    ) -> Iterator[T]:
+        """Streams ``request(agent)`` under the model's limits.
+
+        A stream is retried only if it fails before its first chunk.
+        """
+        model = self.model(agent)
+        attempt = 0
+        while True:
+            model.acquire(tokens)
+            started, outcome, streamed = time.perf_counter(), CANCELLED, False
+            try:
+                for chunk in request(agent):
+                    streamed = True
+                    yield chunk
+                outcome = OK
+                return
+            except Exception as e:
+                outcome = classify_error(e)
+                delay = (
+                    None if streamed else self._retry_delay(phase, model, attempt, e)
+                )
+                if delay is None:
+                    raise
+            finally:
+                model.release(outcome, time.perf_counter() - started)
+            time.sleep(delay)
+            attempt += 1
+
+    # --- Asynchronous requests ---
+    async def acall(
+        self,
+        phase: str,
+        agent: Agent,
+        request: Callable[[Agent], Awaitable[T]],
+        tokens: int = 0,
+        hedge: bool = True,
+    ) -> Tuple[T, Agent]:
+        """Async counterpart of call(); the losing hedged request is cancelled.
+
+        As in call(), a hedged request runs both attempts on copies of
+        ``agent``, since the loser only stops at its next await.
+        """
+        model = self.model(agent)
+        attempt = 0
+        while True:
+            try:
+                return await self._ahedged(model, agent, request, tokens, hedge)
+            except Exception as e:
+                delay = self._retry_delay(phase, model, attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _aattempt(
+        self,
+        model: ModelScheduler,
+        agent: Agent,
+        request: Callable[[Agent], Awaitable[T]],
+        tokens: int,
+    ) -> Tuple[T, Agent]:
+        await model.aacquire(tokens)
+        started, outcome = time.perf_counter(), CANCELLED
+        try:
+            result = await request(agent)
+            outcome = OK
+            return result, agent
+        except Exception as e:
+            outcome = classify_error(e)
+            raise
+        finally:
+            model.release(outcome, time.perf_counter() - started)
+
+    async def _ahedged(
+        self,
+        model: ModelScheduler,
+        agent: Agent,
+        request: Callable[[Agent], Awaitable[T]],
+        tokens: int,
+        hedge: bool,
+    ) -> Tuple[T, Agent]:
+        delay = (
+            self.hedge.delay(model.latency_samples()) if hedge and self.hedge else None
+        )
+        if delay is None:
+            return await self._aattempt(model, agent, request, tokens)
+        primary = asyncio.ensure_future(
+            self._aattempt(model, agent.deep_copy(), request, tokens)
+        )
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            model.record(hedges=1)
+            backup = asyncio.ensure_future(
+                self._aattempt(model, agent.deep_copy(), request, tokens)
+            )
+            pending.add(backup)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            model.record(hedge_wins=1)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def astream(
+        self,
+        phase: str,
+        agent: Agent,
+        request: Callable[[Agent], Awaitable[AsyncIterator[T]]],
+        tokens: int = 0,
+    ) -> AsyncIterator[T]:
+        """Async counterpart of stream()."""
+        model = self.model(agent)
+        attempt = 0
+        while True:
+            await model.aacquire(tokens)
+            started, outcome, streamed = time.perf_counter(), CANCELLED, False
+            try:
+                async for chunk in await request(agent):
+                    streamed = True
+                    yield chunk
+                outcome = OK
+                return
+            except Exception as e:
+                outcome = classify_error(e)
+                delay = (
+                    None if streamed else self._retry_delay(phase, model, attempt, e)
+                )
+                if delay is None:
+                    raise
+            finally:
+                model.release(outcome, time.perf_counter() - started)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+_default_scheduler: Optional[Scheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler() -> Scheduler:
+    """Returns the scheduler shared by every workflow in this process."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = Scheduler()
+        return _default_scheduler
@@ -0,0 +1,334 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from agno.storage.base import Storage
+from agno.utils.log import logger
+from agno.workflow import RunEvent
+
+from .agents import PromptGeneration
+from .batch import topic_session_id
+from .cache import normalize_topic
+from .checkpoints import FAILED
+from .convergence import ConvergencePolicy
+from .metrics import get_default_registry
+
+MAX_BODY_BYTES = 1 << 20
+
+
+class ServerBusy(Exception):
+    """Raised when the run queue is full; the request should be retried later."""
+
+
+@dataclass
+class GenerationRequest:
+    """One /generate request; identical requests share a single run."""
+
+    topic: str
+    use_cache: bool = True
+    stream: bool = False
+    candidates: int = 1
+    finalists: int = 1
+    convergence: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_json(cls, body: bytes) -> "GenerationRequest":
+        data = json.loads(body or b"{}")
+        if not isinstance(data, dict) or not str(data.get("topic", "")).strip():
+            raise ValueError("The request body must be a JSON object with a 'topic'")
+        request = cls(**data)
+        if request.convergence is not None:
+            # Validates the fields before the run starts.
+            ConvergencePolicy(**request.convergence)
+        return request
+
+    @property
+    def key(self) -> Tuple:
+        return (
+            normalize_topic(self.topic),
+            self.use_cache,
+            self.stream,
+            self.candidates,
+            self.finalists,
+            json.dumps(self.convergence, sort_keys=True),
+        )
+
+
+@dataclass
+class Flight:
+    """One in-flight run whose events fan out to every waiting client.
+
+    Events are kept for the lifetime of the run, so clients that join late
+    replay the phases already finished and slow clients never hold up the run.
+    """
+
+    request: GenerationRequest
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    done: bool = False
+    waiters: int = 0
+    _changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+    async def publish(self, event: Dict[str, Any], last: bool = False):
+        async with self._changed:
+            self.events.append(event)
+            self.done = self.done or last
+            self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        index = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: index < len(self.events) or self.done
+                )
+                pending = self.events[index:]
+                finished = self.done
+            for event in pending:
+                yield event
+            index += len(pending)
+            if finished and index >= len(self.events):
+                return
+
+
+class PromptServer:
+    """Serves PromptGeneration to local clients over HTTP or a Unix socket.
+
+    The process keeps the session storage, the pooled model clients and the
+    caches warm across requests, and each of the ``max_concurrency`` slots
+    reuses one workflow, with its agents, from request to request. Identical
+    concurrent requests are coalesced
+    into one run. At most ``max_concurrency`` runs execute at once and up to
+    ``max_queue`` more wait for a slot; beyond that, requests are rejected
+    with 503 and a Retry-After header.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_queue: int = 32,
+        storage: Optional[Storage] = None,
+        **workflow_kwargs: Any,
+    ):
+        if storage is None:
+            from .storage import default_storage
+
+            storage = default_storage()
+        self.storage = storage
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.workflow_kwargs = workflow_kwargs
+        self._flights: Dict[Tuple, Flight] = {}
+        # Idle workflows; at most one per slot, since runs hold a slot.
+        self._workflows: List[PromptGeneration] = []
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._running = 0
+        self.coalesced = 0
+
+    # --- Runs ---
+    def submit(self, request: GenerationRequest) -> Tuple[Flight, bool]:
+        """Joins the in-flight run for ``request`` or starts a new one.
+
+        Returns:
+            Tuple[Flight, bool]: The run and whether an existing one was joined.
+
+        Raises:
+            ServerBusy: If a new run would exceed the queue bound.
+        """
+        flight = self._flights.get(request.key)
+        if flight is not None:
+            self.coalesced += 1
+            flight.waiters += 1
+            return flight, True
+        if len(self._flights) >= self.max_concurrency + self.max_queue:
+            raise ServerBusy(f"{len(self._flights)} runs in flight or queued")
+        flight = Flight(request=request, waiters=1)
+        self._flights[request.key] = flight
+        asyncio.ensure_future(self._run(flight))
+        return flight, False
+
+    async def _run(self, flight: Flight):
+        request = flight.request
+        final: Dict[str, Any] = {"event": "Done", "status": "ok"}
+        try:
+            async with self._slots:
+                self._running += 1
+                try:
+                    await self._run_workflow(flight, final)
+                finally:
+                    self._running -= 1
+        except Exception as e:
+            logger.error(f"Server run failed for topic '{request.topic}': {e}")
+            final.update(status="error", error=str(e))
+        finally:
+            # New requests start a fresh run (served from the caches) from now on.
+            self._flights.pop(request.key, None)
+            await flight.publish(final, last=True)
+
+    def _workflow(self, session_id: str) -> PromptGeneration:
+        if self._workflows:
+            workflow = self._workflows.pop()
+            workflow.switch_session(session_id)
+            return workflow
+        return PromptGeneration(
+            session_id=session_id, storage=self.storage, **self.workflow_kwargs
+        )
+
+    async def _run_workflow(self, flight: Flight, final: Dict[str, Any]):
+        request = flight.request
+        workflow = self._workflow(topic_session_id(request.topic))
+        convergence = (
+            ConvergencePolicy(**request.convergence)
+            if request.convergence is not None
+            else None
+        )
+        try:
+            async for response in workflow.arun(
+                topic=request.topic,
+                use_cache=request.use_cache,
+                stream=request.stream,
+                candidates=request.candidates,
+                finalists=request.finalists,
+                convergence=convergence,
+            ):
+                if response.event == RunEvent.run_error:
+                    final.update(status="error", error=response.content)
+                # Streamed deltas carry the plain string "RunResponse" as their event.
+                event = getattr(response.event, "value", response.event)
+                await flight.publish({"event": str(event), "content": response.content})
+        except Exception:
+            # The run never finished, so its checkpoint would stay running (and
+            # be skipped by resume while this process lives); fail it instead.
+            if workflow.checkpoint_store is not None:
+                await asyncio.to_thread(
+                    workflow.checkpoint_store.finish_run, workflow.run_id, FAILED
+                )
+            raise
+        final["final_prompt"] = await asyncio.to_thread(
+            workflow.get_cached_improved_prompt, request.topic
+        )
+        if workflow.run_metrics is not None:
+            final["metrics"] = workflow.run_metrics.to_dict()
+        # Only a workflow whose run ended normally goes back to the pool.
+        self._workflows.append(workflow)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self._running,
+            "queued": len(self._flights) - self._running,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "coalesced": self.coalesced,
+        }
+
+    # --- HTTP ---
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves one HTTP/1.1 request, then closes the connection."""
+        try:
+            method, path, body = await _read_request(reader)
+            if method == "GET" and path == "/health":
+                await _respond(writer, 200, {"status": "ok", **self.stats()})
+            elif method == "GET" and path == "/metrics":
+                text = get_default_registry().prometheus_text()
+                await _respond(writer, 200, text, "text/plain; version=0.0.4")
+            elif method == "POST" and path == "/generate":
+                await self._generate(writer, GenerationRequest.from_json(body))
+            else:
+                await _respond(writer, 404, {"error": f"No route for {method} {path}"})
+        except ServerBusy as e:
+            await _respond(
+                writer,
+                503,
+                {"error": f"Server busy: {e}"},
+                headers={"Retry-After": "1"},
+            )
+        except (ValueError, TypeError) as e:
+            await _respond(writer, 400, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _generate(self, writer: asyncio.StreamWriter, request: GenerationRequest):
+        flight, joined = self.submit(request)
+        try:
+            writer.write(
+                _head(200, "application/x-ndjson", {"X-Coalesced": str(joined).lower()})
+            )
+            async for event in flight.subscribe():
+                writer.write(json.dumps(event, ensure_ascii=False).encode() + b"\n")
+                # Waits for slow clients here; the run itself never blocks on them.
+                await writer.drain()
+        finally:
+            flight.waiters -= 1
+
+    async def serve(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        socket_path: Optional[str] = None,
+    ):
+        """Serves until cancelled, on ``socket_path`` if given, else ``host:port``."""
+        if socket_path is not None:
+            server = await asyncio.start_unix_server(self.handle, path=socket_path)
+            address = socket_path
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            address = f"http://{host}:{port}"
+        logger.info(
+            f"Serving PromptGeneration on {address} ({self.max_concurrency} concurrent "
+            f"runs, {self.max_queue} queued)"
+        )
+        async with server:
+            await server.serve_forever()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    request_line = (await reader.readline()).decode("latin-1").split()
+    if len(request_line) < 2:
+        raise ValueError("Malformed request line")
+    headers: Dict[str, str] = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length > MAX_BODY_BYTES:
+        raise ValueError(f"Request body over {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return request_line[0].upper(), request_line[1].split("?", 1)[0], body
+
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    503: "Service Unavailable",
+}
+
+
+def _head(
+    status: int, content_type: str, headers: Optional[Dict[str, str]] = None
+) -> bytes:
+    # No Content-Length: the body ends when the connection closes.
+    lines = [
+        f"HTTP/1.1 {status} {_REASONS[status]}",
+        f"Content-Type: {content_type}",
+        "Connection: close",
+    ]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _respond(
+    writer: asyncio.StreamWriter,
+    status: int,
+    body: Any,
+    content_type: str = "application/json",
+    headers: Optional[Dict[str, str]] = None,
+):
+    payload = body if isinstance(body, str) else json.dumps(body)
+    writer.write(_head(status, content_type, headers) + payload.encode("utf-8"))
+    await writer.drain()
@@ -0,0 +1,211 @@
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from array import array
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_MIX = 0x9E3779B1
+_HASH_BITS = 32
+
+
+def normalize_text(text: str) -> str:
+    """Lower-cases text, drops punctuation and collapses whitespace."""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Returns the set of character n-grams of an already normalized text."""
+    if len(text) <= size:
+        return {text}
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Exact Jaccard similarity of two shingle sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def minhash_signature(shingle_set: Set[str], num_bins: int = 32) -> array:
+    """Computes a one-permutation MinHash signature with rotation densification.
+
+    A single hash pass over the shingles fills ``num_bins`` buckets with their
+    minimum, which keeps signing a topic linear in its length instead of
+    ``num_bins`` times that. Empty buckets borrow from their right neighbour so
+    short topics still produce comparable signatures.
+    """
+    shift = _HASH_BITS - (num_bins.bit_length() - 1)
+    mask = (1 << shift) - 1
+    empty = mask + 1
+    bins = [empty] * num_bins
+    for shingle in shingle_set:
+        h = (zlib.crc32(shingle.encode("utf-8")) * _MIX) & 0xFFFFFFFF
+        index, value = h >> shift, h & mask
+        if value < bins[index]:
+            bins[index] = value
+    filled = [i for i, value in enumerate(bins) if value != empty]
+    if not filled:
+        return array("Q", [0] * num_bins)
+    if len(filled) < num_bins:
+        for i in range(num_bins):
+            if bins[i] != empty:
+                continue
+            distance = 1
+            while bins[(i + distance) % num_bins] == empty:
+                distance += 1
+            bins[i] = bins[(i + distance) % num_bins] + distance * empty
+    return array("Q", bins)
+
+
+@dataclass
+class TopicMatch:
+    """A previously seen topic that is similar to the one being queried."""
+
+    topic: str
+    final_prompt: str
+    similarity: float
+
+
+class TopicIndex:
+    """Local near-duplicate index over past topics and their final prompts.
+
+    Topics are MinHashed over character shingles and bucketed with LSH banding,
+    so a query only verifies the handful of topics sharing a band with it and
+    stays sub-millisecond regardless of index size. Final prompts stay in
+    SQLite and are only read for the returned match.
+    """
+
+    def __init__(
+        self,
+        db_file: str = "tmp/topic_index.db",
+        num_bins: int = 32,
+        bands: int = 8,
+        max_candidates: int = 64,
+    ):
+        if num_bins & (num_bins - 1) or num_bins % bands:
+            raise ValueError("num_bins must be a power of two divisible by bands")
+        self.db_file = db_file
+        self.num_bins = num_bins
+        self.bands = bands
+        self.rows = num_bins // bands
+        self.max_candidates = max_candidates
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, List[int]] = defaultdict(list)
+        self._normalized: Dict[int, str] = {}
+        self._ids_by_normalized: Dict[str, int] = {}
+
+        db_dir = os.path.dirname(db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS topic_index (
+                id INTEGER PRIMARY KEY,
+                topic TEXT NOT NULL,
+                normalized TEXT NOT NULL UNIQUE,
+                final_prompt TEXT NOT NULL,
+                signature BLOB NOT NULL
+            )"""
+        )
+        self._conn.commit()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._normalized)
+
+    def add(self, topic: str, final_prompt: str):
+        """Indexes a topic and its final prompt, replacing an identical topic."""
+        normalized = normalize_text(topic)
+        signature = minhash_signature(shingles(normalized), self.num_bins)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO topic_index (topic, normalized, final_prompt, signature) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(normalized) DO UPDATE SET "
+                "topic = excluded.topic, final_prompt = excluded.final_prompt",
+                (topic, normalized, final_prompt, signature.tobytes()),
+            )
+            self._conn.commit()
+            if normalized in self._ids_by_normalized:
+                return
+            (row_id,) = self._conn.execute(
+                "SELECT id FROM topic_index WHERE normalized = ?", (normalized,)
+            ).fetchone()
+            self._insert(row_id, normalized, signature)
+
+    def query(self, topic: str, threshold: float = 0.0) -> Optional[TopicMatch]:
+        """Returns the most similar indexed topic at or above ``threshold``.
+
+        Args:
+            topic (str): The topic to look up.
+            threshold (float, optional): Minimum Jaccard similarity. Defaults to 0.0.
+
+        Returns:
+            Optional[TopicMatch]: The best match, or None if nothing qualifies.
+        """
+        normalized = normalize_text(topic)
+        query_shingles = shingles(normalized)
+        signature = minhash_signature(query_shingles, self.num_bins)
+        with self._lock:
+            exact_id = self._ids_by_normalized.get(normalized)
+            if exact_id is not None:
+                best_id, best_score = exact_id, 1.0
+            else:
+                collisions: Counter = Counter()
+                for key in self._band_keys(signature):
+                    collisions.update(self._buckets.get(key, ()))
+                best_id, best_score = None, -1.0
+                for candidate_id, _ in collisions.most_common(self.max_candidates):
+                    score = jaccard(
+                        query_shingles, shingles(self._normalized[candidate_id])
+                    )
+                    if score > best_score:
+                        best_id, best_score = candidate_id, score
+            if best_id is None or best_score < threshold:
+                return None
+            row = self._conn.execute(
+                "SELECT topic, final_prompt FROM topic_index WHERE id = ?", (best_id,)
+            ).fetchone()
+        return TopicMatch(topic=row[0], final_prompt=row[1], similarity=best_score)
+
+    def _band_keys(self, signature: array) -> List[int]:
+        rows = self.rows
+        return [
+            hash((band, signature[band * rows : (band + 1) * rows].tobytes()))
+            for band in range(self.bands)
+        ]
+
+    def _insert(self, row_id: int, normalized: str, signature: array):
+        self._normalized[row_id] = normalized
+        self._ids_by_normalized[normalized] = row_id
+        for key in self._band_keys(signature):
+            self._buckets[key].append(row_id)
+
+    def _load(self):
+        """Rebuilds the in-memory LSH buckets from the stored signatures."""
+        for row_id, normalized, blob in self._conn.execute(
+            "SELECT id, normalized, signature FROM topic_index"
+        ):
+            signature = array("Q")
+            signature.frombytes(blob)
+            if len(signature) != self.num_bins:
+                signature = minhash_signature(shingles(normalized), self.num_bins)
+            self._insert(row_id, normalized, signature)
+
+
+_default_index: Optional[TopicIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_default_index() -> TopicIndex:
+    """Returns the topic index shared by every workflow in this process."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = TopicIndex()
+        return _default_index
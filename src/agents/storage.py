@@ -0,0 +1,37 @@
+import threading
+from typing import Any, Dict
+
+from agno.storage.sqlite import SqliteStorage
+from sqlalchemy import Table
+
+# SqliteStorage instances share SQLAlchemy metadata that is not thread-safe.
+_storage_table_lock = threading.RLock()
+
+
+class SharedSqliteStorage(SqliteStorage):
+    """SqliteStorage that can be shared by concurrently running workflows.
+
+    SqliteStorage rebuilds its table definition on its SQLAlchemy metadata every
+    time a run sets the storage mode, and creates the table on first use; both
+    race between threads. The definition only depends on the mode, so it is
+    built once per mode and table creation is serialized.
+    """
+
+    def get_table(self) -> Table:
+        with _storage_table_lock:
+            tables: Dict[Any, Table] = self.__dict__.setdefault("_tables", {})
+            if self.mode not in tables:
+                tables[self.mode] = super().get_table()
+            return tables[self.mode]
+
+    def create(self) -> None:
+        with _storage_table_lock:
+            super().create()
+
+
+def default_storage() -> SqliteStorage:
+    """Returns the SQLite storage used for workflow sessions by default."""
+    return SharedSqliteStorage(
+        table_name="prompt_generation_workflows",
+        db_file="tmp/prompt_generation.db",
+    )
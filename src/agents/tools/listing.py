@@ -0,0 +1,113 @@
+import fnmatch
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class DirEntry:
+    """One listed file or directory, with the metadata list_files can show."""
+
+    path: str
+    is_dir: bool
+    size: int
+    mtime: float
+
+
+class DirectoryCache:
+    """In-process cache of directory scans, shared by every FileSystemTools.
+
+    A cached scan is reused while the directory's own mtime is unchanged; the
+    toolkit's writes invalidate their directory explicitly, since rewriting an
+    existing file changes its size and mtime but not the directory's.
+    """
+
+    def __init__(self, max_directories: int = 1024):
+        self.max_directories = max_directories
+        self._lock = threading.Lock()
+        self._scans: Dict[str, Tuple[int, List[DirEntry]]] = {}
+
+    def scan(self, directory: str) -> List[DirEntry]:
+        """Returns the entries of ``directory`` (names relative to it)."""
+        key = os.path.abspath(directory)
+        mtime_ns = os.stat(key).st_mtime_ns
+        with self._lock:
+            cached = self._scans.get(key)
+            if cached is not None and cached[0] == mtime_ns:
+                return cached[1]
+        entries: List[DirEntry] = []
+        with os.scandir(key) as iterator:
+            for entry in iterator:
+                try:
+                    stat = entry.stat()
+                    is_dir = entry.is_dir()
+                except OSError:
+                    # Vanished or broken symlink: list it without metadata.
+                    entries.append(DirEntry(entry.name, False, 0, 0.0))
+                    continue
+                entries.append(
+                    DirEntry(
+                        entry.name, is_dir, 0 if is_dir else stat.st_size, stat.st_mtime
+                    )
+                )
+        with self._lock:
+            if len(self._scans) >= self.max_directories:
+                self._scans.pop(next(iter(self._scans)))
+            self._scans[key] = (mtime_ns, entries)
+        return entries
+
+    def invalidate(self, path: str):
+        """Drops cached scans of ``path`` and of every directory above it."""
+        key = os.path.abspath(path)
+        with self._lock:
+            while True:
+                self._scans.pop(key, None)
+                parent = os.path.dirname(key)
+                if parent == key:
+                    break
+                key = parent
+
+
+_default_cache = DirectoryCache()
+
+
+def get_directory_cache() -> DirectoryCache:
+    """Returns the directory cache shared by every toolkit in this process."""
+    return _default_cache
+
+
+SORT_KEYS = {
+    "name": lambda e: e.path,
+    "size": lambda e: (e.size, e.path),
+    "mtime": lambda e: (e.mtime, e.path),
+}
+
+
+def walk(
+    cache: DirectoryCache,
+    root: str,
+    depth: int = 0,
+    pattern: Optional[str] = None,
+) -> List[DirEntry]:
+    """Lists ``root`` and up to ``depth`` levels of subdirectories.
+
+    ``pattern`` is a glob matched against the entry name, or against the path
+    relative to ``root`` when it contains a ``/``.
+    """
+    results: List[DirEntry] = []
+    pending: List[Tuple[str, int]] = [("", 0)]
+    while pending:
+        relative, level = pending.pop()
+        for entry in cache.scan(os.path.join(root, relative) if relative else root):
+            path = f"{relative}/{entry.path}" if relative else entry.path
+            subject = path if pattern and "/" in pattern else entry.path
+            if pattern is None or fnmatch.fnmatch(subject, pattern):
+                results.append(
+                    DirEntry(path, entry.is_dir, entry.size, entry.mtime)
+                    if relative
+                    else entry
+                )
+            if entry.is_dir and level < depth:
+                pending.append((path, level + 1))
+    return results
@@ -0,0 +1,191 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(ValueError):
+    """Raised when a diff or an edit does not apply to the current file."""
+
+
+@dataclass
+class PatchStats:
+    """Compact summary of an applied change."""
+
+    hunks: int = 0
+    lines_added: int = 0
+    lines_removed: int = 0
+
+
+def _line_count(text: str) -> int:
+    if not text:
+        return 0
+    return text.count("\n") + (0 if text.endswith("\n") else 1)
+
+
+def _line_ending(line: str) -> str:
+    return line[len(line.rstrip("\r\n")) :]
+
+
+def apply_unified_diff(lines: List[str], diff: str) -> Tuple[List[str], PatchStats]:
+    """Applies a unified diff to ``lines`` (with line endings) in a single pass.
+
+    File headers (``---``/``+++``) are optional. Every context and removed line
+    must match the file exactly, so a stale diff fails instead of corrupting
+    the file.
+
+    Args:
+        lines (List[str]): The current file, as from ``splitlines(keepends=True)``.
+        diff (str): The unified diff.
+
+    Returns:
+        Tuple[List[str], PatchStats]: The patched lines and change counts.
+    """
+    result: List[str] = []
+    stats = PatchStats()
+    cursor = 0  # Index of the next original line not yet copied.
+    in_hunk = False
+    last_tag = ""  # Tag of the previous hunk line, for "\ No newline".
+    for raw in diff.splitlines(keepends=True):
+        header = _HUNK_HEADER.match(raw)
+        if header:
+            start = int(header.group(1))
+            # A zero-length old range ("-3,0") inserts after line 3.
+            old_length = 1 if header.group(2) is None else int(header.group(2))
+            index = start if old_length == 0 else start - 1
+            if index < cursor or index > len(lines):
+                raise PatchError(f"Hunk {stats.hunks + 1} is out of order or range")
+            result.extend(lines[cursor:index])
+            cursor = index
+            stats.hunks += 1
+            in_hunk = True
+            last_tag = ""
+            continue
+        if not in_hunk:
+            # Preamble such as "diff --git" or the "---"/"+++" file headers.
+            continue
+        if raw.startswith("\\"):
+            # "\ No newline at end of file" applies to the previous hunk line;
+            # after a removed line there is nothing in the result to change.
+            if last_tag in ("+", " ") and result:
+                result[-1] = result[-1].rstrip("\r\n")
+            continue
+        tag, text = raw[:1], raw[1:]
+        if tag == "+":
+            result.append(text)
+            stats.lines_added += 1
+            last_tag = tag
+        elif tag in (" ", "-") or raw in ("\n", "\r\n"):
+            if raw in ("\n", "\r\n"):
+                # Some tools drop the leading space of empty context lines.
+                tag, text = " ", raw
+            if cursor >= len(lines) or lines[cursor].rstrip("\r\n") != text.rstrip(
+                "\r\n"
+            ):
+                found = lines[cursor].rstrip("\r\n") if cursor < len(lines) else "EOF"
+                raise PatchError(
+                    f"Hunk {stats.hunks} does not match line {cursor + 1}: "
+                    f"expected {text.rstrip()!r}, found {found!r}"
+                )
+            if tag == " ":
+                result.append(lines[cursor])
+            else:
+                stats.lines_removed += 1
+            cursor += 1
+            last_tag = tag
+        else:
+            in_hunk = False
+    if stats.hunks == 0:
+        raise PatchError("The diff contains no hunks")
+    result.extend(lines[cursor:])
+    return result, stats
+
+
+def apply_line_edits(
+    lines: List[str], edits: List[Dict[str, Any]]
+) -> Tuple[List[str], PatchStats]:
+    """Replaces 1-based, inclusive line ranges in one pass over the file.
+
+    Line numbers refer to the file before any edit; ranges must not overlap.
+    ``end_line = start_line - 1`` inserts before ``start_line``. A replacement
+    keeps the line ending of the last line it replaces, so replacing the final
+    line preserves whether the file ends with a newline.
+    """
+    ranges = []
+    for edit in edits:
+        start, end = int(edit["start_line"]), int(edit["end_line"])
+        if start < 1 or end < start - 1 or end > len(lines):
+            raise PatchError(f"Invalid line range {start}-{end} for {len(lines)} lines")
+        ranges.append((start, end, edit.get("replace", "")))
+    ranges.sort(key=lambda r: (r[0], r[1]))
+
+    result: List[str] = []
+    stats = PatchStats()
+    cursor = 0
+    for start, end, replacement in ranges:
+        if start - 1 < cursor:
+            raise PatchError(f"Line range {start}-{end} overlaps another edit")
+        result.extend(lines[cursor : start - 1])
+        if replacement:
+            if end >= start:
+                ending = _line_ending(lines[end - 1])
+            elif start <= len(lines):
+                # An insertion is followed by the line it was inserted before.
+                ending = _line_ending(lines[start - 1]) or "\n"
+            elif result and not _line_ending(result[-1]):
+                # Appending after a last line without a newline: the appended
+                # text becomes the unterminated last line instead.
+                result[-1] += "\n"
+                ending = ""
+            else:
+                ending = _line_ending(result[-1]) if result else ""
+            if not replacement.endswith("\n"):
+                replacement += ending
+            result.append(replacement)
+        cursor = end
+        stats.hunks += 1
+        stats.lines_added += _line_count(replacement)
+        stats.lines_removed += end - start + 1
+    result.extend(lines[cursor:])
+    return result, stats
+
+
+def apply_search_replace(
+    content: str, edits: List[Dict[str, Any]]
+) -> Tuple[str, PatchStats]:
+    """Applies exact search/replace edits in order; each search must match once."""
+    stats = PatchStats()
+    for edit in edits:
+        search, replacement = edit["search"], edit.get("replace", "")
+        index = content.find(search) if search else -1
+        if index < 0:
+            raise PatchError(f"Search text not found: {search[:60]!r}")
+        if content.find(search, index + 1) >= 0:
+            raise PatchError(f"Search text is not unique: {search[:60]!r}")
+        content = content[:index] + replacement + content[index + len(search) :]
+        stats.hunks += 1
+        stats.lines_added += _line_count(replacement)
+        stats.lines_removed += _line_count(search)
+    return content, stats
+
+
+def apply_edits(content: str, edits: List[Dict[str, Any]]) -> Tuple[str, PatchStats]:
+    """Applies line-range edits (original numbering) and then search/replace edits."""
+    line_edits = [e for e in edits if "start_line" in e]
+    search_edits = [e for e in edits if "start_line" not in e]
+    for edit in search_edits:
+        if "search" not in edit:
+            raise PatchError(
+                "Each edit needs either 'search' or 'start_line' and 'end_line'"
+            )
+    stats = PatchStats()
+    if line_edits:
+        lines, stats = apply_line_edits(content.splitlines(keepends=True), line_edits)
+        content = "".join(lines)
+    if search_edits:
+        content, search_stats = apply_search_replace(content, search_edits)
+        stats.hunks += search_stats.hunks
+        stats.lines_added += search_stats.lines_added
+        stats.lines_removed += search_stats.lines_removed
+    return content, stats
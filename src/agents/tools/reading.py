@@ -0,0 +1,100 @@
+import mmap
+import re
+from collections import deque
+from typing import Iterator, Optional, Tuple
+
+# Newlines are counted over fixed-size slices of the map, so no Python-level
+# loop runs per line and the whole file is never copied at once.
+_CHUNK = 1 << 20
+
+
+def count_lines(data: mmap.mmap) -> int:
+    """Counts lines in a mapped file (a final line without a newline counts)."""
+    size = len(data)
+    lines = 0
+    for start in range(0, size, _CHUNK):
+        lines += data[start : start + _CHUNK].count(b"\n")
+    if size and data[size - 1 : size] != b"\n":
+        lines += 1
+    return lines
+
+
+def line_offset(data: mmap.mmap, line: int) -> int:
+    """Returns the byte offset where 1-based ``line`` starts (file size past EOF)."""
+    remaining = line - 1
+    if remaining <= 0:
+        return 0
+    size = len(data)
+    for start in range(0, size, _CHUNK):
+        chunk = data[start : start + _CHUNK]
+        newlines = chunk.count(b"\n")
+        if newlines < remaining:
+            remaining -= newlines
+            continue
+        position = -1
+        for _ in range(remaining):
+            position = chunk.find(b"\n", position + 1)
+        return start + position + 1
+    return size
+
+
+def char_boundary(data: mmap.mmap, offset: int) -> int:
+    """Moves ``offset`` back to the start of a UTF-8 character."""
+    while 0 < offset < len(data) and data[offset] & 0xC0 == 0x80:
+        offset -= 1
+    return offset
+
+
+def read_window(data: mmap.mmap, start: int, end: int, budget: int) -> Tuple[str, int]:
+    """Decodes bytes ``start:end``, cut to ``budget`` bytes on a line or char boundary.
+
+    Returns:
+        Tuple[str, int]: The text and the offset where it actually ends.
+    """
+    if end - start > budget:
+        cut = data.rfind(b"\n", start, start + budget)
+        end = cut + 1 if cut >= start else char_boundary(data, start + budget)
+    return data[start:end].decode("utf-8", errors="replace"), end
+
+
+def iter_matches(
+    path: str,
+    pattern: str,
+    regex: bool = False,
+    ignore_case: bool = False,
+    context: int = 0,
+    max_matches: Optional[int] = None,
+) -> Iterator[Tuple[int, str, Optional[bool]]]:
+    """Streams ``(line_number, line, is_match)`` for matches and their context.
+
+    The file is read line by line, so memory use does not depend on its size.
+    After ``max_matches`` matches, the next match is yielded with ``is_match``
+    None (without its context) and the search stops.
+    """
+    flags = re.IGNORECASE if ignore_case else 0
+    matcher = re.compile(pattern if regex else re.escape(pattern), flags)
+    before: deque = deque(maxlen=context)
+    after = 0
+    last_emitted: Optional[int] = None
+    matches = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.rstrip("\r\n")
+            if matcher.search(line):
+                if max_matches is not None and matches >= max_matches:
+                    yield number, line, None
+                    return
+                matches += 1
+                for previous_number, previous in before:
+                    if last_emitted is None or previous_number > last_emitted:
+                        yield previous_number, previous, False
+                before.clear()
+                yield number, line, True
+                last_emitted = number
+                after = context
+            elif after > 0:
+                yield number, line, False
+                last_emitted = number
+                after -= 1
+            else:
+                before.append((number, line))
@@ -1,22 +1,49 @@
 import os
 import difflib
+import mmap
+import re
+from datetime import datetime
 from rich.syntax import Syntax
 from rich.console import Console
 from rich.panel import Panel
-from agno.tools import Toolkit  
-from agno.utils.log import logger  
+from typing import Dict, List, Optional
+from agno.tools import Toolkit
+from agno.utils.log import logger
+from ..persistence import atomic_write
+from .listing import SORT_KEYS, get_directory_cache, walk
+from .reading import (
+    char_boundary,
+    count_lines,
+    iter_matches,
+    line_offset,
+    read_window,
+)
+from .patch import (
+    PatchError,
+    PatchStats,
+    apply_edits,
+    apply_unified_diff,
+)
 
 console = Console()
 
 
+# Longest line excerpt returned per grep_file match.
+GREP_LINE_CHARS = 300
+
+
 class FileSystemTools(Toolkit):
-    def __init__(self):
+    def __init__(self, max_read_bytes: int = 32_000):
         super().__init__(name="file_system_tools")
+        # Upper bound on the bytes read_file/grep_file return in one call.
+        self.max_read_bytes = max_read_bytes
+        self.directory_cache = get_directory_cache()
         # Registrar las funciones que serán herramientas para el agente
         self.register(self.create_folder)
         self.register(self.create_file)
         self.register(self.edit_and_apply)
         self.register(self.read_file)
+        self.register(self.grep_file)
         self.register(self.list_files)
         # No registramos _highlight_diff ni _generate_and_apply_diff
         # ya que son helpers internos para edit_and_apply
@@ -33,6 +60,7 @@ class FileSystemTools(Toolkit):
         logger.info(f"Attempting to create folder: {path}")
         try:
             os.makedirs(path, exist_ok=True)
+            self.directory_cache.invalidate(path)
             return f"Folder created successfully: {path}"
         except Exception as e:
             logger.error(f"Error creating folder {path}: {e}")
@@ -57,6 +85,7 @@ class FileSystemTools(Toolkit):
 
             with open(path, "w", encoding="utf-8") as f:
                 f.write(content)
+            self.directory_cache.invalidate(path)
             return f"File created successfully: {path}"
         except Exception as e:
             logger.error(f"Error creating file {path}: {e}")
@@ -71,133 +100,331 @@ class FileSystemTools(Toolkit):
             logger.warning(f"Could not highlight diff: {e}")
             return diff_text  # Return plain text if highlighting fails
 
+    def _show_diff(self, diff_text: str, path: str):
+        """Renders a diff panel, only when a terminal is attached to the console."""
+        if not console.is_terminal or not diff_text:
+            return
+        diff_panel = Panel(
+            self._highlight_diff(diff_text),
+            title=f"Changes applied to {path}",
+            expand=False,
+            border_style="cyan",
+        )
+        console.print(diff_panel)
+
     def _generate_and_apply_diff(
         self, original_content: str, new_content: str, path: str
     ) -> str:
-        """Internal helper to generate diff, apply changes, and return summary."""
-        diff = list(
-            difflib.unified_diff(
-                original_content.splitlines(keepends=True),
-                new_content.splitlines(keepends=True),
-                fromfile=f"a/{path}",
-                tofile=f"b/{path}",
-                n=3,
-            )
-        )
-
-        if not diff:
+        """Internal helper to diff full new content, apply it and return a summary."""
+        stats = PatchStats()
+        diff_lines: List[str] = []
+        for line in difflib.unified_diff(
+            original_content.splitlines(keepends=True),
+            new_content.splitlines(keepends=True),
+            fromfile=f"a/{path}",
+            tofile=f"b/{path}",
+            n=3,
+        ):
+            if line.startswith("@@"):
+                stats.hunks += 1
+            elif line.startswith("+") and not line.startswith("+++"):
+                stats.lines_added += 1
+            elif line.startswith("-") and not line.startswith("---"):
+                stats.lines_removed += 1
+            diff_lines.append(line)
+        if not diff_lines:
             return "No changes detected."
+        atomic_write(path, new_content)
+        self.directory_cache.invalidate(path)
+        self._show_diff("".join(diff_lines), path)
+        return self._change_summary(path, stats, original_content, new_content)
 
-        try:
-            # Apply the changes by writing the new content
-            with open(path, "w", encoding="utf-8") as f:
-                f.writelines(new_content)
-
-            # --- Optional: Console Output (for debugging/user feedback) ---
-            diff_text = "".join(diff)
-            highlighted_diff = self._highlight_diff(diff_text)
-            diff_panel = Panel(
-                highlighted_diff,
-                title=f"Changes applied to {path}",
-                expand=False,
-                border_style="cyan",
-            )
-            console.print(diff_panel)
-            # --- End Optional Console Output ---
-
-            added_lines = sum(
-                1
-                for line in diff
-                if line.startswith("+") and not line.startswith("+++")
-            )
-            removed_lines = sum(
-                1
-                for line in diff
-                if line.startswith("-") and not line.startswith("---")
-            )
-
-            summary = f"Changes successfully applied to {path}:\n"
-            summary += f"  Lines added: {added_lines}\n"
-            summary += f"  Lines removed: {removed_lines}"
-            return summary
+    def _change_summary(
+        self, path: str, stats: PatchStats, original_content: str, new_content: str
+    ) -> str:
+        return (
+            f"Changes successfully applied to {path}: "
+            f"+{stats.lines_added} -{stats.lines_removed} lines in {stats.hunks} "
+            f"hunk(s), {len(original_content)} -> {len(new_content)} chars"
+        )
 
-        except Exception as e:
-            logger.error(f"Error applying changes to {path}: {e}")
-            # --- Optional: Console Output ---
-            error_panel = Panel(
-                f"Error: {str(e)}", title="Error Applying Changes", style="bold red"
-            )
-            console.print(error_panel)
-            # --- End Optional Console Output ---
-            return f"Error applying changes to file {path}: {str(e)}"
+    def edit_and_apply(
+        self,
+        path: str,
+        new_content: Optional[str] = None,
+        diff: Optional[str] = None,
+        edits: Optional[List[Dict[str, str]]] = None,
+    ) -> str:
+        """Edits a file with a unified diff, a list of edits, or its full new content.
 
-    def edit_and_apply(self, path: str, new_content: str) -> str:
-        """Reads a file, compares with new content, and applies changes if different.
+        Prefer `diff` or `edits` for existing files: only the changed lines need
+        to be sent. Exactly one of the three arguments must be given.
 
         Args:
             path (str): The path of the file to edit.
-            new_content (str): The proposed new content for the file.
+            new_content (str, optional): The complete new content of the file.
+            diff (str, optional): A unified diff against the current file, with
+                `@@ -start,count +start,count @@` hunks and 3 lines of context.
+            edits (List[Dict[str, str]], optional): Edits, each either
+                {"start_line": n, "end_line": m, "replace": text} replacing lines n
+                to m (1-based, inclusive, numbered as in the original file;
+                end_line = n - 1 inserts before line n), or {"search": text,
+                "replace": text}, where the search text must occur exactly once.
+                Whatever their order in the list, all line-range edits are applied
+                first, then the search/replace edits in list order, each searching
+                the result of the previous ones.
 
         Returns:
-            str: A summary of the changes applied, 'No changes needed', or an error message.
+            str: A one-line summary of the applied changes, 'No changes needed', or an error message.
         """
         logger.info(f"Attempting to edit file: {path}")
+        modes = [arg for arg in (new_content, diff, edits) if arg is not None]
+        if len(modes) != 1:
+            return "Error: Provide exactly one of new_content, diff or edits."
         try:
             if not os.path.exists(path):
                 return f"Error: File not found at {path}. Use create_file first."
-            with open(path, "r", encoding="utf-8") as file:
+            with open(path, "r", encoding="utf-8", newline="") as file:
                 original_content = file.read()
 
-            if new_content != original_content:
-                # Call the internal helper method using self
-                diff_result = self._generate_and_apply_diff(
+            if new_content is not None:
+                if new_content == original_content:
+                    logger.info(f"No changes needed for {path}")
+                    return f"No changes needed for {path}"
+                return self._generate_and_apply_diff(
                     original_content, new_content, path
                 )
-                return diff_result
+
+            if diff is not None:
+                lines, stats = apply_unified_diff(
+                    original_content.splitlines(keepends=True), diff
+                )
+                patched_content = "".join(lines)
             else:
+                patched_content, stats = apply_edits(original_content, edits)
+            if patched_content == original_content:
                 logger.info(f"No changes needed for {path}")
                 return f"No changes needed for {path}"
+            atomic_write(path, patched_content)
+            self.directory_cache.invalidate(path)
+            if console.is_terminal:
+                self._show_diff(
+                    diff
+                    if diff is not None
+                    else "".join(
+                        difflib.unified_diff(
+                            original_content.splitlines(keepends=True),
+                            patched_content.splitlines(keepends=True),
+                            fromfile=f"a/{path}",
+                            tofile=f"b/{path}",
+                        )
+                    ),
+                    path,
+                )
+            return self._change_summary(path, stats, original_content, patched_content)
+        except PatchError as e:
+            logger.warning(f"Could not apply changes to {path}: {e}")
+            return f"Error: Could not apply changes to {path}: {e}"
         except Exception as e:
-            logger.error(f"Error reading or comparing file {path}: {e}")
+            logger.error(f"Error applying changes to {path}: {e}")
             return f"Error editing file {path}: {str(e)}"
 
-    def read_file(self, path: str) -> str:
-        """Reads the content of a file.
+    def read_file(
+        self,
+        path: str,
+        offset: int = 0,
+        length: Optional[int] = None,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+    ) -> str:
+        """Reads part of a file, after a header with its size and line count.
+
+        Read by line range (`start_line`/`end_line`) or by byte range
+        (`offset`/`length`). At most the toolkit's byte budget is returned; the
+        header then says where to continue.
 
         Args:
             path (str): The path of the file to read.
+            offset (int, optional): Byte offset to start reading at. Defaults to 0.
+            length (int, optional): Number of bytes to read. Defaults to the budget.
+            start_line (int, optional): First line to read (1-based).
+            end_line (int, optional): Last line to read (inclusive).
 
         Returns:
-            str: The content of the file, or an error message if reading fails.
+            str: The header and the requested content, or an error message if reading fails.
         """
         logger.info(f"Attempting to read file: {path}")
         try:
             if not os.path.exists(path):
                 return f"Error: File not found at {path}."
-            with open(path, "r", encoding="utf-8") as f:
-                content = f.read()
-            # Return only a portion if it's too large? For now, return all.
-            # Consider adding size limits if needed.
-            return content
+            size = os.path.getsize(path)
+            if size == 0:
+                return f"[{path} | 0 bytes | 0 lines]\n"
+            with (
+                open(path, "rb") as f,
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data,
+            ):
+                total_lines = count_lines(data)
+                if start_line is not None or end_line is not None:
+                    first = max(1, start_line or 1)
+                    if first > total_lines:
+                        return (
+                            f"Error: start_line {first} is past the end of {path} "
+                            f"({total_lines} lines)."
+                        )
+                    if end_line is not None and end_line < first:
+                        return (
+                            f"Error: end_line {end_line} is before start_line {first}."
+                        )
+                    start = line_offset(data, first)
+                    end = (
+                        line_offset(data, end_line + 1)
+                        if end_line is not None
+                        else size
+                    )
+                else:
+                    first = None
+                    start = char_boundary(data, min(max(0, offset), size))
+                    end = size if length is None else min(size, start + max(0, length))
+                content, read_end = read_window(data, start, end, self.max_read_bytes)
+                header = f"[{path} | {size} bytes | {total_lines} lines | "
+                if first is not None:
+                    lines_read = content.count("\n")
+                    if content and not content.endswith("\n"):
+                        lines_read += 1
+                    header += f"lines {first}-{first + max(lines_read, 1) - 1}"
+                    if read_end < end and content.endswith("\n"):
+                        header += f" | truncated, continue with start_line={first + lines_read}"
+                    elif read_end < end:
+                        header += f" | truncated, continue with offset={read_end}"
+                else:
+                    header += f"bytes {start}-{read_end}"
+                    if read_end < end:
+                        header += f" | truncated, continue with offset={read_end}"
+            return f"{header}]\n{content}"
         except Exception as e:
             logger.error(f"Error reading file {path}: {e}")
             return f"Error reading file: {str(e)}"
 
-    def list_files(self, path: str = ".") -> str:
-        """Lists files and directories in the specified path.
+    def grep_file(
+        self,
+        path: str,
+        pattern: str,
+        regex: bool = False,
+        ignore_case: bool = False,
+        context: int = 0,
+        max_matches: int = 50,
+    ) -> str:
+        """Searches a file line by line and returns the matching lines with their numbers.
+
+        Use it to find the relevant part of a large file, then read_file with
+        start_line/end_line to read around it.
+
+        Args:
+            path (str): The path of the file to search.
+            pattern (str): The text (or regular expression if `regex`) to find.
+            regex (bool, optional): Treat `pattern` as a regular expression. Defaults to False.
+            ignore_case (bool, optional): Case-insensitive matching. Defaults to False.
+            context (int, optional): Lines of context around each match. Defaults to 0.
+            max_matches (int, optional): Stop after this many matches. Defaults to 50.
+
+        Returns:
+            str: One `line_number: line` entry per line (`:` marks matches, `-` context), or an error message.
+        """
+        logger.info(f"Searching file {path} for: {pattern}")
+        try:
+            if not os.path.isfile(path):
+                return f"Error: File not found at {path}."
+            output: List[str] = []
+            used = matches = 0
+            stopped = None
+            for number, line, is_match in iter_matches(
+                path, pattern, regex, ignore_case, max(0, context), max_matches
+            ):
+                if is_match is None:
+                    stopped = f"stopped after {max_matches} matches"
+                    break
+                entry = f"{number}{':' if is_match else '-'} {line[:GREP_LINE_CHARS]}"
+                used += len(entry) + 1
+                if used > self.max_read_bytes:
+                    stopped = f"stopped at the {self.max_read_bytes} byte budget"
+                    break
+                output.append(entry)
+                matches += is_match
+            if not output:
+                return f"No matches for {pattern!r} in {path}."
+            summary = f"[{matches} matches in {path}"
+            summary += f" | {stopped}]" if stopped else "]"
+            return summary + "\n" + "\n".join(output)
+        except re.error as e:
+            return f"Error: Invalid regular expression {pattern!r}: {e}"
+        except Exception as e:
+            logger.error(f"Error searching file {path}: {e}")
+            return f"Error searching file: {str(e)}"
+
+    def list_files(
+        self,
+        path: str = ".",
+        pattern: Optional[str] = None,
+        depth: int = 0,
+        sort: str = "name",
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        details: bool = False,
+    ) -> str:
+        """Lists files and directories in the specified path, one page at a time.
 
         Args:
             path (str, optional): The directory path to list. Defaults to ".".
+            pattern (str, optional): Glob filter such as "*.md", matched against names
+                (or relative paths if it contains "/").
+            depth (int, optional): Subdirectory levels to descend into. Defaults to 0.
+            sort (str, optional): "name", "size" or "mtime"; prefix "-" for descending. Defaults to "name".
+            limit (int, optional): Maximum entries per page. Defaults to 100.
+            cursor (str, optional): The cursor returned by the previous page.
+            details (bool, optional): Include size in bytes and modification time. Defaults to False.
 
         Returns:
-            str: A newline-separated list of file/directory names, or an error message.
+            str: A header with the total and next cursor, then one entry per line
+                (directories end with "/"), or an error message.
         """
         logger.info(f"Attempting to list files in: {path}")
+        start = 0
+        if cursor:
+            cursor = str(cursor)
+            if not (cursor.isascii() and cursor.isdigit()):
+                return f"Error: Invalid cursor: {cursor}"
+            start = int(cursor)
         try:
             if not os.path.isdir(path):
                 return f"Error: Path is not a valid directory: {path}"
-            files = os.listdir(path)
-            return "\n".join(files) if files else "Directory is empty."
+            descending = sort.startswith("-")
+            sort_key = SORT_KEYS.get(sort.lstrip("-"))
+            if sort_key is None:
+                return f"Error: Unknown sort {sort!r}; use name, size or mtime."
+            entries = walk(self.directory_cache, path, max(0, depth), pattern)
+            if not entries:
+                return "Directory is empty." if pattern is None else "No matches."
+            entries.sort(key=sort_key, reverse=descending)
+            if start >= len(entries):
+                return (
+                    f"Error: Cursor {start} is past the last of {len(entries)} entries."
+                )
+            page = entries[start : start + max(1, limit)]
+            end = start + len(page)
+            header = f"[{path} | {len(entries)} entries | showing {start + 1}-{end}"
+            if end < len(entries):
+                header += f" | next cursor: {end}"
+            lines = [header + "]"]
+            for entry in page:
+                name = f"{entry.path}/" if entry.is_dir else entry.path
+                if details:
+                    modified = datetime.fromtimestamp(entry.mtime).isoformat(
+                        timespec="seconds"
+                    )
+                    name = f"{name}\t{entry.size}\t{modified}"
+                lines.append(name)
+            return "\n".join(lines)
         except Exception as e:
             logger.error(f"Error listing files in {path}: {e}")
             return f"Error listing files: {str(e)}"
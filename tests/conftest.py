@@ -0,0 +1,35 @@
+import pytest
+
+from src.agents.cache import PhaseCache
+from src.agents.checkpoints import CheckpointStore
+from src.agents.history import FinalPromptStore
+from src.agents.metrics import MetricsRegistry
+from src.agents.mock import MockModel
+from src.agents.persistence import PromptWriter
+from src.agents.similarity import TopicIndex
+from src.agents.storage import SharedSqliteStorage
+
+
+@pytest.fixture
+def workflow_kwargs(tmp_path, monkeypatch):
+    """PromptGeneration arguments for an offline run isolated in ``tmp_path``.
+
+    The workflow falls back to process-wide caches and stores; each test gets
+    its own so earlier runs are never served from the cache.
+    """
+    monkeypatch.chdir(tmp_path)
+    return {
+        "storage": SharedSqliteStorage(
+            table_name="sessions", db_file=str(tmp_path / "sessions.db")
+        ),
+        "generator_model": MockModel(latency=0),
+        "evaluator_model": MockModel(latency=0),
+        "phase_cache": PhaseCache(db_file=str(tmp_path / "phase_cache.db")),
+        "topic_index": TopicIndex(db_file=str(tmp_path / "topic_index.db")),
+        "final_prompt_store": FinalPromptStore(
+            db_file=str(tmp_path / "final_prompts.db")
+        ),
+        "checkpoint_store": CheckpointStore(db_file=str(tmp_path / "checkpoints.db")),
+        "prompt_writer": PromptWriter(directory=str(tmp_path / "prompt")),
+        "metrics_registry": MetricsRegistry(),
+    }
@@ -0,0 +1,101 @@
+import os
+from datetime import date
+
+import pytest
+
+from src.agents.archive import PromptArchive
+
+DAY = date(2024, 6, 10)
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    archive = PromptArchive(str(tmp_path / "archive"))
+
+    first = archive.put("Topic A", "# Prompt\n", DAY)
+    second = archive.put("Topic B", "# Prompt\r\n", DAY)
+
+    assert first == second
+    stats = archive.stats()
+    assert (stats.entries, stats.bodies) == (2, 1)
+
+
+def test_topics_with_the_same_folded_slug_are_kept_apart(tmp_path):
+    archive = PromptArchive(str(tmp_path / "archive"))
+
+    archive.put("C++ tips", "plus plus\n", DAY)
+    archive.put("C tips", "plain\n", DAY)
+
+    assert archive.latest("C++ tips") == "plus plus\n"
+    assert archive.latest("C tips") == "plain\n"
+
+
+def test_export_and_ingest_round_trip(tmp_path):
+    archive = PromptArchive(str(tmp_path / "archive"))
+    archive.put("C++ tips", "plus plus\n", DAY)
+    archive.put("C tips", "plain\n", DAY)
+
+    assert archive.export(str(tmp_path / "prompt")) == 2
+    copy = PromptArchive(str(tmp_path / "copy"))
+
+    assert copy.ingest(str(tmp_path / "prompt")) == (2, 2)
+    assert {e.filename for e in copy.entries()} == {
+        e.filename for e in archive.entries()
+    }
+    assert copy.latest("C++ tips") == "plus plus\n"
+
+
+def test_verify_reports_a_damaged_body(tmp_path):
+    archive = PromptArchive(str(tmp_path / "archive"), compression="none")
+    archive.put("Topic", "# Prompt\n\nBody text.\n", DAY)
+    assert archive.verify() == []
+
+    segment = next((tmp_path / "archive" / "segments").iterdir())
+    data = bytearray(segment.read_bytes())
+    data[-3] ^= 0x01
+    segment.write_bytes(bytes(data))
+
+    assert [p.endswith("content hash mismatch") for p in archive.verify()] == [True]
+
+
+def test_failed_put_leaves_no_index_rows(tmp_path, monkeypatch):
+    archive = PromptArchive(str(tmp_path / "archive"))
+    archive.put("Topic A", "# Prompt\n", DAY)
+    segment = archive._segment_path(1)
+    size = os.path.getsize(segment)
+
+    def fail_sync(segments):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(archive, "_sync", fail_sync)
+    with pytest.raises(OSError):
+        archive.put("Topic B", "# Other\n", DAY)
+    monkeypatch.undo()
+
+    assert archive.latest("Topic B") is None
+    # The body's bytes are cut off the segment, not left as dead space.
+    assert os.path.getsize(segment) == size
+    archive.put("Topic C", "# Third\n", DAY)
+    stats = archive.stats()
+    assert (stats.entries, stats.bodies) == (2, 2)
+    assert archive.verify() == []
+    assert archive.latest("Topic C") == "# Third\n"
+
+
+def test_failed_ingest_leaves_no_bodies_behind(tmp_path, monkeypatch):
+    directory = tmp_path / "prompt"
+    directory.mkdir()
+    for i in range(3):
+        (directory / f"topic-{i}-2024-06-1{i}.md").write_text(f"body {i}\n")
+    archive = PromptArchive(str(tmp_path / "archive"))
+
+    def fail_sync(segments):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(archive, "_sync", fail_sync)
+    with pytest.raises(OSError):
+        archive.ingest(str(directory))
+    monkeypatch.undo()
+
+    assert os.path.getsize(archive._segment_path(1)) == 0
+    assert archive.ingest(str(directory)) == (3, 3)
+    assert archive.verify() == []
@@ -0,0 +1,69 @@
+import threading
+
+from src.agents.agents import PromptGeneration
+from src.agents.checkpoints import COMPLETED, RUNNING, SAVE_PHASE
+from src.agents.persistence import PromptWriter
+
+TOPIC = "Zombie survival"
+
+
+class GatedWriter(PromptWriter):
+    """A write-behind writer whose writes wait until the gate opens."""
+
+    def __init__(self, directory: str):
+        super().__init__(directory, write_behind=True)
+        self.gate = threading.Event()
+
+    def _write(self, *args):
+        self.gate.wait(10)
+        super()._write(*args)
+
+
+class FailingWriter(PromptWriter):
+    def _write(self, *args):
+        raise OSError("disk full")
+
+
+def test_write_behind_run_completes_only_once_the_prompt_is_written(
+    workflow_kwargs, tmp_path
+):
+    writer = GatedWriter(str(tmp_path / "prompt"))
+    workflow_kwargs["prompt_writer"] = writer
+    workflow = PromptGeneration(session_id="s", **workflow_kwargs)
+    store = workflow_kwargs["checkpoint_store"]
+
+    list(workflow.run(topic=TOPIC))
+    record = store.get_run(workflow.run_id)
+    assert record.status == RUNNING
+    assert SAVE_PHASE not in record.phases
+
+    writer.gate.set()
+    writer.flush()
+    record = store.get_run(workflow.run_id)
+    assert record.status == COMPLETED
+    assert record.phases[SAVE_PHASE].endswith(".md")
+
+
+def test_resume_after_a_failed_save_saves_once_and_records_once(
+    workflow_kwargs, tmp_path
+):
+    workflow_kwargs["prompt_writer"] = FailingWriter(str(tmp_path / "prompt"))
+    workflow = PromptGeneration(session_id="s", **workflow_kwargs)
+    list(workflow.run(topic=TOPIC))
+    run_id = workflow.run_id
+    store = workflow_kwargs["checkpoint_store"]
+    assert store.get_run(run_id).status == RUNNING
+
+    writer = PromptWriter(str(tmp_path / "prompt"))
+    workflow_kwargs["prompt_writer"] = writer
+    resumed = PromptGeneration(session_id="s", **workflow_kwargs)
+    titles = [r.content.split("\n")[0] for r in resumed.resume(run_id)]
+
+    assert titles == [
+        "# 1. Initial Prompt Generation (Resumed)",
+        "# 2. Prompt Evaluation (Resumed)",
+        "# 3. Improved Prompt Generation (Resumed)",
+    ]
+    assert store.get_run(run_id).status == COMPLETED
+    assert len(list((tmp_path / "prompt").iterdir())) == 1
+    assert len(workflow_kwargs["final_prompt_store"].by_topic(TOPIC)) == 1
@@ -0,0 +1,35 @@
+from src.agents.agents import PromptGeneration
+from src.agents.batch import run_batch
+from src.agents.history import FinalPromptStore
+
+
+class RecordingStore(FinalPromptStore):
+    """Tracks the largest number of records it held unwritten."""
+
+    max_pending = 0
+
+    def add(self, record):
+        super().add(record)
+        self.max_pending = max(self.max_pending, len(self._pending))
+
+
+def test_single_run_is_in_the_history_when_it_ends(workflow_kwargs, tmp_path):
+    workflow = PromptGeneration(session_id="zombie survival", **workflow_kwargs)
+    list(workflow.run(topic="zombie survival"))
+
+    # A second connection sees the record without a flush, as after a crash.
+    history = FinalPromptStore(db_file=str(tmp_path / "final_prompts.db"))
+    assert [r.topic for r in history.recent()] == ["zombie survival"]
+
+
+def test_batch_mode_writes_the_history_in_bulk(workflow_kwargs, tmp_path):
+    store = RecordingStore(db_file=str(tmp_path / "batch.db"))
+    workflow_kwargs["final_prompt_store"] = store
+    topics = [f"topic {i}" for i in range(3)]
+
+    summary = run_batch(topics, str(tmp_path / "out.jsonl"), **workflow_kwargs)
+
+    assert summary.succeeded == 3
+    assert store.max_pending == 3
+    assert store.batch_size == 1
+    assert len(FinalPromptStore(db_file=str(tmp_path / "batch.db"))) == 3
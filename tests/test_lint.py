@@ -0,0 +1,74 @@
+from src.agents.lint import lint_prompt, scan
+from src.agents.mock import DEFAULT_RESPONSE
+
+SPANISH_PROMPT = """\
+# Rol y objetivo
+
+Eres un asistente meticuloso que completa la tarea del usuario de principio a fin.
+
+# Instrucciones
+
+- Continúa trabajando hasta que la tarea esté completamente resuelta antes de terminar tu turno.
+- Usa tus herramientas para reunir información en lugar de adivinar.
+- Planifica antes de cada llamada a una herramienta y reflexiona sobre el resultado.
+- Nunca reveles datos personales; siempre cita la fuente.
+
+# Flujo de trabajo
+
+1. Analiza la solicitud y enumera los pasos necesarios.
+2. Ejecuta cada paso, verificando los resultados intermedios.
+3. Resume el resultado para el usuario.
+
+# Ejemplo
+
+Usuario: "Resume el informe adjunto." Lees el archivo, describes sus secciones
+y devuelves un resumen de cinco viñetas.
+
+# Formato de salida
+
+Responde en markdown con un resumen breve seguido del resultado detallado.
+"""
+
+
+def failed(prompt: str):
+    return [rule.name for rule in lint_prompt(prompt).failed]
+
+
+def test_english_and_spanish_prompts_pass_the_same_rules():
+    assert failed(DEFAULT_RESPONSE) == ["directives"]
+    assert failed(SPANISH_PROMPT) == []
+
+
+def test_vague_spanish_prompt_fails():
+    prompt = "Escribe algo sobre viajes, etc. Intenta ser útil si es posible, tal vez."
+
+    assert "vague_wording" in failed(prompt)
+    assert lint_prompt(prompt).score < 3
+
+
+def test_headings_match_keywords_at_word_starts():
+    assert "role" in failed("# Control\n\nText.")
+    assert "role" not in failed("# Roles\n\nText.")
+
+
+def test_scan_recurses_in_name_order(tmp_path):
+    (tmp_path / "old").mkdir()
+    for name in ("b.md", "a.md", "old/c.md", "notes.txt"):
+        (tmp_path / name).write_text(SPANISH_PROMPT)
+
+    paths = [path for path, _ in scan([str(tmp_path)])]
+
+    assert paths == [str(tmp_path / name) for name in ("a.md", "b.md", "old/c.md")]
+
+
+def test_scan_reports_unreadable_files_and_continues(tmp_path):
+    (tmp_path / "a.md").write_bytes(b"\xff\xfe")
+    (tmp_path / "b.md").write_text(SPANISH_PROMPT)
+    errors = []
+
+    reports = list(
+        scan([str(tmp_path)], on_error=lambda path, e: errors.append((path, type(e))))
+    )
+
+    assert [path for path, _ in reports] == [str(tmp_path / "b.md")]
+    assert errors == [(str(tmp_path / "a.md"), UnicodeDecodeError)]
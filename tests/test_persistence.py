@@ -0,0 +1,57 @@
+import os
+import stat
+from datetime import date
+
+from src.agents.persistence import (
+    PromptWriter,
+    atomic_write,
+    prompt_filename,
+    prompt_slug,
+)
+
+DAY = date(2024, 6, 10)
+
+
+def test_filename_is_readable_and_dated():
+    assert prompt_filename("AI for Space Exploration", DAY) == (
+        "ai-for-space-exploration-17899cd4-2024-06-10.md"
+    )
+
+
+def test_topics_that_fold_alike_get_distinct_slugs():
+    assert prompt_slug("C++ tips") != prompt_slug("C tips")
+    assert prompt_slug("a" * 100 + "x") != prompt_slug("a" * 100 + "y")
+
+
+def test_slug_ignores_case_and_whitespace_like_the_caches():
+    assert prompt_slug("Zombie  Survival") == prompt_slug("zombie survival")
+
+
+def test_writer_keeps_colliding_topics_apart(tmp_path):
+    writer = PromptWriter(directory=str(tmp_path))
+
+    first = writer.save("C++ tips", "plus plus", DAY)
+    second = writer.save("C tips", "plain", DAY)
+
+    assert first != second
+    assert open(first).read() == "plus plus"
+    assert open(second).read() == "plain"
+
+
+def test_atomic_write_keeps_the_destination_mode(tmp_path):
+    path = tmp_path / "prompt.md"
+    path.write_text("old")
+    os.chmod(path, 0o640)
+
+    atomic_write(str(path), "new")
+
+    assert path.read_text() == "new"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+
+
+def test_atomic_write_creates_files_like_open(tmp_path):
+    atomic_write(str(tmp_path / "new.md"), "new")
+    (tmp_path / "plain.md").write_text("plain")
+
+    mode = stat.S_IMODE(os.stat(tmp_path / "new.md").st_mode)
+    assert mode == stat.S_IMODE(os.stat(tmp_path / "plain.md").st_mode)
@@ -0,0 +1,297 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from agno.agent import Agent
+
+from src.agents import scheduler as scheduler_module
+from src.agents.mock import MockModel
+from src.agents.scheduler import (
+    FATAL,
+    OK,
+    RETRYABLE,
+    THROTTLED,
+    AIMDLimiter,
+    HedgePolicy,
+    RetryPolicy,
+    Scheduler,
+    TokenBucket,
+    classify_error,
+    retry_after,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(scheduler_module.time, "monotonic", clock)
+    return clock
+
+
+class Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class APIError(Exception):
+    def __init__(self, status_code=None, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = Response(headers or {})
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+# --- Token buckets ---
+def test_token_bucket_paces_requests_past_its_burst(clock):
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    waits = [bucket.take() for _ in range(4)]
+
+    assert waits == pytest.approx([0.0, 0.0, 0.1, 0.2])
+
+
+def test_token_bucket_refills_up_to_its_capacity(clock):
+    bucket = TokenBucket(rate=10, capacity=2)
+    bucket.take(2)
+
+    clock.now += 60
+    assert [bucket.take() for _ in range(3)] == pytest.approx([0.0, 0.0, 0.1])
+
+
+def test_per_minute_bucket_bursts_a_second_worth():
+    bucket = TokenBucket.per_minute(600)
+
+    assert (bucket.rate, bucket.capacity) == (10, 10)
+    assert TokenBucket.per_minute(6).capacity == 1
+
+
+def test_token_bucket_charges_request_size(clock):
+    bucket = TokenBucket(rate=100, capacity=100)
+
+    assert bucket.take(100) == 0.0
+    assert bucket.take(50) == pytest.approx(0.5)
+
+
+# --- AIMD concurrency ---
+def test_limiter_admits_up_to_its_limit():
+    limiter = AIMDLimiter(initial=2)
+    limiter.acquire()
+    limiter.acquire()
+
+    assert not limiter._try_acquire()
+    limiter.release(OK)
+    assert limiter._try_acquire()
+
+
+def test_throttling_halves_the_limit_once_per_cooldown(clock):
+    limiter = AIMDLimiter(initial=16, cooldown=1.0)
+    for _ in range(3):
+        limiter.acquire()
+    limiter.release(THROTTLED)
+    limiter.release(THROTTLED)
+    assert limiter.limit == 8
+
+    clock.now += 1.0
+    limiter.release(THROTTLED)
+    assert limiter.limit == 4
+
+
+def test_limit_never_drops_below_the_minimum(clock):
+    limiter = AIMDLimiter(initial=2, minimum=1)
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(THROTTLED)
+        clock.now += 1.0
+
+    assert limiter.limit == 1
+
+
+def test_successes_grow_the_limit_by_one_per_window():
+    limiter = AIMDLimiter(initial=4, maximum=5)
+    for _ in range(4):
+        limiter.acquire()
+    for _ in range(4):
+        limiter.release(OK)
+
+    assert 4.9 < limiter.limit < 5
+    limiter.in_flight = 2
+    for _ in range(2):
+        limiter.release(OK)
+    assert limiter.limit == 5
+
+
+def test_release_wakes_a_blocked_acquire():
+    limiter = AIMDLimiter(initial=1)
+    limiter.acquire()
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    thread.start()
+
+    assert not acquired.wait(0.05)
+    limiter.release(OK)
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_release_wakes_a_waiting_coroutine():
+    async def main():
+        limiter = AIMDLimiter(initial=1)
+        await limiter.aacquire()
+        waiter = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        limiter.release(OK)
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.in_flight == 1
+
+    asyncio.run(main())
+
+
+# --- Retry classification ---
+@pytest.mark.parametrize(
+    "error, outcome",
+    [
+        (APIError(429), THROTTLED),
+        (APIError(503), RETRYABLE),
+        (APIError(500), RETRYABLE),
+        (APIError(529), RETRYABLE),
+        (APIError(408), RETRYABLE),
+        (APIError(400), FATAL),
+        (APIError(401), FATAL),
+        (TimeoutError(), RETRYABLE),
+        (ConnectionResetError(), RETRYABLE),
+        (APIConnectionError(), RETRYABLE),
+        (ValueError("bad output"), FATAL),
+    ],
+)
+def test_errors_are_classified(error, outcome):
+    assert classify_error(error) == outcome
+
+
+def test_wrapped_errors_are_classified_by_their_cause():
+    try:
+        try:
+            raise APIError(429)
+        except APIError as e:
+            raise RuntimeError("model provider error") from e
+    except RuntimeError as wrapped:
+        assert classify_error(wrapped) == THROTTLED
+
+
+def test_retry_after_headers():
+    assert retry_after(APIError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after(APIError(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after(APIError(429, {"retry-after": "soon"})) is None
+    assert retry_after(APIError(429)) is None
+
+
+def test_retry_policy_backs_off_and_gives_up():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=30)
+
+    assert 0 <= policy.delay(0, APIError(503)) <= 0.5
+    assert 0 <= policy.delay(1, APIError(503)) <= 1.0
+    assert policy.delay(2, APIError(503)) is None
+    assert policy.delay(0, APIError(400)) is None
+
+
+def test_retry_policy_honours_retry_after():
+    policy = RetryPolicy(base_delay=0.5, max_delay=30)
+
+    assert 5 <= policy.delay(0, APIError(429, {"retry-after": "5"})) <= 5.5
+    assert 30 <= policy.delay(0, APIError(429, {"retry-after": "90"})) <= 30.5
+
+
+def test_call_retries_transient_failures_only():
+    scheduler = Scheduler(retry=RetryPolicy(max_attempts=3, base_delay=0))
+    agent = Agent(model=MockModel(latency=0))
+    failures = [APIError(503), APIError(429)]
+
+    def request(agent):
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    assert scheduler.call("Phase 1", agent, request)[0] == "ok"
+    assert scheduler.stats()["mock"]["retries"] == 2
+
+    with pytest.raises(APIError):
+        scheduler.call(
+            "Phase 1", agent, lambda agent: (_ for _ in ()).throw(APIError(400))
+        )
+    assert scheduler.stats()["mock"]["retries"] == 2
+
+
+# --- Hedging ---
+def hedging_scheduler(agent: Agent) -> Scheduler:
+    scheduler = Scheduler(hedge=HedgePolicy(min_delay=0.05, min_samples=2))
+    scheduler.model(agent).latencies.extend([0.01, 0.01, 0.01])
+    return scheduler
+
+
+def test_hedged_call_never_runs_on_the_caller_agent():
+    agent = Agent(model=MockModel(latency=0))
+    scheduler = hedging_scheduler(agent)
+    used = []
+    lock = threading.Lock()
+    primary_done = threading.Event()
+
+    def request(attempt_agent):
+        with lock:
+            used.append(attempt_agent)
+            first = len(used) == 1
+        if first:
+            time.sleep(0.3)
+            primary_done.set()
+            return "primary"
+        return "backup"
+
+    result, winner = scheduler.call("Phase 1", agent, request)
+
+    assert result == "backup"
+    assert winner is used[1]
+    assert all(attempt is not agent for attempt in used)
+    assert scheduler.stats()["mock"]["hedge_wins"] == 1
+    assert primary_done.wait(1)
+
+
+def test_async_hedged_call_never_runs_on_the_caller_agent():
+    agent = Agent(model=MockModel(latency=0))
+    scheduler = hedging_scheduler(agent)
+    used = []
+
+    async def request(attempt_agent):
+        used.append(attempt_agent)
+        if len(used) == 1:
+            await asyncio.sleep(0.3)
+            return "primary"
+        return "backup"
+
+    result, winner = asyncio.run(scheduler.acall("Phase 1", agent, request))
+
+    assert result == "backup"
+    assert winner is used[1]
+    assert all(attempt is not agent for attempt in used)
+    assert scheduler.stats()["mock"]["hedge_wins"] == 1
+
+
+def test_fast_request_is_not_hedged():
+    agent = Agent(model=MockModel(latency=0))
+    scheduler = hedging_scheduler(agent)
+    calls = []
+
+    result, _ = scheduler.call("Phase 1", agent, lambda a: calls.append(a) or "ok")
+
+    assert (result, len(calls)) == ("ok", 1)
+    assert scheduler.stats()["mock"]["hedges"] == 0
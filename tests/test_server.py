@@ -0,0 +1,119 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from src.agents.checkpoints import FAILED, CheckpointStore
+from src.agents.server import PromptServer
+
+
+@pytest.fixture
+def server(workflow_kwargs):
+    return PromptServer(**workflow_kwargs)
+
+
+async def _generate(server: PromptServer, payload: dict):
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = json.dumps(payload).encode()
+        writer.write(
+            b"POST /generate HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body
+        )
+        response = (await reader.read()).decode()
+        writer.close()
+    finally:
+        listener.close()
+        await listener.wait_closed()
+    head, _, body = response.partition("\r\n\r\n")
+    return head, [json.loads(line) for line in body.splitlines() if line]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_generate_round_trip(server, stream):
+    head, events = asyncio.run(
+        _generate(server, {"topic": "Zombie survival", "stream": stream})
+    )
+
+    assert head.startswith("HTTP/1.1 200")
+    done = events[-1]
+    assert done["event"] == "Done"
+    assert done["status"] == "ok", done.get("error")
+    assert done["final_prompt"]
+    content = "".join(e["content"] or "" for e in events[:-1])
+    assert "# 3. Improved Prompt Generation" in content
+
+
+def test_streamed_deltas_are_forwarded(server):
+    _, events = asyncio.run(
+        _generate(server, {"topic": "Zombie survival", "stream": True})
+    )
+
+    assert sum(e["event"] == "RunResponse" for e in events) > 3
+
+
+def test_workflows_are_reused_without_leaking_session_state(server, workflow_kwargs):
+    asyncio.run(_generate(server, {"topic": "Zombie survival"}))
+    (workflow,) = server._workflows
+    asyncio.run(_generate(server, {"topic": "Space travel"}))
+
+    assert server._workflows == [workflow]
+    session = workflow_kwargs["storage"].read(session_id=workflow.session_id)
+    improved = session.session_data["session_state"]["improved_prompts"]
+    assert list(improved) == ["Space travel"]
+
+
+class SlowCheckpoints(CheckpointStore):
+    def checkpoint(self, *args):
+        time.sleep(0.2)
+        super().checkpoint(*args)
+
+
+def test_blocking_io_does_not_stall_the_event_loop(workflow_kwargs, tmp_path):
+    workflow_kwargs["checkpoint_store"] = SlowCheckpoints(
+        db_file=str(tmp_path / "slow.db")
+    )
+    server = PromptServer(**workflow_kwargs)
+
+    async def main():
+        gaps = []
+
+        async def tick():
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                gaps.append(time.perf_counter() - started)
+
+        ticker = asyncio.ensure_future(tick())
+        _, events = await _generate(server, {"topic": "Zombie survival"})
+        ticker.cancel()
+        return events, max(gaps)
+
+    events, longest_gap = asyncio.run(main())
+    assert events[-1]["status"] == "ok"
+    assert longest_gap < 0.15
+
+
+class FailingCheckpoints(CheckpointStore):
+    def checkpoint(self, run_id, phase, output):
+        if phase == "Phase 2":
+            raise OSError("disk full")
+        super().checkpoint(run_id, phase, output)
+
+
+def test_a_run_that_raises_is_marked_failed(workflow_kwargs, tmp_path):
+    store = FailingCheckpoints(db_file=str(tmp_path / "failing.db"))
+    workflow_kwargs["checkpoint_store"] = store
+    server = PromptServer(**workflow_kwargs)
+
+    _, events = asyncio.run(_generate(server, {"topic": "Zombie survival"}))
+
+    assert events[-1]["status"] == "error"
+    assert "disk full" in events[-1]["error"]
+    assert not server._workflows
+    (record,) = store.interrupted(include_failed=True)
+    assert record.status == FAILED
+    assert record.topic == "Zombie survival"
+    assert "Phase 1" in record.phases
@@ -0,0 +1,84 @@
+from src.agents.similarity import (
+    TopicIndex,
+    jaccard,
+    minhash_signature,
+    normalize_text,
+    shingles,
+)
+
+TOPIC = "AI agent for customer support in a travel agency"
+
+
+def index(tmp_path, **kwargs) -> TopicIndex:
+    return TopicIndex(db_file=str(tmp_path / "topic_index.db"), **kwargs)
+
+
+def test_similar_topics_share_an_lsh_band(tmp_path):
+    topics = index(tmp_path)
+    near = minhash_signature(shingles(normalize_text(TOPIC + "s")), topics.num_bins)
+    far = minhash_signature(
+        shingles(normalize_text("zombie survival")), topics.num_bins
+    )
+    keys = set(topics._band_keys(minhash_signature(shingles(normalize_text(TOPIC)))))
+
+    assert keys & set(topics._band_keys(near))
+    assert not keys & set(topics._band_keys(far))
+
+
+def test_near_duplicate_is_found_with_its_exact_similarity(tmp_path):
+    topics = index(tmp_path)
+    topics.add(TOPIC, "travel prompt")
+    topics.add("zombie survival guide", "zombie prompt")
+
+    match = topics.query(TOPIC + "s")
+
+    assert (match.topic, match.final_prompt) == (TOPIC, "travel prompt")
+    expected = jaccard(
+        shingles(normalize_text(TOPIC)), shingles(normalize_text(TOPIC + "s"))
+    )
+    assert match.similarity == expected < 1.0
+
+
+def test_normalized_identical_topic_takes_the_exact_match_path(tmp_path):
+    topics = index(tmp_path)
+    topics.add(TOPIC, "travel prompt")
+
+    match = topics.query(f"  {TOPIC.upper()}!! ")
+
+    assert (match.topic, match.similarity) == (TOPIC, 1.0)
+
+
+def test_matches_below_the_threshold_are_dropped(tmp_path):
+    topics = index(tmp_path)
+    topics.add(TOPIC, "travel prompt")
+    similarity = topics.query(TOPIC + " abroad").similarity
+
+    assert topics.query(TOPIC + " abroad", threshold=similarity) is not None
+    assert topics.query(TOPIC + " abroad", threshold=similarity + 0.01) is None
+    assert topics.query("zombie survival") is None
+
+
+def test_adding_an_identical_topic_replaces_its_prompt(tmp_path):
+    topics = index(tmp_path)
+    topics.add(TOPIC, "first")
+    topics.add(TOPIC.lower(), "second")
+
+    assert len(topics) == 1
+    assert topics.query(TOPIC).final_prompt == "second"
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    index(tmp_path).add(TOPIC, "travel prompt")
+
+    reloaded = index(tmp_path)
+
+    assert len(reloaded) == 1
+    assert reloaded.query(TOPIC + "s").final_prompt == "travel prompt"
+
+
+def test_signatures_of_another_size_are_recomputed_on_load(tmp_path):
+    index(tmp_path, num_bins=16, bands=4).add(TOPIC, "travel prompt")
+
+    reloaded = index(tmp_path, num_bins=32, bands=8)
+
+    assert reloaded.query(TOPIC + "s").final_prompt == "travel prompt"
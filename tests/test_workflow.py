@@ -0,0 +1,169 @@
+import json
+from collections import Counter
+from typing import List
+
+from src.agents.agents import PromptGeneration
+from src.agents.budget import ContextBudget
+from src.agents.mock import MockModel
+
+
+def run(workflow_kwargs, topic: str, **kwargs):
+    workflow = PromptGeneration(session_id=topic, **workflow_kwargs, **kwargs)
+    return workflow, [response.content for response in workflow.run(topic=topic)]
+
+
+class SpyModel(MockModel):
+    """Records the last message of every request, across agent copies."""
+
+    messages: List[str] = []
+
+    def _next_response(self, messages):
+        SpyModel.messages.append(messages[-1].get_content_string())
+        return super()._next_response(messages)
+
+
+def spy(workflow_kwargs, evaluator: bool = False) -> List[str]:
+    SpyModel.messages = []
+    workflow_kwargs["generator_model"] = SpyModel(latency=0)
+    if evaluator:
+        workflow_kwargs["evaluator_model"] = SpyModel(latency=0)
+    return SpyModel.messages
+
+
+SPANISH_TOPIC = (
+    "Asistente de atención al cliente para una aseguradora que debe hablar "
+    "siempre en un tono formal y resolver el 97 por ciento de las consultas"
+)
+
+
+def test_topic_differing_in_punctuation_reuses_the_final_prompt(workflow_kwargs):
+    workflow_kwargs["reuse_threshold"] = 0.9
+    first, _ = run(workflow_kwargs, "zombie survival")
+    _, contents = run(workflow_kwargs, "Zombie survival!")
+
+    assert len(contents) == 1
+    assert contents[0].startswith("# Reused Prompt (similar topic: zombie survival")
+    assert contents[0].endswith(first.get_cached_improved_prompt("zombie survival"))
+
+
+def test_identical_topic_is_served_from_the_phase_cache(workflow_kwargs):
+    run(workflow_kwargs, "zombie survival")
+    _, contents = run(workflow_kwargs, "Zombie  Survival")
+
+    assert [c.split("\n")[0] for c in contents] == [
+        "# 1. Initial Prompt Generation (Cached)",
+        "# 2. Prompt Evaluation (Cached)",
+        "# 3. Improved Prompt Generation (Cached)",
+    ]
+
+
+class CountingBudget(ContextBudget):
+    def __init__(self):
+        super().__init__()
+        self.fitted = Counter()
+
+    def fit(self, phase, *args, **kwargs):
+        self.fitted[phase] += 1
+        return super().fit(phase, *args, **kwargs)
+
+
+def test_each_phase_input_is_budgeted_once(workflow_kwargs):
+    budget = CountingBudget()
+    run(workflow_kwargs, "zombie survival", context_budget=budget)
+
+    assert budget.fitted == {"Phase 1": 1, "Phase 2": 1, "Phase 3": 1}
+
+
+def test_metrics_are_attached_once_per_phase(workflow_kwargs):
+    workflow = PromptGeneration(session_id="zombie survival", **workflow_kwargs)
+    responses = list(workflow.run(topic="zombie survival", stream=True))
+
+    with_metrics = [r for r in responses if r.metrics]
+    assert len(responses) > 3
+    assert [sorted(r.metrics["phases"]) for r in with_metrics] == [
+        ["Phase 1"],
+        ["Phase 1", "Phase 2"],
+        ["Phase 1", "Phase 2", "Phase 3"],
+    ]
+    # A streamed phase carries them on its closing response, after the deltas.
+    assert responses[-1] is with_metrics[-1]
+
+
+def test_near_duplicate_topic_is_not_reused_by_default(workflow_kwargs):
+    run(workflow_kwargs, SPANISH_TOPIC)
+    negated = SPANISH_TOPIC.replace("debe hablar", "no debe hablar")
+    _, contents = run(workflow_kwargs, negated.replace("97", "12"))
+
+    assert [c.split("\n")[0] for c in contents] == [
+        "# 1. Initial Prompt Generation",
+        "# 2. Prompt Evaluation",
+        "# 3. Improved Prompt Generation",
+    ]
+
+
+def test_reuse_threshold_is_a_cut_off(workflow_kwargs):
+    workflow_kwargs["reuse_threshold"] = 0.99
+    run(workflow_kwargs, SPANISH_TOPIC)
+    _, contents = run(workflow_kwargs, SPANISH_TOPIC.replace("97", "12"))
+
+    assert not contents[0].startswith("# Reused Prompt")
+
+
+def test_similar_topic_seeds_the_initial_prompt(workflow_kwargs):
+    first, _ = run(workflow_kwargs, SPANISH_TOPIC)
+    final_prompt = first.get_cached_improved_prompt(SPANISH_TOPIC)
+    messages = spy(workflow_kwargs)
+    run(workflow_kwargs, SPANISH_TOPIC.replace("97", "12"))
+
+    phase_1 = json.loads(messages[0])
+    assert phase_1["reference_topic"] == SPANISH_TOPIC
+    assert phase_1["reference_prompt"] == final_prompt
+
+
+def test_dissimilar_topic_is_not_seeded(workflow_kwargs):
+    run(workflow_kwargs, SPANISH_TOPIC)
+    messages = spy(workflow_kwargs)
+    run(workflow_kwargs, "zombie survival")
+
+    assert "reference_prompt" not in json.loads(messages[0])
+
+
+def tournament(workflow_kwargs, topic: str, candidates: int = 3, **kwargs):
+    messages = spy(workflow_kwargs, evaluator=True)
+    workflow = PromptGeneration(session_id=f"{topic}-{candidates}", **workflow_kwargs)
+    list(workflow.run(topic=topic, candidates=candidates, finalists=1, **kwargs))
+    return messages
+
+
+def phase_1_requests(messages):
+    return [m for m in messages if '"candidate"' in m]
+
+
+def phase_2_requests(messages):
+    return [m for m in messages if '"prompt_to_evaluate"' in m]
+
+
+def test_tournament_candidates_are_served_from_the_phase_cache(workflow_kwargs):
+    messages = tournament(workflow_kwargs, "zombie survival")
+    assert (len(phase_1_requests(messages)), len(phase_2_requests(messages))) == (3, 3)
+
+    # Only the finalist's improvement is requested again.
+    messages = tournament(workflow_kwargs, "Zombie  survival")
+    assert phase_1_requests(messages) == phase_2_requests(messages) == []
+    assert len(messages) == 1
+
+
+def test_tournament_without_cache_generates_every_candidate(workflow_kwargs):
+    tournament(workflow_kwargs, "zombie survival")
+
+    messages = tournament(workflow_kwargs, "zombie survival", use_cache=False)
+
+    assert (len(phase_1_requests(messages)), len(phase_2_requests(messages))) == (3, 3)
+
+
+def test_tournament_candidates_are_keyed_by_the_candidate_count(workflow_kwargs):
+    tournament(workflow_kwargs, "zombie survival", candidates=2)
+
+    messages = tournament(workflow_kwargs, "zombie survival", candidates=3)
+
+    assert len(phase_1_requests(messages)) == 3
@@ -0,0 +1,108 @@
+import difflib
+
+import pytest
+
+from src.agents.tools.patch import (
+    PatchError,
+    apply_edits,
+    apply_line_edits,
+    apply_unified_diff,
+)
+
+
+def unified_diff(before: str, after: str) -> str:
+    """A unified diff as git writes it, with "\\ No newline" markers."""
+    lines = []
+    for line in difflib.unified_diff(
+        before.splitlines(keepends=True), after.splitlines(keepends=True), "a", "b"
+    ):
+        lines.append(line)
+        if not line.endswith("\n"):
+            lines.append("\n\\ No newline at end of file\n")
+    return "".join(lines)
+
+
+def patch(before: str, after: str) -> str:
+    lines, _ = apply_unified_diff(
+        before.splitlines(keepends=True), unified_diff(before, after)
+    )
+    return "".join(lines)
+
+
+@pytest.mark.parametrize(
+    "before, after",
+    [
+        ("a\nb\nc\n", "a\nB\nc\n"),
+        ("a\nb", "a\nc"),
+        ("a\nb", "a\nb\n"),
+        ("a\nb\n", "a\nb"),
+        ("a\nb", "a\nb\nc"),
+        ("a\nb\n", "a\n"),
+        ("", "a\n"),
+    ],
+)
+def test_unified_diff_round_trip(before, after):
+    assert patch(before, after) == after
+
+
+def test_unified_diff_counts_changes():
+    _, stats = apply_unified_diff(
+        ["a\n", "b\n", "c\n"], unified_diff("a\nb\nc\n", "a\nx\ny\nc\n")
+    )
+
+    assert (stats.hunks, stats.lines_added, stats.lines_removed) == (1, 2, 1)
+
+
+def test_stale_unified_diff_fails():
+    diff = unified_diff("a\nb\n", "a\nc\n")
+
+    with pytest.raises(PatchError, match="does not match line 2"):
+        apply_unified_diff(["a\n", "x\n"], diff)
+
+
+def edit(text: str, *edits) -> str:
+    keys = ("start_line", "end_line", "replace")
+    lines, _ = apply_line_edits(
+        text.splitlines(keepends=True), [dict(zip(keys, e)) for e in edits]
+    )
+    return "".join(lines)
+
+
+@pytest.mark.parametrize(
+    "text, edits, expected",
+    [
+        ("x\ny\n", [(2, 2, "z")], "x\nz\n"),
+        ("x\ny", [(2, 2, "z")], "x\nz"),
+        ("x\ny\nw\n", [(1, 1, "a"), (3, 3, "b")], "a\ny\nb\n"),
+        ("x\r\ny\r\n", [(1, 1, "q")], "q\r\ny\r\n"),
+        ("x\ny\n", [(1, 0, "w")], "w\nx\ny\n"),
+        ("x\ny\n", [(3, 2, "z")], "x\ny\nz\n"),
+        ("x\ny", [(3, 2, "z")], "x\ny\nz"),
+        ("x\ny\n", [(2, 2, "")], "x\n"),
+    ],
+)
+def test_line_edits(text, edits, expected):
+    assert edit(text, *edits) == expected
+
+
+def test_overlapping_line_edits_fail():
+    with pytest.raises(PatchError, match="overlaps"):
+        edit("a\nb\nc\n", (1, 2, "x"), (2, 3, "y"))
+
+
+def test_mixed_edits_apply_line_ranges_first():
+    content, stats = apply_edits(
+        "a\nb\nc\n",
+        [
+            {"search": "A\n", "replace": "x\n"},
+            {"start_line": 1, "end_line": 1, "replace": "A\n"},
+        ],
+    )
+
+    assert content == "x\nb\nc\n"
+    assert stats.hunks == 2
+
+
+def test_missing_search_text_fails():
+    with pytest.raises(PatchError, match="not found"):
+        apply_edits("a\nb\n", [{"search": "z", "replace": "y"}])
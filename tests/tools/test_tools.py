@@ -0,0 +1,213 @@
+import os
+import stat
+
+from src.agents.tools.tools import FileSystemTools
+
+TEXT = "".join(f"line {i}\n" for i in range(1, 21))
+
+
+def write(tmp_path, name: str = "prompt.md", content: str = TEXT) -> str:
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+# --- edit_and_apply ---
+def test_full_content_edit_counts_every_hunk(tmp_path):
+    path = write(tmp_path)
+    new_content = TEXT.replace("line 2\n", "two\n").replace("line 18\n", "")
+
+    summary = FileSystemTools().edit_and_apply(path, new_content=new_content)
+
+    assert "+1 -2 lines in 2 hunk(s)" in summary
+    assert open(path).read() == new_content
+
+
+def test_mixed_edit_batch(tmp_path):
+    path = write(tmp_path)
+
+    summary = FileSystemTools().edit_and_apply(
+        path,
+        edits=[
+            {"search": "LINE 1\n", "replace": "first\n"},
+            {"start_line": 1, "end_line": 1, "replace": "LINE 1\n"},
+            {"start_line": 20, "end_line": 19, "replace": "nineteen and a half\n"},
+        ],
+    )
+
+    assert "in 3 hunk(s)" in summary
+    lines = open(path).read().splitlines()
+    assert lines[0] == "first"
+    assert lines[19:21] == ["nineteen and a half", "line 20"]
+
+
+def test_missing_search_text_leaves_the_file_unchanged(tmp_path):
+    path = write(tmp_path)
+
+    summary = FileSystemTools().edit_and_apply(
+        path, edits=[{"search": "line 99\n", "replace": ""}]
+    )
+
+    assert summary.startswith("Error")
+    assert "not found" in summary
+    assert open(path).read() == TEXT
+
+
+def test_edit_keeps_the_file_mode(tmp_path):
+    path = write(tmp_path)
+    os.chmod(path, 0o644)
+
+    FileSystemTools().edit_and_apply(path, diff="@@ -1 +1 @@\n-line 1\n+one\n")
+
+    assert open(path).read().startswith("one\n")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+
+# --- read_file ---
+def test_read_line_range(tmp_path):
+    path = write(tmp_path)
+
+    result = FileSystemTools().read_file(path, start_line=3, end_line=4)
+
+    assert (
+        result
+        == f"[{path} | {len(TEXT)} bytes | 20 lines | lines 3-4]\nline 3\nline 4\n"
+    )
+
+
+def test_line_range_past_the_end_is_clamped(tmp_path):
+    path = write(tmp_path)
+
+    result = FileSystemTools().read_file(path, start_line=19, end_line=40)
+
+    assert result.endswith("lines 19-20]\nline 19\nline 20\n")
+
+
+def test_invalid_line_ranges_are_errors(tmp_path):
+    path = write(tmp_path)
+    tools = FileSystemTools()
+
+    assert tools.read_file(path, start_line=4, end_line=3).startswith("Error:")
+    assert tools.read_file(path, start_line=21).startswith("Error:")
+    assert tools.read_file(path, start_line=21, end_line=21).startswith("Error:")
+
+
+def test_byte_offset_inside_a_character_moves_to_its_start(tmp_path):
+    path = write(tmp_path, content="añb\n")
+
+    result = FileSystemTools().read_file(path, offset=2)
+
+    assert result == f"[{path} | 5 bytes | 1 lines | bytes 1-5]\nñb\n"
+
+
+def test_budget_never_cuts_a_character(tmp_path):
+    path = write(tmp_path, content="ñ" * 10)
+
+    result = FileSystemTools(max_read_bytes=5).read_file(path)
+
+    header, content = result.split("\n", 1)
+    assert content == "ññ"
+    assert header.endswith("bytes 0-4 | truncated, continue with offset=4]")
+
+
+def test_truncated_line_range_says_where_to_continue(tmp_path):
+    path = write(tmp_path)
+
+    result = FileSystemTools(max_read_bytes=20).read_file(path, start_line=1)
+
+    header, content = result.split("\n", 1)
+    assert content == "line 1\nline 2\n"
+    assert header.endswith("lines 1-2 | truncated, continue with start_line=3]")
+
+
+# --- list_files ---
+def tree(tmp_path) -> str:
+    root = tmp_path / "tree"
+    (root / "sub" / "deep").mkdir(parents=True)
+    for name, size in [("b.md", 3), ("a.md", 1), ("c.txt", 2)]:
+        (root / name).write_text("x" * size)
+    (root / "sub" / "d.md").write_text("d")
+    (root / "sub" / "deep" / "e.md").write_text("e")
+    return str(root)
+
+
+def listed(result: str):
+    return result.split("\n")[1:]
+
+
+def test_list_pages_with_a_cursor(tmp_path):
+    root = tree(tmp_path)
+    tools = FileSystemTools()
+
+    first = tools.list_files(root, limit=2)
+    second = tools.list_files(root, limit=2, cursor="2")
+
+    assert (
+        first.split("\n")[0] == f"[{root} | 4 entries | showing 1-2 | next cursor: 2]"
+    )
+    assert listed(first) == ["a.md", "b.md"]
+    assert second.split("\n")[0] == f"[{root} | 4 entries | showing 3-4]"
+    assert listed(second) == ["c.txt", "sub/"]
+
+
+def test_invalid_cursors_are_errors(tmp_path):
+    root = tree(tmp_path)
+    tools = FileSystemTools()
+
+    assert tools.list_files(root, cursor="-2") == "Error: Invalid cursor: -2"
+    assert tools.list_files(root, cursor="next") == "Error: Invalid cursor: next"
+    assert tools.list_files(root, cursor="4").startswith("Error: Cursor 4 is past")
+
+
+def test_list_depth(tmp_path):
+    root = tree(tmp_path)
+    tools = FileSystemTools()
+
+    assert "sub/d.md" not in listed(tools.list_files(root))
+    assert "sub/d.md" in listed(tools.list_files(root, depth=1))
+    assert "sub/deep/e.md" not in listed(tools.list_files(root, depth=1))
+    assert "sub/deep/e.md" in listed(tools.list_files(root, depth=2))
+
+
+def test_list_pattern(tmp_path):
+    root = tree(tmp_path)
+    tools = FileSystemTools()
+
+    assert listed(tools.list_files(root, pattern="*.md", depth=2)) == [
+        "a.md",
+        "b.md",
+        "sub/d.md",
+        "sub/deep/e.md",
+    ]
+    assert listed(tools.list_files(root, pattern="sub/*.md", depth=1)) == ["sub/d.md"]
+    assert tools.list_files(root, pattern="*.py") == "No matches."
+
+
+def test_list_sort_order(tmp_path):
+    root = tree(tmp_path)
+    tools = FileSystemTools()
+
+    assert listed(tools.list_files(root, pattern="*.*", sort="size")) == [
+        "a.md",
+        "c.txt",
+        "b.md",
+    ]
+    assert listed(tools.list_files(root, pattern="*.*", sort="-name")) == [
+        "c.txt",
+        "b.md",
+        "a.md",
+    ]
+    assert tools.list_files(root, sort="color").startswith("Error: Unknown sort")
+
+
+def test_listing_sees_the_toolkit_writes(tmp_path):
+    root = tree(tmp_path)
+    tools = FileSystemTools()
+    assert "a.md\t1\t" in tools.list_files(root, details=True)
+
+    # Rewriting a file leaves the directory's mtime as it was.
+    tools.create_file(os.path.join(root, "a.md"), "x" * 5)
+    tools.create_folder(os.path.join(root, "sub", "new"))
+
+    assert "a.md\t5\t" in tools.list_files(root, details=True)
+    assert "sub/new/" in listed(tools.list_files(root, depth=1))